@@ -261,6 +261,27 @@ create index extract_location_id
 create index extract_status_id
 	on process_tracker.extract_tracking (extract_status_id);
 
+create index extract_tracking_idx01
+	on process_tracker.extract_tracking (extract_status_id, extract_registration_date_time);
+
+create table process_tracker.extract_filename_token
+(
+	filename_token varchar(250) not null comment 'A lower case run of letters and digits in the filename.',
+	extract_id int not null comment 'The extract whose filename contains the token.',
+	created_date_time timestamp default CURRENT_TIMESTAMP not null,
+	created_by int default 0 not null,
+	update_date_time timestamp default CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP not null,
+	updated_by int default 0 not null,
+	primary key (filename_token, extract_id),
+	constraint extract_filename_token_fk01
+		foreign key (extract_id) references extract_tracking (extract_id)
+			on delete cascade
+)
+comment 'The words making up each extract filename, for searching filenames by word.  Kept up to date from extract_tracking.';
+
+create index extract_filename_token_idx01
+	on process_tracker.extract_filename_token (extract_id);
+
 
 create table process_tracker.extract_dependency
 (
@@ -365,6 +386,7 @@ create table process
 	schedule_frequency_id int default 0 not null,
 	last_completed_run_date_time datetime not null,
 	last_errored_run_date_time datetime not null,
+	process_definition_hash varchar(64) null comment 'Fingerprint of the sources, targets and dataset types last registered to the process.',
 	created_date_time timestamp default CURRENT_TIMESTAMP not null,
 	created_by int default 0 not null,
 	update_date_time timestamp default CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP not null,
@@ -406,6 +428,25 @@ create table process_dependency
 create index child_process_id
 	on process_dependency (child_process_id);
 
+create table process_dependency_closure
+(
+	descendant_process_id int not null comment 'The dependent process.',
+	ancestor_process_id int not null comment 'A process the dependent process depends on, directly or through other processes.',
+	created_date_time timestamp default CURRENT_TIMESTAMP not null,
+	created_by int default 0 not null,
+	update_date_time timestamp default CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP not null,
+	updated_by int default 0 not null,
+	primary key (descendant_process_id, ancestor_process_id),
+	constraint process_dependency_closure_fk01
+		foreign key (descendant_process_id) references process (process_id),
+	constraint process_dependency_closure_fk02
+		foreign key (ancestor_process_id) references process (process_id)
+)
+comment 'Every process a process depends on, directly or through other processes.  Kept up to date from process_dependency.';
+
+create index process_dependency_closure_idx01
+	on process_dependency_closure (ancestor_process_id);
+
 create table process_source
 (
 	source_id int not null,
@@ -473,6 +514,27 @@ create table process_tracking
 		foreign key (process_run_actor_id) references actor_lkup (actor_id)
 );
 
+create table process_run_state
+(
+	process_id int not null
+		primary key,
+	process_tracking_id int not null comment 'The current, or last, run of the process.',
+	process_run_id int not null comment 'The run identifier of the current run.',
+	process_status_id int not null comment 'The status of the current run.',
+	consecutive_failure_count int default 0 not null comment 'The number of runs that failed in a row, up to and including the current run.',
+	created_date_time timestamp default CURRENT_TIMESTAMP not null,
+	created_by int default 0 not null,
+	update_date_time timestamp default CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP not null,
+	updated_by int default 0 not null,
+	constraint process_run_state_fk01
+		foreign key (process_id) references process (process_id),
+	constraint process_run_state_fk02
+		foreign key (process_tracking_id) references process_tracking (process_tracking_id),
+	constraint process_run_state_fk03
+		foreign key (process_status_id) references process_status_lkup (process_status_id)
+)
+comment 'The current run of each process, kept up to date for run admission.';
+
 
 
 create table error_tracking
@@ -527,6 +589,9 @@ create index process_tracking_id
 create index process_id
 	on process_tracking (process_id);
 
+create index process_tracking_idx04
+	on process_tracking (process_id, process_run_id);
+
 create index process_run_actor_id
 	on process_tracking (process_run_actor_id);
 
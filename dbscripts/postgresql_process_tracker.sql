@@ -388,6 +388,7 @@ create table process
 			references schedule_frequency_lkup,
 	last_completed_run_date_time timestamp default '1900-01-01 00:00:00'::timestamp without time zone not null,
 	last_errored_run_date_time timestamp default '1900-01-01 00:00:00'::timestamp without time zone not null,
+	process_definition_hash varchar(64),
 	created_date_time timestamp with time zone default CURRENT_TIMESTAMP not null,
 	created_by integer default 0 not null,
 	update_date_time timestamp with time zone default CURRENT_TIMESTAMP not null,
@@ -406,6 +407,8 @@ comment on column process.process_tool_id is 'The type of tool used to execute t
 
 comment on column process.last_failed_run_date_time is 'The last time the process failed to run.';
 
+comment on column process.process_definition_hash is 'Fingerprint of the sources, targets and dataset types last registered to the process.';
+
 alter table process owner to pt_admin;
 
 create unique index process_udx01
@@ -438,6 +441,33 @@ comment on column process_dependency.child_process_id is 'The child process.';
 
 alter table process_dependency owner to pt_admin;
 
+create table process_dependency_closure
+(
+	descendant_process_id integer not null
+		constraint process_dependency_closure_fk01
+			references process,
+	ancestor_process_id integer not null
+		constraint process_dependency_closure_fk02
+			references process,
+	constraint process_dependency_closure_pk
+		primary key (descendant_process_id, ancestor_process_id),
+	created_date_time timestamp with time zone default CURRENT_TIMESTAMP not null,
+	created_by integer default 0 not null,
+	update_date_time timestamp with time zone default CURRENT_TIMESTAMP not null,
+	updated_by integer default 0 not null
+);
+
+comment on table process_dependency_closure is 'Every process a process depends on, directly or through other processes.  Kept up to date from process_dependency.';
+
+comment on column process_dependency_closure.descendant_process_id is 'The dependent process.';
+
+comment on column process_dependency_closure.ancestor_process_id is 'A process the dependent process depends on, directly or through other processes.';
+
+alter table process_dependency_closure owner to pt_admin;
+
+create index process_dependency_closure_idx01
+	on process_dependency_closure (ancestor_process_id);
+
 create table process_tracking
 (
 	process_tracking_id serial not null
@@ -501,9 +531,48 @@ create index process_tracking_idx02
 create index process_tracking_idx03
 	on process_tracking (process_run_low_date_time, process_run_high_date_time);
 
+create index process_tracking_idx04
+	on process_tracking (process_id, process_run_id);
+
+create index process_tracking_idx05
+	on process_tracking (process_status_id);
+
 create unique index process_tracking_udx01
 	on process_tracking (process_run_name);
 
+create table process_run_state
+(
+	process_id integer not null
+		constraint process_run_state_pk
+			primary key
+		constraint process_run_state_fk01
+			references process,
+	process_tracking_id integer not null
+		constraint process_run_state_fk02
+			references process_tracking,
+	process_run_id integer not null,
+	process_status_id integer not null
+		constraint process_run_state_fk03
+			references process_status_lkup,
+	consecutive_failure_count integer default 0 not null,
+	created_date_time timestamp with time zone default CURRENT_TIMESTAMP not null,
+	created_by integer default 0 not null,
+	update_date_time timestamp with time zone default CURRENT_TIMESTAMP not null,
+	updated_by integer default 0 not null
+);
+
+comment on table process_run_state is 'The current run of each process, kept up to date for run admission.';
+
+comment on column process_run_state.process_tracking_id is 'The current, or last, run of the process.';
+
+comment on column process_run_state.process_run_id is 'The run identifier of the current run.';
+
+comment on column process_run_state.process_status_id is 'The status of the current run.';
+
+comment on column process_run_state.consecutive_failure_count is 'The number of runs that failed in a row, up to and including the current run.';
+
+alter table process_run_state owner to pt_admin;
+
 create table cluster_process
 (
 	cluster_id integer not null
@@ -1022,6 +1091,49 @@ comment on column extract_tracking.extract_load_record_count is 'The record coun
 
 alter table extract_tracking owner to pt_admin;
 
+create index extract_tracking_idx01
+	on extract_tracking (extract_status_id, extract_registration_date_time);
+
+create index extract_tracking_idx02
+	on extract_tracking (extract_location_id);
+
+create index extract_tracking_idx03
+	on extract_tracking (extract_filename text_pattern_ops);
+
+create index extract_tracking_idx04
+	on extract_tracking (reverse(extract_filename) text_pattern_ops);
+
+create extension if not exists pg_trgm;
+
+create index extract_tracking_idx05
+	on extract_tracking using gin (extract_filename gin_trgm_ops);
+
+create table extract_filename_token
+(
+	filename_token varchar(250) not null,
+	extract_id integer not null
+		constraint extract_filename_token_fk01
+			references extract_tracking
+				on delete cascade,
+	constraint extract_filename_token_pk
+		primary key (filename_token, extract_id),
+	created_date_time timestamp with time zone default CURRENT_TIMESTAMP not null,
+	created_by integer default 0 not null,
+	update_date_time timestamp with time zone default CURRENT_TIMESTAMP not null,
+	updated_by integer default 0 not null
+);
+
+comment on table extract_filename_token is 'The words making up each extract filename, for searching filenames by word.  Kept up to date from extract_tracking.';
+
+comment on column extract_filename_token.filename_token is 'A lower case run of letters and digits in the filename.';
+
+comment on column extract_filename_token.extract_id is 'The extract whose filename contains the token.';
+
+alter table extract_filename_token owner to pt_admin;
+
+create index extract_filename_token_idx01
+	on extract_filename_token (extract_id);
+
 create table extract_process_tracking
 (
 	extract_tracking_id integer not null
@@ -1169,6 +1281,8 @@ CREATE TRIGGER extract_dataset_type_update_date_time_trg BEFORE UPDATE
     ON process_tracker.extract_dataset_type FOR EACH ROW EXECUTE PROCEDURE update_date_time_trigger();
 CREATE TRIGGER extract_dependency_update_date_time_trg BEFORE UPDATE
     ON process_tracker.extract_dependency FOR EACH ROW EXECUTE PROCEDURE update_date_time_trigger();
+CREATE TRIGGER extract_filename_token_update_date_time_trg BEFORE UPDATE
+    ON process_tracker.extract_filename_token FOR EACH ROW EXECUTE PROCEDURE update_date_time_trigger();
 CREATE TRIGGER extract_filetype_lkup_update_date_time_trg BEFORE UPDATE
     ON process_tracker.extract_filetype_lkup FOR EACH ROW EXECUTE PROCEDURE update_date_time_trigger();
 CREATE TRIGGER extract_process_tracking_update_date_time_trg BEFORE UPDATE
@@ -1189,12 +1303,16 @@ CREATE TRIGGER location_lkup_update_date_time_trg BEFORE UPDATE
     ON process_tracker.location_type_lkup FOR EACH ROW EXECUTE PROCEDURE update_date_time_trigger();
 CREATE TRIGGER process_update_date_time_trg BEFORE UPDATE
     ON process_tracker.process FOR EACH ROW EXECUTE PROCEDURE update_date_time_trigger();
+CREATE TRIGGER process_run_state_update_date_time_trg BEFORE UPDATE
+    ON process_tracker.process_run_state FOR EACH ROW EXECUTE PROCEDURE update_date_time_trigger();
 CREATE TRIGGER process_contact_update_date_time_trg BEFORE UPDATE
     ON process_tracker.process_contact FOR EACH ROW EXECUTE PROCEDURE update_date_time_trigger();
 CREATE TRIGGER process_dataset_type_update_date_time_trg BEFORE UPDATE
     ON process_tracker.process_dataset_type FOR EACH ROW EXECUTE PROCEDURE update_date_time_trigger();
 CREATE TRIGGER process_dependency_update_date_time_trg BEFORE UPDATE
     ON process_tracker.process_dependency FOR EACH ROW EXECUTE PROCEDURE update_date_time_trigger();
+CREATE TRIGGER process_dependency_closure_update_date_time_trg BEFORE UPDATE
+    ON process_tracker.process_dependency_closure FOR EACH ROW EXECUTE PROCEDURE update_date_time_trigger();
 CREATE TRIGGER process_filter_update_date_time_trg BEFORE UPDATE
     ON process_tracker.process_filter FOR EACH ROW EXECUTE PROCEDURE update_date_time_trigger();
 CREATE TRIGGER process_source_update_date_time_trg BEFORE UPDATE
@@ -1,3 +1,4 @@
+from process_tracker.exceptions import ProcessRunLockError
 from process_tracker.extract_tracker import ExtractTracker
 from process_tracker.process_tracker import ProcessTracker
 
@@ -0,0 +1,314 @@
+# Async Tracking
+# Asyncio versions of the process and extract tracking operations used most by pipelines.
+
+import asyncio
+import functools
+
+from process_tracker.extract_tracker import ExtractTracker
+from process_tracker.process_tracker import ProcessTracker
+from process_tracker.utilities.async_data_store import AsyncDataStore
+
+
+class AsyncProcessTracker:
+    def __init__(self, process_tracker, executor=None):
+        """
+        Asyncio wrapper around a ProcessTracker.  Use AsyncProcessTracker.start to start a process run without blocking
+        the event loop.
+        :param process_tracker: The process run being tracked.
+        :type process_tracker: ProcessTracker
+        :param executor: Optional executor to run tracking calls in.  Default is the event loop's default executor.
+        :type executor: concurrent.futures.Executor
+        """
+        self.process_tracker = process_tracker
+        self.data_store = AsyncDataStore(
+            data_store=process_tracker.data_store, executor=executor
+        )
+
+    @classmethod
+    async def start(cls, executor=None, **kwargs):
+        """
+        Start a new process run.
+        :param executor: Optional executor to run tracking calls in.  Default is the event loop's default executor.
+        :type executor: concurrent.futures.Executor
+        :param kwargs: The ProcessTracker parameters (process_name, process_type, actor_name, tool_name, etc.)
+        :return: AsyncProcessTracker
+        """
+        loop = asyncio.get_event_loop()
+
+        process_tracker = await loop.run_in_executor(
+            executor, functools.partial(ProcessTracker, **kwargs)
+        )
+
+        return cls(process_tracker=process_tracker, executor=executor)
+
+    async def bulk_change_extract_status(self, extracts, extract_status):
+        """
+        Given a set of extracts, change their status.
+        :param extracts: List of AsyncExtractTracker objects to be bulk updated.
+        :param extract_status: The status to change the extract files to.
+        :type extract_status: str
+        :return:
+        """
+        return await self.data_store.run(
+            self.process_tracker.bulk_change_extract_status,
+            extracts=[extract.extract_tracker for extract in extracts],
+            extract_status=extract_status,
+            process_run=self.process_tracker,
+        )
+
+    async def change_run_status(self, new_status, end_date=None):
+        """
+        Change the process run's status.
+        :param new_status: The new status of the process run.
+        :type new_status: str
+        :param end_date: Optional end date of the process run.
+        :type end_date: datetime
+        :return:
+        """
+        return await self.data_store.run(
+            self.process_tracker.change_run_status,
+            new_status=new_status,
+            end_date=end_date,
+        )
+
+    async def claim_extracts(
+        self, n, extract_process_name=None, location_name=None, location_path=None
+    ):
+        """
+        Claim up to n ready extracts for the process run, moving them to 'loading'.
+        :param n: The maximum number of extracts to claim.
+        :type n: int
+        :param extract_process_name: Optional name of the process the extracts must be associated with.
+        :type extract_process_name: str
+        :param location_name: Optional name of the location the extracts must be in.
+        :type location_name: str
+        :param location_path: Optional path of the location the extracts must be in.
+        :type location_path: str
+        :return: List of ExtractReference objects.
+        """
+        return await self.data_store.run(
+            self.process_tracker.claim_extracts,
+            n=n,
+            extract_process_name=extract_process_name,
+            location_name=location_name,
+            location_path=location_path,
+        )
+
+    async def find_extracts_by_filename(self, filename, status="ready"):
+        """
+        Find all extracts matching the filename.
+        :param filename: Name of the file being searched for.
+        :type filename: str
+        :param status: Status of the extracts.  Default is 'ready'.
+        :type status: str
+        :return: List of AsyncExtractTracker objects.
+        """
+        extracts = await self.data_store.run(
+            self.process_tracker.find_extracts_by_filename,
+            filename=filename,
+            status=status,
+        )
+
+        return self.wrap_extracts(extracts=extracts)
+
+    async def find_extracts_by_location(
+        self, location_name=None, location_path=None, status="ready"
+    ):
+        """
+        Find all extracts for the given location name or path.
+        :param location_name: The name of the location.
+        :type location_name: str
+        :param location_path: The path of the location.
+        :type location_path: str
+        :param status: Status of the extracts.  Default is 'ready'.
+        :type status: str
+        :return: List of AsyncExtractTracker objects.
+        """
+        extracts = await self.data_store.run(
+            self.process_tracker.find_extracts_by_location,
+            location_name=location_name,
+            location_path=location_path,
+            status=status,
+        )
+
+        return self.wrap_extracts(extracts=extracts)
+
+    async def find_extracts_by_process(self, extract_process_name, status="ready"):
+        """
+        Find all extracts for the given process.
+        :param extract_process_name: The name of the process.
+        :type extract_process_name: str
+        :param status: Status of the extracts.  Default is 'ready'.
+        :type status: str
+        :return: List of AsyncExtractTracker objects.
+        """
+        extracts = await self.data_store.run(
+            self.process_tracker.find_extracts_by_process,
+            extract_process_name=extract_process_name,
+            status=status,
+        )
+
+        return self.wrap_extracts(extracts=extracts)
+
+    async def raise_run_error(
+        self, error_type_name, error_description=None, fail_run=False, end_date=None
+    ):
+        """
+        Raise a runtime error for the process run.  If fail_run is set, the run is failed and an exception is raised.
+        :param error_type_name: The name of the type of error being triggered.
+        :type error_type_name: str
+        :param error_description: The description of the error to store in error tracking.
+        :type error_description: str
+        :param fail_run: Flag for triggering a run failure, default False
+        :type fail_run: Boolean
+        :param end_date: Optional end date of the process run, if failed.
+        :type end_date: datetime
+        :return:
+        """
+        return await self.data_store.run(
+            self.process_tracker.raise_run_error,
+            error_type_name=error_type_name,
+            error_description=error_description,
+            fail_run=fail_run,
+            end_date=end_date,
+        )
+
+    async def register_extract(self, **kwargs):
+        """
+        Register an extract for the process run.
+        :param kwargs: The ExtractTracker parameters (filename, location_path, status, etc.)
+        :return: AsyncExtractTracker
+        """
+        return await AsyncExtractTracker.register(process_run=self, **kwargs)
+
+    async def register_extracts_by_location(self, location_path, location_name=None):
+        """
+        For a given location, find all files and register them.
+        :param location_path: Path of the location.
+        :type location_path: str
+        :param location_name: Name of the location.
+        :type location_name: str
+        :return:
+        """
+        return await self.data_store.run(
+            self.process_tracker.register_extracts_by_location,
+            location_path=location_path,
+            location_name=location_name,
+        )
+
+    async def set_process_run_low_high_dates(self, low_date=None, high_date=None):
+        """
+        Set the low and high dates of the process run.
+        :param low_date: The low date of the data processed.
+        :type low_date: datetime
+        :param high_date: The high date of the data processed.
+        :type high_date: datetime
+        :return:
+        """
+        return await self.data_store.run(
+            self.process_tracker.set_process_run_low_high_dates,
+            low_date=low_date,
+            high_date=high_date,
+        )
+
+    async def set_process_run_record_count(self, num_records, processing_type=None):
+        """
+        Set the record count of the process run.
+        :param num_records: The number of records processed.
+        :type num_records: int
+        :param processing_type: Optional type of processing (i.e. insert, update, delete)
+        :type processing_type: str
+        :return:
+        """
+        return await self.data_store.run(
+            self.process_tracker.set_process_run_record_count,
+            num_records=num_records,
+            processing_type=processing_type,
+        )
+
+    def wrap_extracts(self, extracts):
+        """
+        Wrap extract trackers of this process run for async use.
+        :param extracts: List of ExtractTracker objects.
+        :return: List of AsyncExtractTracker objects.
+        """
+        return [
+            AsyncExtractTracker(extract_tracker=extract, data_store=self.data_store)
+            for extract in extracts
+        ]
+
+
+class AsyncExtractTracker:
+    def __init__(self, extract_tracker, data_store):
+        """
+        Asyncio wrapper around an ExtractTracker.  Use AsyncExtractTracker.register, or
+        AsyncProcessTracker.register_extract, to register an extract without blocking the event loop.
+        :param extract_tracker: The extract being tracked.
+        :type extract_tracker: ExtractTracker
+        :param data_store: The process run's async data store.  Extracts share the session of their process run.
+        :type data_store: AsyncDataStore
+        """
+        self.extract_tracker = extract_tracker
+        self.data_store = data_store
+
+    @classmethod
+    async def register(cls, process_run, **kwargs):
+        """
+        Register an extract for the given process run.
+        :param process_run: The process run creating or consuming the extract.
+        :type process_run: AsyncProcessTracker
+        :param kwargs: The ExtractTracker parameters (filename, location_path, status, etc.)
+        :return: AsyncExtractTracker
+        """
+        extract_tracker = await process_run.data_store.run(
+            ExtractTracker, process_run=process_run.process_tracker, **kwargs
+        )
+
+        return cls(extract_tracker=extract_tracker, data_store=process_run.data_store)
+
+    async def change_extract_status(self, new_status, extracts=None):
+        """
+        Change the status of the extract.
+        :param new_status: The new status of the extract.
+        :type new_status: str
+        :param extracts: Optional list of Extract SQLAlchemy objects, used for dependency checks.
+        :return:
+        """
+        return await self.data_store.run(
+            self.extract_tracker.change_extract_status,
+            new_status=new_status,
+            extracts=extracts,
+        )
+
+    async def set_extract_low_high_dates(self, low_date, high_date, audit_type="load"):
+        """
+        Set the low and high dates of the extract.
+        :param low_date: The low date of the data in the extract.
+        :type low_date: datetime
+        :param high_date: The high date of the data in the extract.
+        :type high_date: datetime
+        :param audit_type: Either 'load' or 'write'.  Default is 'load'.
+        :type audit_type: str
+        :return:
+        """
+        return await self.data_store.run(
+            self.extract_tracker.set_extract_low_high_dates,
+            low_date=low_date,
+            high_date=high_date,
+            audit_type=audit_type,
+        )
+
+    async def set_extract_record_count(self, num_records, audit_type="load"):
+        """
+        Set the record count of the extract.
+        :param num_records: The number of records in the extract.
+        :type num_records: int
+        :param audit_type: Either 'load' or 'write'.  Default is 'load'.
+        :type audit_type: str
+        :return:
+        """
+        return await self.data_store.run(
+            self.extract_tracker.set_extract_record_count,
+            num_records=num_records,
+            audit_type=audit_type,
+        )
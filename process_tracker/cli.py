@@ -4,7 +4,11 @@
 import click
 import logging
 
-from process_tracker.utilities.data_store import DataStore
+from process_tracker.models.model_base import Base
+from process_tracker.utilities.data_store import (
+    DataStore,
+    postgresql_filename_search_indexes,
+)
 from process_tracker.utilities.logging import console
 from process_tracker.utilities.utilities import encrypt_password
 
@@ -47,6 +51,65 @@ def upgrade():
     click.echo("Verifying version installed on data store vs package...")
     data_store.determine_versions()
 
+    click.echo("Rebuilding process dependency closure...")
+    data_store.rebuild_process_dependency_closure()
+
+    click.echo("Rebuilding extract filename tokens...")
+    data_store.rebuild_extract_filename_tokens()
+
+    click.echo("Rebuilding process run state...")
+    data_store.rebuild_process_run_state()
+
+
+@main.command()
+@click.option(
+    "-c",
+    "--check",
+    is_flag=True,
+    default=False,
+    help="Compare the data store to the expected indexes and create the missing ones.",
+)
+def indexes(check=False):
+    """
+    List the indexes ProcessTracker expects on its tracking tables.  With check, the data store is compared against
+    them and missing indexes are created, concurrently where the data store supports it.
+    :return:
+    """
+    if not check:
+        for table in Base.metadata.sorted_tables:
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                click.echo(
+                    "%s on %s (%s)"
+                    % (
+                        index.name,
+                        table.name,
+                        ", ".join(column.name for column in index.columns),
+                    )
+                )
+
+        for index_name, definition in sorted(
+            postgresql_filename_search_indexes.items()
+        ):
+            click.echo(
+                "%s on extract_tracking %s (PostgreSQL only)" % (index_name, definition)
+            )
+        return
+
+    click.echo("Checking data store for missing indexes...")
+    created_indexes = [
+        (index.name, index.table.name) for index in data_store.create_missing_indexes()
+    ]
+    created_indexes.extend(
+        (index_name, "extract_tracking")
+        for index_name in data_store.create_filename_search_indexes()
+    )
+
+    if created_indexes:
+        for index_name, table_name in created_indexes:
+            click.echo("Created index %s on %s." % (index_name, table_name))
+    else:
+        click.echo("All expected indexes are in place.")
+
 
 @main.command()
 @click.option("-t", "--topic", help="The topic being created")
@@ -0,0 +1,20 @@
+# Exceptions
+# Exceptions raised by ProcessTracker that callers may want to handle on their own.
+
+
+class ProcessRunLockError(Exception):
+    """
+    Another worker is admitting a run of the same process.  Raised straight away instead of waiting, so schedulers can
+    skip or retry the process.
+    """
+
+    def __init__(self, process_name):
+        """
+        :param process_name: The name of the process that is locked.
+        :type process_name: str
+        """
+        self.process_name = process_name
+
+        super().__init__(
+            "Process %s is being started by another worker." % process_name
+        )
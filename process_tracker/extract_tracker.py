@@ -6,8 +6,6 @@ import logging
 import os
 from pathlib import Path
 
-from sqlalchemy.orm import aliased
-
 from process_tracker.location_tracker import LocationTracker
 from process_tracker.utilities.settings import SettingsManager
 from process_tracker.utilities import utilities
@@ -265,7 +263,7 @@ class ExtractTracker:
                 self.extract.extract_filesize = split_filesize[0]
                 self.extract.extract_filesize_type = split_filesize[1]
 
-            self.session.commit()
+            self.data_store.commit()
 
     def add_dependency(self, dependency_type, dependency):
         """
@@ -295,10 +293,23 @@ class ExtractTracker:
             )
 
         self.session.add(dependency)
-        self.session.commit()
+        self.data_store.commit()
 
         self.logger.info("Extract %s dependency added." % dependency_type)
 
+    def batch(self, size=None, commit_on_error=False):
+        """
+        Defer the commits of extract tracking calls made within a with block and commit them together when the block
+        exits.  Shares the unit of work of the process run, so process and extract calls can be batched together.
+        Example:  with extract_tracker.batch(): ...
+        :param size: Optional maximum number of deferred writes before committing.
+        :type size: int
+        :param commit_on_error: Commit the deferred writes even if the block raises.  Default is to roll them back.
+        :type commit_on_error: bool
+        :return: Context manager
+        """
+        return self.data_store.batch(size=size, commit_on_error=commit_on_error)
+
     def change_extract_status(self, new_status, extracts=None):
         """
         Change an extract record status.
@@ -323,7 +334,7 @@ class ExtractTracker:
             self.extract_process.extract_process_status_id = new_status
             self.extract_process.extract_process_event_date_time = status_date
 
-            self.session.commit()
+            self.data_store.commit()
 
         else:
             self.logger.error("%s is not a valid extract status type." % new_status)
@@ -335,72 +346,20 @@ class ExtractTracker:
     def extract_dependency_check(self, extracts=None):
         """
         Determine if the extract file has any unloaded dependencies before trying to load the file.
-        :param extracts: List of ExtractTracking SQLAlchemy objects, provided if bulk updating status.
+        :param extracts: List of ExtractTracker objects, provided if bulk updating status.  Dependencies on extracts in
+                         the list do not block.
         :return:
         """
-        child = aliased(Extract)
-        parent = aliased(Extract)
-        dependency_hold = 0
-
         if extracts is not None:
-
-            parent_files_hold = (
-                self.session.query(parent)
-                .join(parent, ExtractDependency.parent_extract)
-                .join(child, ExtractDependency.child_extract)
-                .join(Extract, Extract.extract_id == parent.extract_id)
-                .join(
-                    ExtractStatus,
-                    ExtractStatus.extract_status_id == Extract.extract_status_id,
-                )
-                .filter(child.extract_id == self.extract.extract_id)
-                .filter(
-                    ExtractStatus.extract_status_name.in_(
-                        ("loading", "initializing", "ready")
-                    )
-                )
-            )
-            extract_names = list()
-            for extract in extracts:
-                self.logger.debug(
-                    "Extracts being compared to %s" % extract.extract.full_filepath()
-                )
-                extract_names.append(extract.extract.full_filepath())
-
-            for extract in parent_files_hold:
-
-                self.logger.debug("Testing if %s is in extracts." % extract)
-
-                if extract.full_filepath() not in extract_names:
-                    self.logger.debug("Extract not found.")
-                    dependency_hold += 1
-
-            self.logger.debug(
-                "We found %s dependencies that will block using this extract."
-                % dependency_hold
-            )
+            batch_ids = set(extract.extract.extract_id for extract in extracts)
         else:
-            dependency_hold = (
-                self.session.query(ExtractDependency)
-                .join(parent, ExtractDependency.parent_extract)
-                .join(child, ExtractDependency.child_extract)
-                .join(Extract, Extract.extract_id == parent.extract_id)
-                .join(
-                    ExtractStatus,
-                    ExtractStatus.extract_status_id == Extract.extract_status_id,
-                )
-                .filter(child.extract_id == self.extract.extract_id)
-                .filter(
-                    ExtractStatus.extract_status_name.in_(
-                        ("loading", "initializing", "ready")
-                    )
-                )
-            ).count()
+            batch_ids = set()
 
-            self.logger.debug(
-                "We found %s dependencies that will block using this extract."
-                % dependency_hold
+        dependency_hold = len(
+            self.process_run.determine_blocked_extracts(
+                extract_ids=[self.extract.extract_id], batch_ids=batch_ids
             )
+        )
 
         self.logger.debug("Dependency hold is %s" % dependency_hold)
 
@@ -480,12 +439,7 @@ class ExtractTracker:
         """
         self.logger.info("Obtaining extract status types.")
 
-        status_types = dict()
-
-        for record in self.session.query(ExtractStatus):
-            status_types[record.extract_status_name] = record.extract_status_id
-
-        return status_types
+        return self.data_store.get_lookup_names(model=ExtractStatus)
 
     def get_full_filename(self, location_path=None):
         """
@@ -519,13 +473,17 @@ class ExtractTracker:
         :return:
         """
 
-        for dataset_type in dataset_types:
-
-            self.data_store.get_or_create_item(
-                model=ExtractDatasetType,
-                extract_id=self.extract.extract_id,
-                dataset_type_id=dataset_type.dataset_type_id,
-            )
+        self.data_store.get_or_create_many(
+            model=ExtractDatasetType,
+            rows=[
+                {
+                    "extract_id": self.extract.extract_id,
+                    "dataset_type_id": dataset_type.dataset_type_id,
+                }
+                for dataset_type in dataset_types
+            ],
+            key_fields=["extract_id", "dataset_type_id"],
+        )
 
         return dataset_types
 
@@ -540,46 +498,69 @@ class ExtractTracker:
 
         if source_objects is not None:
 
-            for src_object in source_objects:
-                self.logger.debug(
-                    "Associating extract %s to source %s."
-                    % (self.extract.extract_id, src_object.source_object_id)
+            self.logger.debug(
+                "Associating extract %s to source objects %s."
+                % (
+                    self.extract.extract_id,
+                    [src_object.source_object_id for src_object in source_objects],
                 )
+            )
 
-                source_object = self.data_store.get_or_create_item(
-                    model=ExtractSourceObject,
-                    extract_id=self.extract.extract_id,
-                    source_object_id=src_object.source_object_id,
-                )
-                source_list.append(source_object)
+            source_list = self.data_store.get_or_create_many(
+                model=ExtractSourceObject,
+                rows=[
+                    {
+                        "extract_id": self.extract.extract_id,
+                        "source_object_id": src_object.source_object_id,
+                    }
+                    for src_object in source_objects
+                ],
+                key_fields=["extract_id", "source_object_id"],
+            )
 
-                self.data_store.get_or_create_item(
-                    SourceObjectLocation,
-                    source_object_id=src_object.source_object_id,
-                    location_id=self.extract.extract_location_id,
-                )
+            self.data_store.get_or_create_many(
+                model=SourceObjectLocation,
+                rows=[
+                    {
+                        "source_object_id": src_object.source_object_id,
+                        "location_id": self.extract.extract_location_id,
+                    }
+                    for src_object in source_objects
+                ],
+                key_fields=["source_object_id", "location_id"],
+            )
 
         elif sources is not None:
 
-            for source in sources:
-
-                self.logger.debug(
-                    "Associating extract %s to source %s."
-                    % (self.extract.extract_id, source.source_id)
-                )
-                extract_source = self.data_store.get_or_create_item(
-                    model=ExtractSource,
-                    extract_id=self.extract.extract_id,
-                    source_id=source.source_id,
-                )
-                source_list.append(extract_source)
-                self.logger.debug("Extract source record created. %s" % extract_source)
+            self.logger.debug(
+                "Associating extract %s to sources %s."
+                % (self.extract.extract_id, [source.source_id for source in sources])
+            )
 
-                self.data_store.get_or_create_item(
-                    model=SourceLocation,
-                    source_id=source.source_id,
-                    location_id=self.extract.extract_location_id,
-                )
+            source_list = self.data_store.get_or_create_many(
+                model=ExtractSource,
+                rows=[
+                    {
+                        "extract_id": self.extract.extract_id,
+                        "source_id": source.source_id,
+                    }
+                    for source in sources
+                ],
+                key_fields=["extract_id", "source_id"],
+            )
+            self.logger.debug("Extract source records created. %s" % source_list)
+
+            self.data_store.get_or_create_many(
+                model=SourceLocation,
+                rows=[
+                    {
+                        "source_id": source.source_id,
+                        "location_id": self.extract.extract_location_id,
+                    }
+                    for source in sources
+                ],
+                key_fields=["source_id", "location_id"],
+            )
 
         return source_list
 
@@ -601,7 +582,7 @@ class ExtractTracker:
         if extract_process.extract_process_status_id is None:
             self.logger.info("Extract process status must also be set.  Initializing.")
             extract_process.extract_process_status_id = self.extract_status_initializing
-            self.session.commit()
+            self.data_store.commit()
 
         return extract_process
 
@@ -651,7 +632,7 @@ class ExtractTracker:
             self.logger.error("%s is not a valid audit_type." % audit_type)
             raise Exception("%s is not a valid audit_type." % audit_type)
 
-        self.session.commit()
+        self.data_store.commit()
 
     def set_extract_record_count(self, num_records, audit_type="load"):
         """
@@ -675,4 +656,4 @@ class ExtractTracker:
             self.logger.error("%s is not a valid audit_type." % audit_type)
             raise Exception("%s is not a valid audit_type." % audit_type)
 
-        self.session.commit()
+        self.data_store.commit()
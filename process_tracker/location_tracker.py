@@ -137,7 +137,7 @@ class LocationTracker:
         """
 
         self.location.location_file_count = file_count
-        self.session.commit()
+        self.data_store.commit()
 
     def determine_location_bucket_name(self):
         """
@@ -157,6 +157,6 @@ class LocationTracker:
         else:
             location_bucket_name = None
 
-            self.session.commit()
+            self.data_store.commit()
 
         return location_bucket_name
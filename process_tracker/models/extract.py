@@ -8,6 +8,7 @@ from sqlalchemy import (
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     Sequence,
@@ -91,7 +92,15 @@ class ExtractFileType(Base, BaseColumn):
 class Extract(Base, BaseColumn):
 
     __tablename__ = "extract_tracking"
-    __table_args__ = {"schema": "process_tracker"}
+    __table_args__ = (
+        Index(
+            "extract_tracking_idx01",
+            "extract_status_id",
+            "extract_registration_date_time",
+        ),
+        Index("extract_tracking_idx02", "extract_location_id"),
+        {"schema": "process_tracker"},
+    )
 
     extract_id = Column(
         Integer,
@@ -106,7 +115,7 @@ class Extract(Base, BaseColumn):
     extract_status_id = Column(
         Integer,
         ForeignKey("process_tracker.extract_status_lkup.extract_status_id"),
-        nullable=False,
+        nullable=True,
     )
     extract_registration_date_time = Column(
         DateTime, nullable=False, default=datetime.now()
@@ -229,10 +238,39 @@ class ExtractDependency(Base, BaseColumn):
         )
 
 
+class ExtractFilenameToken(Base, BaseColumn):
+
+    __tablename__ = "extract_filename_token"
+    __table_args__ = (
+        Index("extract_filename_token_idx01", "extract_id"),
+        {"schema": "process_tracker"},
+    )
+
+    filename_token = Column(String(250), primary_key=True, nullable=False)
+    extract_id = Column(
+        Integer,
+        ForeignKey("process_tracker.extract_tracking.extract_id", ondelete="CASCADE"),
+        primary_key=True,
+        nullable=False,
+    )
+
+    extract = relationship("Extract")
+
+    def __repr__(self):
+
+        return "<ExtractFilenameToken (extract=%s, token=%s)>" % (
+            self.extract_id,
+            self.filename_token,
+        )
+
+
 class ExtractProcess(Base, BaseColumn):
 
     __tablename__ = "extract_process_tracking"
-    __table_args__ = {"schema": "process_tracker"}
+    __table_args__ = (
+        Index("extract_process_tracking_idx01", "process_tracking_id"),
+        {"schema": "process_tracker"},
+    )
 
     extract_tracking_id = Column(
         Integer,
@@ -249,7 +287,7 @@ class ExtractProcess(Base, BaseColumn):
     extract_process_status_id = Column(
         Integer,
         ForeignKey("process_tracker.extract_status_lkup.extract_status_id"),
-        nullable=False,
+        nullable=True,
     )
     extract_process_event_date_time = Column(
         DateTime, nullable=False, default=datetime.now()
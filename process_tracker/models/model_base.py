@@ -8,13 +8,13 @@ from sqlalchemy import Column, Integer, DateTime
 
 Base = declarative_base()
 default_date = parser.parse("1900-01-01 00:00:00")
-current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+current_time = datetime.now().replace(microsecond=0)
 
 
 class BaseColumn(object):
     created_date_time = Column(DateTime, nullable=False, default=current_time)
-    created_by = Column(DateTime, nullable=False, default=0)
+    created_by = Column(Integer, nullable=False, default=0)
     update_date_time = Column(
         DateTime, nullable=False, default=current_time, onupdate=current_time
     )
-    updated_by = Column(DateTime, nullable=False, default=0)
+    updated_by = Column(Integer, nullable=False, default=0)
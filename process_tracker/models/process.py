@@ -7,6 +7,7 @@ from sqlalchemy import (
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     Sequence,
@@ -160,10 +161,10 @@ class Process(Base, BaseColumn):
     process_type_id = Column(
         Integer,
         ForeignKey("process_tracker.process_type_lkup.process_type_id"),
-        nullable=False,
+        nullable=True,
     )
     process_tool_id = Column(
-        Integer, ForeignKey("process_tracker.tool_lkup.tool_id"), nullable=False
+        Integer, ForeignKey("process_tracker.tool_lkup.tool_id"), nullable=True
     )
     last_failed_run_date_time = Column(
         DateTime(timezone=True), nullable=False, default=default_date
@@ -180,6 +181,7 @@ class Process(Base, BaseColumn):
         nullable=False,
         default=0,
     )
+    process_definition_hash = Column(String(64), nullable=True)
 
     cluster_processes = relationship("ClusterProcess", passive_deletes="all")
     dataset_types = relationship("ProcessDatasetType")
@@ -303,6 +305,42 @@ class ProcessFilter(Base, BaseColumn):
         )
 
 
+class ProcessRunState(Base, BaseColumn):
+
+    __tablename__ = "process_run_state"
+    __table_args__ = {"schema": "process_tracker"}
+
+    process_id = Column(
+        Integer,
+        ForeignKey("process_tracker.process.process_id"),
+        primary_key=True,
+        nullable=False,
+    )
+    process_tracking_id = Column(
+        Integer,
+        ForeignKey("process_tracker.process_tracking.process_tracking_id"),
+        nullable=False,
+    )
+    process_run_id = Column(Integer, nullable=False)
+    process_status_id = Column(
+        Integer,
+        ForeignKey("process_tracker.process_status_lkup.process_status_id"),
+        nullable=False,
+    )
+    consecutive_failure_count = Column(Integer, nullable=False, default=0)
+
+    processes = relationship("Process")
+    process_runs = relationship("ProcessTracking")
+    status = relationship("ProcessStatus")
+
+    def __repr__(self):
+
+        return (
+            "<ProcessRunState process=%s, process_tracking_id=%s, process_status=%s>"
+            % (self.process_id, self.process_tracking_id, self.process_status_id)
+        )
+
+
 class ProcessSource(Base, BaseColumn):
 
     __tablename__ = "process_source"
@@ -479,7 +517,10 @@ class ProcessTargetObjectAttribute(Base, BaseColumn):
 class ProcessDependency(Base, BaseColumn):
 
     __tablename__ = "process_dependency"
-    __table_args__ = {"schema": "process_tracker"}
+    __table_args__ = (
+        Index("process_dependency_idx01", "child_process_id"),
+        {"schema": "process_tracker"},
+    )
 
     parent_process_id = Column(
         Integer,
@@ -511,10 +552,46 @@ class ProcessDependency(Base, BaseColumn):
         )
 
 
+class ProcessDependencyClosure(Base, BaseColumn):
+
+    __tablename__ = "process_dependency_closure"
+    __table_args__ = (
+        Index("process_dependency_closure_idx01", "ancestor_process_id"),
+        {"schema": "process_tracker"},
+    )
+
+    descendant_process_id = Column(
+        Integer,
+        ForeignKey("process_tracker.process.process_id"),
+        primary_key=True,
+        nullable=False,
+    )
+    ancestor_process_id = Column(
+        Integer,
+        ForeignKey("process_tracker.process.process_id"),
+        primary_key=True,
+        nullable=False,
+    )
+
+    ancestor_process = relationship("Process", foreign_keys=[ancestor_process_id])
+    descendant_process = relationship("Process", foreign_keys=[descendant_process_id])
+
+    def __repr__(self):
+
+        return (
+            "<ProcessDependencyClosure (ancestor_process=%s, descendant_process=%s)>"
+            % (self.ancestor_process_id, self.descendant_process_id)
+        )
+
+
 class ProcessTracking(Base, BaseColumn):
 
     __tablename__ = "process_tracking"
-    __table_args__ = {"schema": "process_tracker"}
+    __table_args__ = (
+        Index("process_tracking_idx04", "process_id", "process_run_id"),
+        Index("process_tracking_idx05", "process_status_id"),
+        {"schema": "process_tracker"},
+    )
 
     process_tracking_id = Column(
         Integer,
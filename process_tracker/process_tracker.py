@@ -2,15 +2,45 @@
 # Used in the creation and editing of process tracking records.
 
 from datetime import datetime
+import hashlib
+import json
 import logging
 import os
+import time
+
+from sqlalchemy import (
+    and_,
+    cast,
+    exists,
+    false,
+    func,
+    Integer,
+    literal_column,
+    null,
+    or_,
+    select,
+    String,
+    union_all,
+)
+from sqlalchemy.orm import aliased, joinedload, Load
+from sqlalchemy.orm.attributes import set_committed_value
 
-from sqlalchemy.orm import aliased
-
-from process_tracker.utilities.data_store import DataStore
+from process_tracker.utilities.data_store import (
+    bulk_chunk_size,
+    DataStore,
+    skip_locked_data_stores,
+)
 from process_tracker.extract_tracker import ExtractTracker
 from process_tracker.location_tracker import LocationTracker
+from process_tracker.references import ExtractReference, SourceReference
 from process_tracker.utilities.aws_utilities import AwsUtilities
+from process_tracker.utilities.dependency_closure import determine_ancestors
+from process_tracker.utilities.filename_tokens import (
+    add_filename_tokens,
+    determine_filename_tokens,
+    determine_whole_tokens,
+    escape_like_pattern,
+)
 from process_tracker.utilities.logging import console
 from process_tracker.utilities.settings import SettingsManager
 from process_tracker.utilities import utilities
@@ -19,7 +49,14 @@ from process_tracker.models.actor import Actor
 from process_tracker.models.contact import Contact
 from process_tracker.models.extract import (
     Extract,
+    ExtractCompressionType,
+    ExtractDatasetType,
+    ExtractDependency,
+    ExtractFilenameToken,
+    ExtractFileType,
     ExtractProcess,
+    ExtractSource,
+    ExtractSourceObject,
     ExtractStatus,
     Location,
 )
@@ -29,8 +66,9 @@ from process_tracker.models.process import (
     Process,
     ProcessContact,
     ProcessDatasetType,
-    ProcessDependency,
+    ProcessDependencyClosure,
     ProcessFilter,
+    ProcessRunState,
     ProcessTracking,
     ProcessStatus,
     ProcessSource,
@@ -48,13 +86,18 @@ from process_tracker.models.source import (
     Source,
     SourceContact,
     SourceDatasetType,
+    SourceLocation,
     SourceObject,
     SourceObjectAttribute,
     SourceObjectDatasetType,
+    SourceObjectLocation,
     SourceType,
 )
 from process_tracker.models.tool import Tool
 
+# Granularity of process sources and targets, lowest first.
+granularities = {1: "source_object_attribute", 2: "source_object", 3: "source"}
+
 
 class ProcessTracker:
     def __init__(
@@ -149,6 +192,13 @@ class ProcessTracker:
         self.process = None
         self.process_tracking_run = None
 
+        # Record counts added with add_process_run_record_count, waiting to be flushed to the data store.
+        self.record_count_buffer = {"record": 0, "insert": 0, "update": 0}
+        self.record_count_flush_interval = int(
+            self.config.config["DEFAULT"].get("record_count_flush_interval", 30)
+        )
+        self.record_count_flushed_at = time.monotonic()
+
         self.initialize_process_tracker()
 
     def initialize_process_tracker(self):
@@ -161,10 +211,17 @@ class ProcessTracker:
         if self.process_tracking_id is not None:
             self.logger.info("Process run id provided.  Checking if exists.")
 
-            process_run = self.data_store.get_or_create_item(
-                model=ProcessTracking,
-                process_tracking_id=self.process_tracking_id,
-                create=False,
+            # The run is loaded with its actor and process context in one query.
+            process_run = (
+                self.session.query(ProcessTracking)
+                .options(
+                    joinedload(ProcessTracking.actor),
+                    *self.determine_process_load_options(
+                        process=joinedload(ProcessTracking.process)
+                    )
+                )
+                .filter(ProcessTracking.process_tracking_id == self.process_tracking_id)
+                .first()
             )
 
             if process_run is not None:
@@ -176,12 +233,11 @@ class ProcessTracker:
                 self.process = process_run.process
 
                 self.dataset_types = process_run.process.dataset_types
-                self.sources = self.determine_process_sources(
-                    process_run_id=self.process_tracking_id
-                )
-                self.targets = self.determine_process_targets(
+                references = self.determine_process_sources_and_targets(
                     process_run_id=self.process_tracking_id
                 )
+                self.sources = references["sources"]
+                self.targets = references["targets"]
 
                 self.process_name = process_run.process.process_name
                 self.process_tracking_run = process_run
@@ -203,101 +259,180 @@ class ProcessTracker:
                 model=Actor, actor_name=self.actor_name
             )
 
-            self.tool = self.data_store.get_or_create_item(
-                model=Tool, tool_name=self.tool_name
-            )
+            # An existing process is loaded with its context and latest run in one query.  The latest run is kept in
+            # the session for run admission.
+            process, last_run = self.preload_process()
 
-            if self.schedule_frequency is None:
-                self.schedule_frequency = self.data_store.get_or_create_item(
-                    model=ScheduleFrequency, schedule_frequency_name="unscheduled"
-                )
+            if process is not None and self.determine_process_unchanged(
+                process=process
+            ):
+                self.process = process
+                self.process_type = process.process_type
+                self.tool = process.tool
+                self.schedule_frequency = process.schedule_frequency
             else:
-                self.schedule_frequency = self.data_store.get_or_create_item(
-                    model=ScheduleFrequency,
-                    schedule_frequency_name=self.schedule_frequency,
+                self.tool = self.data_store.get_or_create_item(
+                    model=Tool, tool_name=self.tool_name
                 )
 
-            if self.process_type is None:
+                if self.schedule_frequency is None:
+                    self.schedule_frequency = self.data_store.get_or_create_item(
+                        model=ScheduleFrequency, schedule_frequency_name="unscheduled"
+                    )
+                else:
+                    self.schedule_frequency = self.data_store.get_or_create_item(
+                        model=ScheduleFrequency,
+                        schedule_frequency_name=self.schedule_frequency,
+                    )
+
+                if self.process_type is None:
 
-                self.process = self.data_store.get_or_create_item(
-                    model=Process, process_name=self.process_name, create=False
-                )
+                    self.process = self.data_store.get_or_create_item(
+                        model=Process, process_name=self.process_name, create=False
+                    )
 
-                self.process_type = self.process.process_type
+                    self.process_type = self.process.process_type
 
-            else:
+                else:
 
-                self.process_type = self.data_store.get_or_create_item(
-                    model=ProcessType, process_type_name=self.process_type
-                )
+                    self.process_type = self.data_store.get_or_create_item(
+                        model=ProcessType, process_type_name=self.process_type
+                    )
 
-                self.process = self.data_store.get_or_create_item(
-                    model=Process,
-                    process_name=self.process_name,
-                    process_type_id=self.process_type.process_type_id,
-                    process_tool_id=self.tool.tool_id,
-                    schedule_frequency_id=self.schedule_frequency.schedule_frequency_id,
-                )
+                    self.process = self.data_store.get_or_create_item(
+                        model=Process,
+                        process_name=self.process_name,
+                        process_type_id=self.process_type.process_type_id,
+                        process_tool_id=self.tool.tool_id,
+                        schedule_frequency_id=self.schedule_frequency.schedule_frequency_id,
+                    )
 
-            # Dataset types should be loaded before source and target because they are also used there.
+            # Unless the process definition changed since it was last registered, its dataset types, sources and
+            # targets are loaded instead of registered again.
+            definition_hash = self.determine_process_definition_hash()
 
-            if self.dataset_types is not None:
-                self.dataset_types = self.register_process_dataset_types(
-                    dataset_types=self.dataset_types
+            if (
+                self.process.process_definition_hash == definition_hash
+                and self.load_process_definition()
+            ):
+                self.logger.debug(
+                    "Process definition unchanged.  Skipping registration."
                 )
             else:
-                self.dataset_types = None
+                self.register_process_definition()
 
-            # sources, source_objects, or source_object_attributes should be set, not multiple.  Always go with
-            # lower grain if possible.
+                self.process.process_definition_hash = definition_hash
+                self.data_store.commit()
 
-            if self.source_object_attributes is not None:
-                self.source_object_attributes = self.register_process_sources(
-                    source_object_attributes=self.source_object_attributes
-                )
-                self.sources = self.source_object_attributes
-            elif self.source_objects is not None:
-                self.source_objects = self.register_process_sources(
-                    source_objects=self.source_objects
-                )
-                self.sources = self.source_objects
-            elif self.sources is not None:
-                self.sources = self.register_process_sources(sources=self.sources)
-            else:
-                self.sources = None
+            self.process_tracking_run = self.register_new_process_run()
+
+    def add_process_run_record_count(self, num_records, processing_type=None):
+        """
+        Add to the number of records processed by the process run, and to the process' total_record_count.  Unlike
+        set_process_run_record_count, the counts are buffered in memory and added to the data store's counts, so
+        parallel loaders can each add what they processed without overwriting each other.  The buffer is flushed once
+        'record_count_flush_interval' seconds (default 30) have passed since the last flush, when the run's status
+        changes and when the process tracker is closed.  Counts still buffered when the process exits without either
+        are lost.
+        :param num_records: Count of number of records processed.
+        :type num_records: int
+        :param processing_type: Type of records being processed.  Valid values: None, insert, update.  None will only
+                                add to the overall counts.
+        :return:
+        """
+        if processing_type not in (None, "insert", "update"):
+            error_msg = "Processing type not recognized."
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
 
-            # targets, target_objects, or target_object_attributes should be set, not multiple.  Always go with lower
-            # grain if possible.
+        self.record_count_buffer["record"] += num_records
 
-            if self.target_object_attributes is not None:
-                self.targets = self.register_process_targets(
-                    target_object_attributes=self.target_object_attributes
-                )
-            elif self.target_objects is not None:
-                self.targets = self.register_process_targets(
-                    target_objects=self.target_objects
-                )
-            elif self.targets is not None:
-                self.targets = self.register_process_targets(targets=self.targets)
-            else:
-                self.targets = None
+        if processing_type is not None:
+            self.record_count_buffer[processing_type] += num_records
 
-            self.process_tracking_run = self.register_new_process_run()
+        if (
+            time.monotonic() - self.record_count_flushed_at
+            >= self.record_count_flush_interval
+        ):
+            self.flush_process_run_record_count()
+
+    def batch(self, size=None, commit_on_error=False):
+        """
+        Defer the commits of tracking calls (registrations, status changes, record counts, errors, etc.) made within a
+        with block and commit them together when the block exits.
+        Example:  with process_tracker.batch(): ...
+        :param size: Optional maximum number of deferred writes before committing.  If not set, everything is committed
+                     in one transaction at the end of the block.
+        :type size: int
+        :param commit_on_error: Commit the deferred writes even if the block raises.  Default is to roll them back.
+        :type commit_on_error: bool
+        :return: Context manager
+        """
+        return self.data_store.batch(size=size, commit_on_error=commit_on_error)
 
     @staticmethod
-    def bulk_change_extract_status(extracts, extract_status):
+    def bulk_change_extract_status(extracts, extract_status, process_run=None):
         """
-        Given a set of extract objects, update the extract process record to reflect the association and updated status
-        as well as the extract record's' status.
-        :param extracts: List of ExtractTracking SQLAlchemy objects to be bulk updated.
+        Given a set of extracts, update the extract process records to reflect the association and updated status as
+        well as the extract records' status.  See update_extract_status.
+        :param extracts: List of ExtractTracker or ExtractReference objects to be bulk updated.
         :param extract_status: The status to change the extract files to.
         :type extract_status: str
+        :param process_run: The process run changing the status.  Required if only extract references are provided;
+                            otherwise defaults to the process run of the extract trackers.
+        :type process_run: ProcessTracker object
         :return:
         """
+        extracts = list(extracts)
+
+        if not extracts:
+            return
+
+        if process_run is None:
+            process_run = next(
+                (
+                    extract.process_run
+                    for extract in extracts
+                    if isinstance(extract, ExtractTracker)
+                ),
+                None,
+            )
 
-        for extract in extracts:
+        if process_run is None:
+            raise Exception(
+                "A process run must be provided to change the status of extract references."
+            )
+
+        process_run.update_extract_status(
+            extracts=extracts, extract_status=extract_status
+        )
+
+    def change_process_run_state(self, new_status_id):
+        """
+        Keep the process run state in line with a status change of the process run.  Failed runs add to the count of
+        runs failed in a row, completed runs reset it.  Nothing changes if the run is no longer the process' current
+        run.
+        :param new_status_id: The new status of the process run.
+        :type new_status_id: int
+        :return:
+        """
+        values = {ProcessRunState.process_status_id: new_status_id}
 
-            extract.change_extract_status(new_status=extract_status)
+        if new_status_id == self.process_status_failed:
+            values[ProcessRunState.consecutive_failure_count] = (
+                ProcessRunState.consecutive_failure_count + 1
+            )
+        elif new_status_id == self.process_status_complete:
+            values[ProcessRunState.consecutive_failure_count] = 0
+
+        self.session.query(ProcessRunState).filter(
+            ProcessRunState.process_id == self.process.process_id
+        ).filter(
+            ProcessRunState.process_tracking_id
+            == self.process_tracking_run.process_tracking_id
+        ).update(
+            values, synchronize_session=False
+        )
 
     def change_run_status(self, new_status, end_date=None):
         """
@@ -314,6 +449,8 @@ class ProcessTracker:
 
         if new_status in self.process_status_types.keys():
 
+            self.flush_process_run_record_count()
+
             self.process_tracking_run.process_status_id = self.process_status_types[
                 new_status
             ]
@@ -332,12 +469,16 @@ class ProcessTracker:
                 self.process.last_failed_run_date_time = end_date
                 self.process_tracking_run.process_run_end_date_time = end_date
 
-            self.session.commit()
+            self.change_process_run_state(
+                new_status_id=self.process_status_types[new_status]
+            )
+
+            self.data_store.commit()
 
             if (
                 self.process_status_types[new_status] == self.process_status_complete
             ) or (self.process_status_types[new_status] == self.process_status_failed):
-                self.session.close()
+                self.data_store.close()
 
         else:
             raise Exception("The provided status type %s is invalid." % new_status)
@@ -363,248 +504,1000 @@ class ProcessTracker:
 
         return file_list
 
-    def determine_hold_status(self, last_run_status, last_run_id):
+    def claim_extracts(
+        self, n, extract_process_name=None, location_name=None, location_path=None
+    ):
         """
-        Based on the setting 'max_concurrent_failures', count the number of failures for that number of process runs.
-        If the counts match, process will remain on hold.  If last run is 'on_hold' process will remain on hold.
-        :param last_run_status: The status of the previous run
-        :param last_run_id:  The process_tracking_id of the previous run
-        :return:
+        Claim up to n ready extracts for the process run, moving them to 'loading', so parallel loaders each get their
+        own extracts to work on.  Extracts depending on extracts that are not loaded yet are left for later.  Where the
+        data store supports it, the extracts are picked with SELECT ... FOR UPDATE SKIP LOCKED, so workers never wait
+        on each other.  Elsewhere each extract is claimed with an UPDATE that only succeeds while it is still ready,
+        and extracts claimed by another worker in the meantime are replaced with the next ready ones not tried yet.  The
+        claim is committed straight away, even within a batch, so other workers see it and row locks are not held.
+        :param n: The maximum number of extracts to claim.
+        :type n: int
+        :param extract_process_name: Optional name of the process the extracts must be associated with.
+        :type extract_process_name: str
+        :param location_name: Optional name of the location the extracts must be in.
+        :type location_name: str
+        :param location_path: Optional path of the location the extracts must be in.
+        :type location_path: str
+        :return: List of ExtractReference objects of the claimed extracts, oldest first.
         """
-        self.logger.debug("Determining if process should be put on or remain on hold.")
+        extract_status_types = self.data_store.get_lookup_names(model=ExtractStatus)
+        status_ready = extract_status_types["ready"]
+        status_loading = extract_status_types["loading"]
 
-        max_concurrent_failures = int(
-            self.config.config["DEFAULT"]["max_concurrent_failures"]
-        )
-
-        self.logger.debug("Max Concurrent failures is %s" % max_concurrent_failures)
+        parent = aliased(Extract)
 
-        failure_count = (
-            self.session.query(ProcessTracking)
-            .join(Process)
-            .filter(Process.process_name == self.process_name)
+        candidates = (
+            self.session.query(
+                Extract.extract_id,
+                Extract.extract_filename,
+                Extract.extract_location_id,
+                Extract.extract_registration_date_time,
+                Location.location_path,
+            )
+            .join(Location, Extract.extract_location_id == Location.location_id)
+            .filter(Extract.extract_status_id == status_ready)
             .filter(
-                ProcessTracking.process_run_id > (last_run_id - max_concurrent_failures)
+                ~exists()
+                .where(ExtractDependency.child_extract_id == Extract.extract_id)
+                .where(ExtractDependency.parent_extract_id == parent.extract_id)
+                .where(
+                    parent.extract_status_id.in_(
+                        [
+                            extract_status_types["loading"],
+                            extract_status_types["initializing"],
+                            extract_status_types["ready"],
+                        ]
+                    )
+                )
             )
-            .filter(ProcessTracking.process_status_id == self.process_status_failed)
-            .count()
+            .order_by(Extract.extract_registration_date_time)
+            .order_by(Extract.extract_id)
         )
 
-        self.logger.debug("Number of failures in past runs is %s" % failure_count)
+        if extract_process_name is not None:
+            candidates = candidates.filter(
+                Extract.extract_id.in_(
+                    self.determine_process_extracts(
+                        extract_process_name=extract_process_name
+                    )
+                )
+            )
 
-        if last_run_status == self.process_status_hold:
-            self.logger.error("Last run still in hold status.  Need to remain in hold.")
-            return True
-        elif failure_count == max_concurrent_failures:
-            self.logger.error(
-                "Number of failures has reached max_concurrent_failures.  Putting process on hold until resolved."
+        if location_path is not None:
+            candidates = candidates.filter(Location.location_path == location_path)
+
+        if location_name is not None:
+            candidates = candidates.filter(Location.location_name == location_name)
+
+        claimed = list()
+
+        if self.data_store.data_store_type in skip_locked_data_stores:
+            claimed = (
+                candidates.limit(n).with_for_update(skip_locked=True, of=Extract).all()
             )
-            return True
+
+            for offset in range(0, len(claimed), bulk_chunk_size):
+                chunk = [
+                    row.extract_id for row in claimed[offset : offset + bulk_chunk_size]
+                ]
+
+                self.session.query(Extract).filter(
+                    Extract.extract_id.in_(chunk)
+                ).update(
+                    {Extract.extract_status_id: status_loading},
+                    synchronize_session=False,
+                )
         else:
-            return False
+            # Each pass reads on from the last extract tried, in candidate order, instead of from the start.  The data
+            # store may still show extracts claimed by another worker as ready (i.e. MySQL's REPEATABLE READ snapshot),
+            # and they would be read again forever.
+            page = candidates
+
+            while len(claimed) < n:
+                rows = page.limit(n - len(claimed)).all()
+
+                if not rows:
+                    break
+
+                last_seen = rows[-1]
+                page = candidates.filter(
+                    or_(
+                        Extract.extract_registration_date_time
+                        > last_seen.extract_registration_date_time,
+                        and_(
+                            Extract.extract_registration_date_time
+                            == last_seen.extract_registration_date_time,
+                            Extract.extract_id > last_seen.extract_id,
+                        ),
+                    )
+                )
 
-    def determine_process_sources(self, process_run_id):
-        """
-        Based on the process_tracking_id, find the given process' sources - either at the attribute, object, or source level
-        :param process_run_id: Process run identifier
-        :type process_run_id: int
-        :return: Array of source objects at lowest granularity.
-        """
-        source_list = list()
-        self.logger.info("Checking for attributes.")
-        attributes = (
-            self.session.query(SourceObjectAttribute)
-            .join(ProcessSourceObjectAttribute)
-            .join(Process)
-            .join(ProcessTracking)
-            .filter(ProcessTracking.process_tracking_id == process_run_id)
-        )
+                for row in rows:
+                    claimed_count = (
+                        self.session.query(Extract)
+                        .filter(Extract.extract_id == row.extract_id)
+                        .filter(Extract.extract_status_id == status_ready)
+                        .update(
+                            {Extract.extract_status_id: status_loading},
+                            synchronize_session=False,
+                        )
+                    )
 
-        if attributes.count() >= 1:
-            self.logger.info("Attributes were not empty.")
-            for attribute in attributes:
-                self.logger.debug("Adding attribute %s " % attribute)
-                source_list.append(attribute)
+                    if claimed_count == 1:
+                        claimed.append(row)
+                    else:
+                        self.logger.debug(
+                            "Extract %s was claimed by another worker." % row.extract_id
+                        )
 
-            return source_list
+        extract_ids = [row.extract_id for row in claimed]
+        status_date = datetime.now()
 
-        self.logger.info("Checking for objects.")
-        objects = (
-            self.session.query(SourceObject)
-            .join(ProcessSourceObject)
-            .join(Process)
-            .join(ProcessTracking)
-            .filter(ProcessTracking.process_tracking_id == process_run_id)
+        self.data_store.insert_ignore_duplicates(
+            model=ExtractProcess,
+            rows=[
+                {
+                    "extract_tracking_id": extract_id,
+                    "process_tracking_id": self.process_tracking_run.process_tracking_id,
+                    "extract_process_status_id": status_loading,
+                    "extract_process_event_date_time": status_date,
+                }
+                for extract_id in extract_ids
+            ],
+            key_fields=["extract_tracking_id", "process_tracking_id"],
         )
 
-        if objects.count() >= 1:
-            self.logger.info("Objects were not empty.")
-            for obj in objects:
-                self.logger.debug("Adding object %s " % obj)
-                source_list.append(obj)
+        for offset in range(0, len(extract_ids), bulk_chunk_size):
+            chunk = extract_ids[offset : offset + bulk_chunk_size]
 
-            return source_list
+            self.session.query(ExtractProcess).filter(
+                ExtractProcess.process_tracking_id
+                == self.process_tracking_run.process_tracking_id
+            ).filter(ExtractProcess.extract_tracking_id.in_(chunk)).update(
+                {
+                    ExtractProcess.extract_process_status_id: status_loading,
+                    ExtractProcess.extract_process_event_date_time: status_date,
+                },
+                synchronize_session=False,
+            )
 
-        self.logger.info("Checking for sources.")
-        sources = (
-            self.session.query(Source)
-            .join(ProcessSource)
-            .join(Process)
-            .join(ProcessTracking)
-            .filter(ProcessTracking.process_tracking_id == process_run_id)
-        )
+        self.data_store.commit(force=True)
 
-        if sources.count() >= 1:
-            self.logger.info("Sources were not empty.")
-            for source in sources:
-                self.logger.debug("Adding source %s " % source)
-                source_list.append(source)
-            return source_list
+        self.logger.info("Claimed %s extracts." % len(claimed))
 
-        self.logger.info(
-            "No source, source object, or source object attribute has been associated with this process."
-        )
-        return None
+        return [
+            ExtractReference(
+                extract_id=row.extract_id,
+                extract_filename=row.extract_filename,
+                extract_status_name="loading",
+                location_id=row.extract_location_id,
+                location_path=row.location_path,
+            )
+            for row in claimed
+        ]
 
-    def determine_process_targets(self, process_run_id):
+    def close(self):
         """
-        Based on the process_tracking_id, find the given process' targets - either at the attribute, object, or source level
-        :param process_run_id: Process run identifier
-        :type process_run_id: int
-        :return: Array of source objects used as target for the process at lowest granularity.
+        Flush the buffered record counts of the process run and close the data store session.  Use when done with a
+        process run without changing its status, as buffered record counts are otherwise lost.
+        :return:
         """
+        if self.process_tracking_run is not None:
+            self.flush_process_run_record_count()
 
-        attributes = (
-            self.session.query(SourceObjectAttribute)
-            .join(ProcessTargetObjectAttribute)
-            .join(Process)
-            .join(ProcessTracking)
-            .filter(ProcessTracking.process_tracking_id == process_run_id)
-        )
+        self.data_store.close()
+
+    def determine_blocked_extracts(self, extract_ids, batch_ids=None):
+        """
+        For a batch of extracts about to be loaded, find the ones depending on extracts that have not been loaded, are
+        being created, or are loading.  Parent extracts in the batch itself do not block.  The dependencies of all the
+        extracts are read with one query per chunk of ids and matched against the batch by id.
+        :param extract_ids: The ids of the extracts to check.
+        :type extract_ids: list
+        :param batch_ids: The ids of all the extracts in the batch, if more than the ones being checked.  Default is
+                          extract_ids.
+        :type batch_ids: list
+        :return: Set of the blocked extracts' ids.
+        """
+        extract_ids = list(set(extract_ids))
 
-        if attributes is not None:
-            return attributes
+        if batch_ids is None:
+            batch_ids = set(extract_ids)
+        else:
+            batch_ids = set(batch_ids)
 
-        objects = (
-            self.session.query(SourceObject)
-            .join(ProcessTargetObject)
-            .join(Process)
-            .join(ProcessTracking)
-            .filter(ProcessTracking.process_tracking_id == process_run_id)
-        )
+        blocked_ids = set()
 
-        if objects is not None:
-            return objects
+        for offset in range(0, len(extract_ids), bulk_chunk_size):
+            chunk = extract_ids[offset : offset + bulk_chunk_size]
 
-        sources = (
-            self.session.query(Source)
-            .join(ProcessTarget)
-            .join(Process)
-            .join(ProcessTracking)
-            .filter(ProcessTracking.process_tracking_id == process_run_id)
+            dependencies = (
+                self.session.query(
+                    ExtractDependency.child_extract_id,
+                    ExtractDependency.parent_extract_id,
+                )
+                .join(
+                    Extract, Extract.extract_id == ExtractDependency.parent_extract_id
+                )
+                .join(
+                    ExtractStatus,
+                    ExtractStatus.extract_status_id == Extract.extract_status_id,
+                )
+                .filter(ExtractDependency.child_extract_id.in_(chunk))
+                .filter(
+                    ExtractStatus.extract_status_name.in_(
+                        ("loading", "initializing", "ready")
+                    )
+                )
+            )
+
+            for child_id, parent_id in dependencies:
+                if parent_id not in batch_ids:
+                    blocked_ids.add(child_id)
+
+        self.logger.debug(
+            "We found %s extracts with dependencies that will block using them."
+            % len(blocked_ids)
         )
 
-        if sources is not None:
-            return sources
+        return blocked_ids
 
-        self.logger.info(
-            "No target, target object, or target object attribute has been associated with this process."
+    @staticmethod
+    def determine_extract_ids(extracts):
+        """
+        Get the extract ids of extract trackers or extract references without loading anything.
+        :param extracts: List of ExtractTracker or ExtractReference objects.
+        :return: List of extract ids, in the same order as extracts.
+        """
+        return [
+            extract.extract.extract_id
+            if isinstance(extract, ExtractTracker)
+            else extract.extract_id
+            for extract in extracts
+        ]
+
+    def determine_extract_reference_query(self, status):
+        """
+        Build the query for extract references of the given status, reading the columns needed with the extract's
+        location and status joined in instead of loading the records.
+        :param status: Name of the status type for files being searched.
+        :type status: str
+        :return: SQLAlchemy query
+        """
+        return (
+            self.data_store.read_session.query(
+                Extract.extract_id,
+                Extract.extract_filename,
+                Extract.extract_location_id,
+                Extract.extract_registration_date_time,
+                ExtractStatus.extract_status_name,
+                Location.location_path,
+            )
+            .join(Location, Extract.extract_location_id == Location.location_id)
+            .join(
+                ExtractStatus,
+                Extract.extract_status_id == ExtractStatus.extract_status_id,
+            )
+            .filter(ExtractStatus.extract_status_name == status)
         )
-        return None
 
-    def find_extracts_by_filename(self, filename, status="ready"):
+    def determine_filename_filter(self, filename, match="contains"):
         """
-        For the given filename, or filename part, find all matching extracts that are ready for processing.
+        Build the filter criteria matching extract filenames to the given filename, using the fastest search the data
+        store supports.  PostgreSQL serves prefix matches with a text_pattern_ops index, suffix matches with an index on
+        the reversed filename and contains matches with a pg_trgm index.  Other data stores first narrow the extracts
+        down through the filename token table, with the tokens that must appear whole in any matching filename, then
+        check the pattern on those.
         :param filename: Filename or part of filename.
         :type filename: str
-        :param status: Name of the status type for files being searched.  Default 'ready'.
-        :type status: str
-        :return: List of Extract SQLAlchemy objects.
+        :param match: How the filename is matched.  Valid values:  contains (anywhere in the filename), prefix (start of
+                      the filename), suffix (end of the filename), token (every word of filename is a word of the
+                      extract's filename, in any order and case).
+        :type match: str
+        :return: List of SQLAlchemy filter criteria.
         """
+        if match == "token":
+            tokens = determine_filename_tokens(filename=filename)
 
-        process_files = (
-            self.session.query(Extract)
-            .join(ExtractStatus)
-            .filter(Extract.extract_filename.like("%" + filename + "%"))
-            .filter(ExtractStatus.extract_status_name == status)
-            .order_by(Extract.extract_registration_date_time)
-            .order_by(Extract.extract_id)
-            .all()
-        )
+            if not tokens:
+                return [false()]
 
-        self.logger.info("Processing file records to extract tracker objects")
+            criteria = list()
 
-        process_files = self.create_extract_tracker_objects(files=process_files)
+        elif match in ("contains", "prefix", "suffix"):
+            # Built as one literal pattern, so the planner can use the indexes for prefix matches.
+            escaped_filename = escape_like_pattern(value=filename)
 
-        self.logger.info("Returning extract files by filename.")
+            if match == "contains":
+                criteria = [
+                    Extract.extract_filename.like(
+                        "%" + escaped_filename + "%", escape="/"
+                    )
+                ]
+            elif match == "prefix":
+                criteria = [
+                    Extract.extract_filename.like(escaped_filename + "%", escape="/")
+                ]
+            elif self.data_store.data_store_type == "postgresql":
+                criteria = [
+                    func.reverse(Extract.extract_filename).like(
+                        escape_like_pattern(value=filename[::-1]) + "%", escape="/"
+                    )
+                ]
+            else:
+                criteria = [
+                    Extract.extract_filename.like("%" + escaped_filename, escape="/")
+                ]
 
-        return process_files
+            if self.data_store.data_store_type == "postgresql":
+                return criteria
 
-    def find_extracts_by_location(
-        self, location_name=None, location_path=None, status="ready"
-    ):
-        """
-        For the given location path or location name, find all matching extracts that are ready for processing
-        :param location_name: The name of the location
-        :type location_name: str
-        :param location_path: The path of the location
-        :type location_path: str
-        :param status: Name of the status type for files being searched.  Default 'ready'.
-        :type status: str
-        :return: List of Extract SQLAlchemy objects.
-        """
+            tokens = determine_whole_tokens(filename=filename, match=match)
 
-        if location_path is not None:
-            process_files = (
-                self.session.query(Extract)
-                .join(Location)
-                .join(ExtractStatus)
-                .filter(ExtractStatus.extract_status_name == status)
-                .filter(Location.location_path == location_path)
-                .order_by(Extract.extract_registration_date_time)
-                .order_by(Extract.extract_id)
-                .all()
-            )
-        elif location_name is not None:
-            process_files = (
-                self.session.query(Extract)
-                .join(Location)
-                .join(ExtractStatus)
-                .filter(ExtractStatus.extract_status_name == status)
-                .filter(Location.location_name == location_name)
-                .order_by(Extract.extract_registration_date_time)
-                .order_by(Extract.extract_id)
-                .all()
-            )
         else:
-            self.logger.error(
-                "A location name or path must be provided.  Please try again."
-            )
-            raise Exception(
-                "A location name or path must be provided.  Please try again."
-            )
-
-        self.logger.info("Processing file records to extract tracker objects")
+            error_msg = "%s is not a valid filename match." % match
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
 
-        process_files = self.create_extract_tracker_objects(files=process_files)
+        for token in tokens:
+            criteria.append(
+                Extract.extract_id.in_(
+                    select([ExtractFilenameToken.extract_id]).where(
+                        ExtractFilenameToken.filename_token == token
+                    )
+                )
+            )
 
-        self.logger.info("Returning extract files by location.")
-        return process_files
+        return criteria
 
-    def find_extracts_by_process(self, extract_process_name, status="ready"):
+    def determine_hold_status(self, last_run_status, last_run_id, failure_count=None):
         """
-        For the given named process, find the extracts that are ready for processing.
-        :param extract_process_name: Name of the process that is associated with extracts
-        :type extract_process_name: str
-        :param status: Name of the status type for files being searched.  Default 'ready'.
-        :type status: str
-        :return: List of Extract SQLAlchemy objects.
+        Based on the setting 'max_concurrent_failures', count the number of failures for that number of process runs.
+        If the counts match, process will remain on hold.  If last run is 'on_hold' process will remain on hold.
+        :param last_run_status: The status of the previous run
+        :param last_run_id:  The process_run_id of the previous run
+        :param failure_count: The number of failures in the past runs, if already counted (see determine_run_admission)
+        :type failure_count: int
+        :return:
         """
+        self.logger.debug("Determining if process should be put on or remain on hold.")
 
-        process_files = (
-            self.session.query(Extract)
-            .join(
-                ExtractStatus,
+        max_concurrent_failures = self.determine_max_concurrent_failures()
+
+        self.logger.debug("Max Concurrent failures is %s" % max_concurrent_failures)
+
+        if failure_count is None:
+            failure_count = (
+                self.session.query(ProcessTracking)
+                .join(Process)
+                .filter(Process.process_name == self.process_name)
+                .filter(
+                    ProcessTracking.process_run_id
+                    > (last_run_id - max_concurrent_failures)
+                )
+                .filter(ProcessTracking.process_status_id == self.process_status_failed)
+                .count()
+            )
+
+        self.logger.debug("Number of failures in past runs is %s" % failure_count)
+
+        if last_run_status == self.process_status_hold:
+            self.logger.error("Last run still in hold status.  Need to remain in hold.")
+            return True
+        elif failure_count >= max_concurrent_failures:
+            self.logger.error(
+                "Number of failures has reached max_concurrent_failures.  Putting process on hold until resolved."
+            )
+            return True
+        else:
+            return False
+
+    def determine_max_concurrent_failures(self):
+        """
+        Get the 'max_concurrent_failures' setting - the number of failed runs in a row after which a process is put on
+        hold.
+        :return: int
+        """
+        return int(self.config.config["DEFAULT"]["max_concurrent_failures"])
+
+    def determine_process_definition_hash(self):
+        """
+        Fingerprint of the process definition provided to the tracker - its dataset types, sources and targets.  Lists
+        are sorted first, so the order items are provided in does not change the fingerprint.  Only meaningful before
+        the definition is registered or loaded, as that replaces the names with SQLAlchemy objects.
+        :return: SHA-256 hex digest.
+        """
+        definition = {
+            "dataset_types": self.normalize_definition_item(self.dataset_types),
+            "sources": self.normalize_definition_item(self.sources),
+            "source_objects": self.normalize_definition_item(self.source_objects),
+            "source_object_attributes": self.normalize_definition_item(
+                self.source_object_attributes
+            ),
+            "targets": self.normalize_definition_item(self.targets),
+            "target_objects": self.normalize_definition_item(self.target_objects),
+            "target_object_attributes": self.normalize_definition_item(
+                self.target_object_attributes
+            ),
+        }
+
+        return hashlib.sha256(
+            json.dumps(definition, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def determine_process_extracts(self, extract_process_name):
+        """
+        Build a subquery of the ids of the extracts used by any run of the given process.  Filtering through it instead
+        of joining returns extracts used by several runs of the process only once.
+        :param extract_process_name: Name of the process that is associated with extracts
+        :type extract_process_name: str
+        :return: SQLAlchemy subquery
+        """
+        return (
+            self.session.query(ExtractProcess.extract_tracking_id)
+            .join(
+                ProcessTracking,
+                ExtractProcess.process_tracking_id
+                == ProcessTracking.process_tracking_id,
+            )
+            .join(Process, ProcessTracking.process_id == Process.process_id)
+            .filter(Process.process_name == extract_process_name)
+            .subquery()
+        )
+
+    @staticmethod
+    def determine_process_load_options(process=None):
+        """
+        Eager loading options for a process' type, tool, schedule frequency and dataset types.
+        :param process: Loader option of the process, if the process is loaded through a relationship.  Default is the
+                        queried Process entity.
+        :return: List of SQLAlchemy loader options.
+        """
+        if process is None:
+            process = Load(Process)
+
+        return [
+            process.joinedload(Process.process_type),
+            process.joinedload(Process.tool),
+            process.joinedload(Process.schedule_frequency),
+            process.joinedload(Process.dataset_types).joinedload(
+                ProcessDatasetType.process_dataset_types
+            ),
+        ]
+
+    def determine_process_sources(self, process_run_id):
+        """
+        Based on the process_tracking_id, find the given process' sources - either at the attribute, object, or source level
+        :param process_run_id: Process run identifier
+        :type process_run_id: int
+        :return: List of SourceReference objects at lowest granularity, or None if the process has no sources.
+        """
+        return self.determine_process_sources_and_targets(
+            process_run_id=process_run_id
+        )["sources"]
+
+    def determine_process_sources_and_targets(self, process_run_id):
+        """
+        Based on the process_tracking_id, find the given process' sources and targets in one query.  Each is provided at
+        the lowest granularity registered - attribute, object, or source level.
+        :param process_run_id: Process run identifier
+        :type process_run_id: int
+        :return: Dictionary with the 'sources' and 'targets' lists of SourceReference objects, each None if empty.
+        """
+        process_id = (
+            select([ProcessTracking.process_id])
+            .where(ProcessTracking.process_tracking_id == process_run_id)
+            .as_scalar()
+        )
+
+        # Each source, object or attribute is selected with its role and granularity.  Lower granularity sorts first.
+        associations = [
+            ("sources", 1, ProcessSourceObjectAttribute.source_object_attribute_id),
+            ("sources", 2, ProcessSourceObject.source_object_id),
+            ("sources", 3, ProcessSource.source_id),
+            ("targets", 1, ProcessTargetObjectAttribute.target_object_attribute_id),
+            ("targets", 2, ProcessTargetObject.target_object_id),
+            ("targets", 3, ProcessTarget.target_source_id),
+        ]
+
+        selects = list()
+
+        for role, granularity, association_key in associations:
+            association = association_key.class_
+
+            columns = [
+                literal_column("'%s'" % role, String).label("role"),
+                literal_column(str(granularity), Integer).label("granularity"),
+                Source.source_id,
+                Source.source_name,
+            ]
+
+            if granularity < 3:
+                columns += [
+                    SourceObject.source_object_id,
+                    SourceObject.source_object_name,
+                ]
+            else:
+                columns += [
+                    cast(null(), Integer).label("source_object_id"),
+                    cast(null(), String(250)).label("source_object_name"),
+                ]
+
+            if granularity < 2:
+                columns += [
+                    SourceObjectAttribute.source_object_attribute_id,
+                    SourceObjectAttribute.source_object_attribute_name,
+                ]
+
+                from_clause = (
+                    SourceObjectAttribute.__table__.join(
+                        SourceObject.__table__,
+                        SourceObjectAttribute.source_object_id
+                        == SourceObject.source_object_id,
+                    )
+                    .join(Source.__table__, SourceObject.source_id == Source.source_id)
+                    .join(
+                        association.__table__,
+                        association_key
+                        == SourceObjectAttribute.source_object_attribute_id,
+                    )
+                )
+            else:
+                columns += [
+                    cast(null(), Integer).label("source_object_attribute_id"),
+                    cast(null(), String(250)).label("source_object_attribute_name"),
+                ]
+
+                if granularity == 2:
+                    from_clause = SourceObject.__table__.join(
+                        Source.__table__, SourceObject.source_id == Source.source_id
+                    ).join(
+                        association.__table__,
+                        association_key == SourceObject.source_object_id,
+                    )
+                else:
+                    from_clause = Source.__table__.join(
+                        association.__table__, association_key == Source.source_id
+                    )
+
+            selects.append(
+                select(columns)
+                .select_from(from_clause)
+                .where(association.process_id == process_id)
+            )
+
+        references = {"sources": dict(), "targets": dict()}
+
+        for row in self.data_store.read_session.execute(union_all(*selects)):
+            references[row.role].setdefault(row.granularity, list()).append(
+                SourceReference(
+                    granularity=granularities[row.granularity],
+                    source_id=row.source_id,
+                    source_name=row.source_name,
+                    source_object_id=row.source_object_id,
+                    source_object_name=row.source_object_name,
+                    source_object_attribute_id=row.source_object_attribute_id,
+                    source_object_attribute_name=row.source_object_attribute_name,
+                )
+            )
+
+        result = dict()
+
+        for role, by_granularity in references.items():
+            if by_granularity:
+                result[role] = sorted(
+                    by_granularity[min(by_granularity)],
+                    key=lambda reference: (
+                        reference.source_name,
+                        reference.source_object_name or "",
+                        reference.source_object_attribute_name or "",
+                    ),
+                )
+            else:
+                self.logger.info(
+                    "No %s, %s object, or %s object attribute has been associated with this process."
+                    % (role[:-1], role[:-1], role[:-1])
+                )
+                result[role] = None
+
+        return result
+
+    def determine_process_targets(self, process_run_id):
+        """
+        Based on the process_tracking_id, find the given process' targets - either at the attribute, object, or source level
+        :param process_run_id: Process run identifier
+        :type process_run_id: int
+        :return: List of SourceReference objects used as target for the process at lowest granularity, or None if the
+                 process has no targets.
+        """
+        return self.determine_process_sources_and_targets(
+            process_run_id=process_run_id
+        )["targets"]
+
+    def determine_process_unchanged(self, process):
+        """
+        Check if an existing process still has the process type, tool and schedule frequency provided to the tracker.
+        :param process: The existing process.
+        :type process: Process SQLAlchemy object
+        :return: True if unchanged, otherwise False.
+        """
+        if self.process_type is not None and (
+            process.process_type is None
+            or process.process_type.process_type_name != self.process_type
+        ):
+            return False
+
+        if process.tool is None or process.tool.tool_name != self.tool_name:
+            return False
+
+        schedule_frequency = self.schedule_frequency or "unscheduled"
+
+        return (
+            process.schedule_frequency is not None
+            and process.schedule_frequency.schedule_frequency_name == schedule_frequency
+        )
+
+    def determine_run_admission(self, rebuild_run_state=True):
+        """
+        Find everything needed to decide if a new run of the process can start, in one query:  the latest run's id,
+        run number and status, the number of processes this process depends on, directly or through other processes,
+        whose current run is running or failed (for those without a run state, their running or failed runs), and the
+        number of runs that failed in a row.  Read from the process run state table by primary key.  If the process has no run state (i.e. tracked before it existed), the run state of
+        the process and the processes it depends on is rebuilt from their run history first; processes that still have
+        none, because they have not run before, are checked against their run history instead.
+        :param rebuild_run_state: Rebuild missing run states from the run history.  Default is to rebuild.
+        :type rebuild_run_state: bool
+        :return: Dictionary with last_run_tracking_id, last_run_id, last_run_status_id, dependency_hold_count and
+                 failure_count.  The last run values are None if the process has not run before.
+        """
+        parent_state = aliased(ProcessRunState)
+
+        dependency_hold_count = (
+            self.session.query(func.count(parent_state.process_id))
+            .join(
+                ProcessDependencyClosure,
+                ProcessDependencyClosure.ancestor_process_id == parent_state.process_id,
+            )
+            .filter(
+                ProcessDependencyClosure.descendant_process_id == Process.process_id
+            )
+            .filter(
+                parent_state.process_status_id.in_(
+                    (self.process_status_running, self.process_status_failed)
+                )
+            )
+            .correlate(Process)
+            .as_scalar()
+        )
+
+        # Processes without a run state have not run since it was kept; their runs are counted as the run history check
+        # does.
+        history_hold_count = (
+            self.session.query(func.count(ProcessTracking.process_tracking_id))
+            .join(
+                ProcessDependencyClosure,
+                ProcessDependencyClosure.ancestor_process_id
+                == ProcessTracking.process_id,
+            )
+            .filter(
+                ProcessDependencyClosure.descendant_process_id == Process.process_id
+            )
+            .filter(
+                ProcessTracking.process_status_id.in_(
+                    (self.process_status_running, self.process_status_failed)
+                )
+            )
+            .filter(
+                ~exists().where(parent_state.process_id == ProcessTracking.process_id)
+            )
+            .correlate(Process)
+            .as_scalar()
+        )
+
+        admission = (
+            self.session.query(
+                ProcessRunState.process_id.label("state_process_id"),
+                ProcessRunState.process_tracking_id.label("last_run_tracking_id"),
+                ProcessRunState.process_run_id.label("last_run_id"),
+                ProcessRunState.process_status_id.label("last_run_status_id"),
+                (dependency_hold_count + history_hold_count).label(
+                    "dependency_hold_count"
+                ),
+                ProcessRunState.consecutive_failure_count.label("failure_count"),
+            )
+            .select_from(Process)
+            .outerjoin(
+                ProcessRunState, ProcessRunState.process_id == Process.process_id
+            )
+            .filter(Process.process_id == self.process.process_id)
+            .one()
+            ._asdict()
+        )
+
+        if admission.pop("state_process_id") is None:
+            if rebuild_run_state:
+                process_id = self.process.process_id
+                ancestor_ids = determine_ancestors(
+                    connection=self.session.connection(), process_ids=[process_id]
+                )[process_id]
+
+                if self.data_store.rebuild_process_run_state(
+                    process_ids=[process_id] + sorted(ancestor_ids)
+                ):
+                    return self.determine_run_admission(rebuild_run_state=False)
+
+            self.logger.debug("No run state for process.  Checking run history.")
+            return self.determine_run_admission_from_history()
+
+        return admission
+
+    def determine_run_admission_from_history(self):
+        """
+        Find everything needed to decide if a new run of the process can start from its run history, in one query:  the
+        latest run's id, run number and status, the number of runs of processes this process depends on, directly or
+        through other processes, that are running or failed, and the number of failed runs within the last
+        'max_concurrent_failures' runs.
+        :return: Dictionary with last_run_tracking_id, last_run_id, last_run_status_id, dependency_hold_count and
+                 failure_count.  The last run values are None if the process has not run before.
+        """
+        latest_run = aliased(ProcessTracking)
+
+        latest_run_id = (
+            self.session.query(func.max(ProcessTracking.process_run_id))
+            .filter(ProcessTracking.process_id == Process.process_id)
+            .correlate(Process)
+            .as_scalar()
+        )
+
+        dependency_hold_count = (
+            self.session.query(func.count(ProcessTracking.process_tracking_id))
+            .join(
+                ProcessDependencyClosure,
+                ProcessDependencyClosure.ancestor_process_id
+                == ProcessTracking.process_id,
+            )
+            .filter(
+                ProcessDependencyClosure.descendant_process_id == Process.process_id
+            )
+            .filter(
+                ProcessTracking.process_status_id.in_(
+                    (self.process_status_running, self.process_status_failed)
+                )
+            )
+            .correlate(Process)
+            .as_scalar()
+        )
+
+        failure_count = (
+            self.session.query(func.count(ProcessTracking.process_tracking_id))
+            .filter(ProcessTracking.process_id == Process.process_id)
+            .filter(
+                ProcessTracking.process_run_id
+                > latest_run.process_run_id - self.determine_max_concurrent_failures()
+            )
+            .filter(ProcessTracking.process_status_id == self.process_status_failed)
+            .correlate(Process, latest_run)
+            .as_scalar()
+        )
+
+        admission = (
+            self.session.query(
+                latest_run.process_tracking_id.label("last_run_tracking_id"),
+                latest_run.process_run_id.label("last_run_id"),
+                latest_run.process_status_id.label("last_run_status_id"),
+                dependency_hold_count.label("dependency_hold_count"),
+                failure_count.label("failure_count"),
+            )
+            .select_from(Process)
+            .outerjoin(
+                latest_run,
+                and_(
+                    latest_run.process_id == Process.process_id,
+                    latest_run.process_run_id == latest_run_id,
+                ),
+            )
+            .filter(Process.process_id == self.process.process_id)
+            .one()
+        )
+
+        return admission._asdict()
+
+    @staticmethod
+    def determine_source_hierarchy(
+        sources=None, source_objects=None, source_object_attributes=None
+    ):
+        """
+        Flatten the sources, source objects or source object attributes provided to the tracker into a list of
+        (source name, [(object name, [attribute names])]), in the order provided.  Only one of the parameters should be
+        set.
+        :param sources: A single source name or list of source names.
+        :type sources: list
+        :param source_objects: Source name(s) and the list of their objects.
+        :type source_objects: dict of lists
+        :param source_object_attributes: Source name(s), their objects, and the list of the objects' attributes.
+        :type source_object_attributes: dict of dicts
+        :return: List of tuples.
+        """
+        if source_object_attributes is not None:
+            return [
+                (source, list(objects.items()))
+                for source, objects in source_object_attributes.items()
+            ]
+        elif source_objects is not None:
+            return [
+                (source, [(item, list()) for item in objects])
+                for source, objects in source_objects.items()
+            ]
+
+        if isinstance(sources, str):
+            sources = [sources]
+
+        return [(source, list()) for source in sources]
+
+    def flush_process_run_record_count(self):
+        """
+        Add the buffered record counts to the process run's and the process' counts in the data store.  Each table is
+        updated with a single 'count = count + n' statement, so counts added by other workers in the meantime are kept.
+        :return:
+        """
+        self.record_count_flushed_at = time.monotonic()
+        counts = self.record_count_buffer
+
+        if not any(counts.values()):
+            return
+
+        self.logger.debug("Flushing record counts %s." % counts)
+
+        self.session.query(ProcessTracking).filter(
+            ProcessTracking.process_tracking_id
+            == self.process_tracking_run.process_tracking_id
+        ).update(
+            {
+                ProcessTracking.process_run_record_count: ProcessTracking.process_run_record_count
+                + counts["record"],
+                ProcessTracking.process_run_insert_count: ProcessTracking.process_run_insert_count
+                + counts["insert"],
+                ProcessTracking.process_run_update_count: ProcessTracking.process_run_update_count
+                + counts["update"],
+            },
+            synchronize_session=False,
+        )
+        self.session.query(Process).filter(
+            Process.process_id == self.process.process_id
+        ).update(
+            {Process.total_record_count: Process.total_record_count + counts["record"]},
+            synchronize_session=False,
+        )
+
+        self.data_store.commit()
+
+        self.record_count_buffer = {"record": 0, "insert": 0, "update": 0}
+
+        # Keep the loaded records in step without reading them again.  Counts added by other workers are not included.
+        for instance, key, count in [
+            (self.process_tracking_run, "process_run_record_count", counts["record"]),
+            (self.process_tracking_run, "process_run_insert_count", counts["insert"]),
+            (self.process_tracking_run, "process_run_update_count", counts["update"]),
+            (self.process, "total_record_count", counts["record"]),
+        ]:
+            set_committed_value(instance, key, (getattr(instance, key) or 0) + count)
+
+    def find_blocked_extracts(self, extracts):
+        """
+        For a batch of extracts about to be loaded, find the ones that can not be loaded yet because they depend on
+        extracts, outside of the batch, that have not been loaded, are being created, or are loading.
+        :param extracts: List of ExtractTracker or ExtractReference objects.
+        :return: List of the blocked extracts, in the same order as extracts.
+        """
+        extract_ids = self.determine_extract_ids(extracts=extracts)
+
+        blocked_ids = self.determine_blocked_extracts(extract_ids=extract_ids)
+
+        return [
+            extract
+            for extract, extract_id in zip(extracts, extract_ids)
+            if extract_id in blocked_ids
+        ]
+
+    def find_extracts_by_filename(self, filename, status="ready", match="contains"):
+        """
+        For the given filename, or filename part, find all matching extracts that are ready for processing.
+        :param filename: Filename or part of filename.
+        :type filename: str
+        :param status: Name of the status type for files being searched.  Default 'ready'.
+        :type status: str
+        :param match: How the filename is matched, see determine_filename_filter.  Default 'contains'.
+        :type match: str
+        :return: List of Extract SQLAlchemy objects.
+        """
+
+        process_files = (
+            self.data_store.read_session.query(Extract)
+            .join(ExtractStatus)
+            .filter(*self.determine_filename_filter(filename=filename, match=match))
+            .filter(ExtractStatus.extract_status_name == status)
+            .order_by(Extract.extract_registration_date_time)
+            .order_by(Extract.extract_id)
+            .all()
+        )
+
+        self.logger.info("Processing file records to extract tracker objects")
+
+        process_files = self.create_extract_tracker_objects(files=process_files)
+
+        self.logger.info("Returning extract files by filename.")
+
+        return process_files
+
+    def find_extracts_by_location(
+        self, location_name=None, location_path=None, status="ready"
+    ):
+        """
+        For the given location path or location name, find all matching extracts that are ready for processing
+        :param location_name: The name of the location
+        :type location_name: str
+        :param location_path: The path of the location
+        :type location_path: str
+        :param status: Name of the status type for files being searched.  Default 'ready'.
+        :type status: str
+        :return: List of Extract SQLAlchemy objects.
+        """
+
+        if location_path is not None:
+            process_files = (
+                self.data_store.read_session.query(Extract)
+                .join(Location)
+                .join(ExtractStatus)
+                .filter(ExtractStatus.extract_status_name == status)
+                .filter(Location.location_path == location_path)
+                .order_by(Extract.extract_registration_date_time)
+                .order_by(Extract.extract_id)
+                .all()
+            )
+        elif location_name is not None:
+            process_files = (
+                self.data_store.read_session.query(Extract)
+                .join(Location)
+                .join(ExtractStatus)
+                .filter(ExtractStatus.extract_status_name == status)
+                .filter(Location.location_name == location_name)
+                .order_by(Extract.extract_registration_date_time)
+                .order_by(Extract.extract_id)
+                .all()
+            )
+        else:
+            self.logger.error(
+                "A location name or path must be provided.  Please try again."
+            )
+            raise Exception(
+                "A location name or path must be provided.  Please try again."
+            )
+
+        self.logger.info("Processing file records to extract tracker objects")
+
+        process_files = self.create_extract_tracker_objects(files=process_files)
+
+        self.logger.info("Returning extract files by location.")
+        return process_files
+
+    def find_extracts_by_process(self, extract_process_name, status="ready"):
+        """
+        For the given named process, find the extracts that are ready for processing.
+        :param extract_process_name: Name of the process that is associated with extracts
+        :type extract_process_name: str
+        :param status: Name of the status type for files being searched.  Default 'ready'.
+        :type status: str
+        :return: List of Extract SQLAlchemy objects.
+        """
+
+        process_files = (
+            self.data_store.read_session.query(Extract)
+            .join(
+                ExtractStatus,
                 Extract.extract_status_id == ExtractStatus.extract_status_id,
             )
             .join(Location, Extract.extract_location_id == Location.location_id)
@@ -640,7 +1533,9 @@ class ProcessTracker:
         contacts = list()
 
         result = (
-            self.session.query(Contact.contact_name, Contact.contact_email)
+            self.data_store.read_session.query(
+                Contact.contact_name, Contact.contact_email
+            )
             .join(SourceContact)
             .join(Source)
             .join(ProcessSource)
@@ -658,7 +1553,9 @@ class ProcessTracker:
             )
 
         result = (
-            self.session.query(Contact.contact_name, Contact.contact_email)
+            self.data_store.read_session.query(
+                Contact.contact_name, Contact.contact_email
+            )
             .join(ProcessContact)
             .join(Process)
             .filter(Process.process_id == process)
@@ -684,7 +1581,7 @@ class ProcessTracker:
         process_list = list()
 
         processes = (
-            self.data_store.session.query(Process)
+            self.data_store.read_session.query(Process)
             .join(ScheduleFrequency)
             .filter(ScheduleFrequency.schedule_frequency_name == frequency)
         )
@@ -702,7 +1599,7 @@ class ProcessTracker:
         filter_list = list()
 
         filters = (
-            self.session.query(
+            self.data_store.read_session.query(
                 Source.source_name,
                 SourceObject.source_object_name,
                 SourceObjectAttribute.source_object_attribute_name,
@@ -744,7 +1641,7 @@ class ProcessTracker:
         source_attribute_list = list()
 
         source_attributes = (
-            self.session.query(
+            self.data_store.read_session.query(
                 Source.source_name,
                 SourceType.source_type_name,
                 SourceObject.source_object_name,
@@ -788,7 +1685,7 @@ class ProcessTracker:
         target_attribute_list = list()
 
         source_attributes = (
-            self.session.query(
+            self.data_store.read_session.query(
                 Source.source_name,
                 SourceType.source_type_name,
                 SourceObject.source_object_name,
@@ -822,78 +1719,701 @@ class ProcessTracker:
                 }
             )
 
-        return target_attribute_list
+        return target_attribute_list
+
+    def get_latest_tracking_record(self):
+        """
+        For the given process, find the latest tracking record.
+        :return:
+        """
+
+        instance = (
+            self.data_store.read_session.query(ProcessTracking)
+            .filter(ProcessTracking.process_id == self.process.process_id)
+            .order_by(ProcessTracking.process_run_id.desc())
+            .first()
+        )
+
+        return instance
+
+    def get_process_status_types(self):
+        """
+        Get list of process status types and return dictionary.
+        :return:
+        """
+        return self.data_store.get_lookup_names(model=ProcessStatus)
+
+    def iter_extracts_by_filename(
+        self, filename, status="ready", match="contains", page_size=None
+    ):
+        """
+        Streaming version of find_extracts_by_filename.  Extracts are read a page at a time and yielded as references,
+        so any number of extracts can be worked through without holding them all in memory.
+        :param filename: Filename or part of filename.
+        :type filename: str
+        :param status: Name of the status type for files being searched.  Default 'ready'.
+        :type status: str
+        :param match: How the filename is matched, see determine_filename_filter.  Default 'contains'.
+        :type match: str
+        :param page_size: Number of extracts read per query.  Default is the data store's bulk chunk size.
+        :type page_size: int
+        :return: Generator of ExtractReference objects.
+        """
+        query = self.determine_extract_reference_query(status=status).filter(
+            *self.determine_filename_filter(filename=filename, match=match)
+        )
+
+        return self.iterate_extract_references(query=query, page_size=page_size)
+
+    def iter_extracts_by_location(
+        self, location_name=None, location_path=None, status="ready", page_size=None
+    ):
+        """
+        Streaming version of find_extracts_by_location.  Extracts are read a page at a time and yielded as references,
+        so any number of extracts can be worked through without holding them all in memory.
+        :param location_name: The name of the location
+        :type location_name: str
+        :param location_path: The path of the location
+        :type location_path: str
+        :param status: Name of the status type for files being searched.  Default 'ready'.
+        :type status: str
+        :param page_size: Number of extracts read per query.  Default is the data store's bulk chunk size.
+        :type page_size: int
+        :return: Generator of ExtractReference objects.
+        """
+        query = self.determine_extract_reference_query(status=status)
+
+        if location_path is not None:
+            query = query.filter(Location.location_path == location_path)
+        elif location_name is not None:
+            query = query.filter(Location.location_name == location_name)
+        else:
+            self.logger.error(
+                "A location name or path must be provided.  Please try again."
+            )
+            raise Exception(
+                "A location name or path must be provided.  Please try again."
+            )
+
+        return self.iterate_extract_references(query=query, page_size=page_size)
+
+    def iter_extracts_by_process(
+        self, extract_process_name, status="ready", page_size=None
+    ):
+        """
+        Streaming version of find_extracts_by_process.  Extracts are read a page at a time and yielded as references,
+        so any number of extracts can be worked through without holding them all in memory.
+        :param extract_process_name: Name of the process that is associated with extracts
+        :type extract_process_name: str
+        :param status: Name of the status type for files being searched.  Default 'ready'.
+        :type status: str
+        :param page_size: Number of extracts read per query.  Default is the data store's bulk chunk size.
+        :type page_size: int
+        :return: Generator of ExtractReference objects.
+        """
+        query = self.determine_extract_reference_query(status=status).filter(
+            Extract.extract_id.in_(
+                self.determine_process_extracts(
+                    extract_process_name=extract_process_name
+                )
+            )
+        )
+
+        return self.iterate_extract_references(query=query, page_size=page_size)
+
+    def iterate_extract_references(self, query, page_size=None):
+        """
+        Page through an extract reference query with keyset pagination on registration date and id, so every page is
+        an indexed range read no matter how far in, and extracts changing status while being worked through are
+        neither skipped nor returned twice.
+        :param query: Query built with determine_extract_reference_query.
+        :param page_size: Number of extracts read per query.  Default is the data store's bulk chunk size.
+        :type page_size: int
+        :return: Generator of ExtractReference objects.
+        """
+        if page_size is None:
+            page_size = bulk_chunk_size
+
+        last_key = None
+
+        while True:
+            page = query
+
+            if last_key is not None:
+                page = page.filter(
+                    or_(
+                        Extract.extract_registration_date_time > last_key[0],
+                        and_(
+                            Extract.extract_registration_date_time == last_key[0],
+                            Extract.extract_id > last_key[1],
+                        ),
+                    )
+                )
+
+            # Each page is read completely before it is yielded.  Callers commit status changes between extracts, which
+            # would close a cursor still streaming the page.
+            page = (
+                page.order_by(Extract.extract_registration_date_time)
+                .order_by(Extract.extract_id)
+                .limit(page_size)
+                .all()
+            )
+
+            for row in page:
+                last_key = (row.extract_registration_date_time, row.extract_id)
+
+                yield ExtractReference(
+                    extract_id=row.extract_id,
+                    extract_filename=row.extract_filename,
+                    extract_status_name=row.extract_status_name,
+                    location_id=row.extract_location_id,
+                    location_path=row.location_path,
+                )
+
+            if len(page) < page_size:
+                return
+
+    def load_process_definition(self):
+        """
+        For a process whose definition has not changed since it was registered, load its registered dataset types,
+        sources and targets instead of registering them again.
+        :return: True if the whole definition was found, otherwise False and the definition needs to be registered.
+        """
+        dataset_types = None
+
+        if self.dataset_types is not None:
+            dataset_type_names = self.dataset_types
+
+            if not isinstance(dataset_type_names, list):
+                dataset_type_names = [dataset_type_names]
+
+            # Eager loaded with the process, see preload_process.
+            registered = dict(
+                (
+                    association.process_dataset_types.dataset_type,
+                    association.process_dataset_types,
+                )
+                for association in self.process.dataset_types
+            )
+
+            dataset_types = [registered.get(name) for name in dataset_type_names]
+
+            if None in dataset_types:
+                return False
+
+        sources = None
+
+        if self.source_object_attributes is not None:
+            sources = self.load_registered_hierarchy(
+                association=ProcessSourceObjectAttribute,
+                association_key=ProcessSourceObjectAttribute.source_object_attribute_id,
+                source_object_attributes=self.source_object_attributes,
+            )
+        elif self.source_objects is not None:
+            sources = self.load_registered_hierarchy(
+                association=ProcessSourceObject,
+                association_key=ProcessSourceObject.source_object_id,
+                source_objects=self.source_objects,
+            )
+        elif self.sources is not None:
+            sources = self.load_registered_hierarchy(
+                association=ProcessSource,
+                association_key=ProcessSource.source_id,
+                sources=self.sources,
+            )
+
+        targets = None
+
+        if self.target_object_attributes is not None:
+            targets = self.load_registered_hierarchy(
+                association=ProcessTargetObjectAttribute,
+                association_key=ProcessTargetObjectAttribute.target_object_attribute_id,
+                source_object_attributes=self.target_object_attributes,
+            )
+        elif self.target_objects is not None:
+            targets = self.load_registered_hierarchy(
+                association=ProcessTargetObject,
+                association_key=ProcessTargetObject.target_object_id,
+                source_objects=self.target_objects,
+            )
+        elif self.targets is not None:
+            targets = self.load_registered_hierarchy(
+                association=ProcessTarget,
+                association_key=ProcessTarget.target_source_id,
+                sources=self.targets,
+            )
+
+        if (sources is not None and None in sources) or (
+            targets is not None and None in targets
+        ):
+            return False
+
+        self.dataset_types = dataset_types
+
+        if self.source_object_attributes is not None:
+            self.source_object_attributes = sources
+        elif self.source_objects is not None:
+            self.source_objects = sources
+
+        self.sources = sources
+        self.targets = targets
+
+        return True
+
+    def load_registered_hierarchy(
+        self,
+        association,
+        association_key,
+        sources=None,
+        source_objects=None,
+        source_object_attributes=None,
+    ):
+        """
+        Load the sources, source objects or source object attributes associated with the process, in one query.  Only
+        one of sources, source_objects or source_object_attributes should be set.
+        :param association: The process association model (i.e. ProcessSource, ProcessTargetObject)
+        :type association: SQLAlchemy Model instance
+        :param association_key: The association's column referencing the source, object or attribute.
+        :param sources: A single source name or list of source names.
+        :type sources: list
+        :param source_objects: Source name(s) and the list of their objects.
+        :type source_objects: dict of lists
+        :param source_object_attributes: Source name(s), their objects, and the list of the objects' attributes.
+        :type source_object_attributes: dict of dicts
+        :return: List of source, source object or source object attribute SQLAlchemy objects in the order provided,
+                 with None for each one not associated with the process.
+        """
+        hierarchy = self.determine_source_hierarchy(
+            sources=sources,
+            source_objects=source_objects,
+            source_object_attributes=source_object_attributes,
+        )
+
+        if source_object_attributes is not None:
+            query = (
+                self.session.query(
+                    SourceObjectAttribute,
+                    Source.source_name,
+                    SourceObject.source_object_name,
+                    SourceObjectAttribute.source_object_attribute_name,
+                )
+                .join(
+                    SourceObject,
+                    SourceObjectAttribute.source_object_id
+                    == SourceObject.source_object_id,
+                )
+                .join(Source, SourceObject.source_id == Source.source_id)
+                .join(
+                    association,
+                    association_key == SourceObjectAttribute.source_object_attribute_id,
+                )
+            )
+
+            keys = [
+                (source, source_object, attribute)
+                for source, objects in hierarchy
+                for source_object, attributes in objects
+                for attribute in attributes
+            ]
+        elif source_objects is not None:
+            query = (
+                self.session.query(
+                    SourceObject, Source.source_name, SourceObject.source_object_name
+                )
+                .join(Source, SourceObject.source_id == Source.source_id)
+                .join(association, association_key == SourceObject.source_object_id)
+            )
+
+            keys = [
+                (source, source_object)
+                for source, objects in hierarchy
+                for source_object, attributes in objects
+            ]
+        else:
+            query = self.session.query(Source, Source.source_name).join(
+                association, association_key == Source.source_id
+            )
+
+            keys = [(source,) for source, objects in hierarchy]
+
+        registered = dict(
+            (tuple(row[1:]), row[0])
+            for row in query.filter(association.process_id == self.process.process_id)
+        )
+
+        return [registered.get(key) for key in keys]
+
+    @staticmethod
+    def normalize_definition_item(item):
+        """
+        Normalize part of the process definition for fingerprinting.  Single names become lists and lists are sorted.
+        :param item: A name, list of names, or dictionary of either.
+        :return: The normalized item.
+        """
+        if item is None:
+            return None
+        elif isinstance(item, dict):
+            return dict(
+                (str(key), ProcessTracker.normalize_definition_item(value))
+                for key, value in item.items()
+            )
+        elif isinstance(item, (list, tuple, set)):
+            return sorted(str(value) for value in item)
+
+        return [str(item)]
+
+    def preload_process(self):
+        """
+        Load the existing process with its type, tool, schedule frequency, dataset types and latest run in one query.
+        :return: Tuple of the Process and its latest ProcessTracking SQLAlchemy objects, each None if not found.
+        """
+        latest_run = aliased(ProcessTracking)
+
+        latest_run_id = (
+            self.session.query(func.max(ProcessTracking.process_run_id))
+            .filter(ProcessTracking.process_id == Process.process_id)
+            .correlate(Process)
+            .as_scalar()
+        )
+
+        result = (
+            self.session.query(Process, latest_run)
+            .outerjoin(
+                latest_run,
+                and_(
+                    latest_run.process_id == Process.process_id,
+                    latest_run.process_run_id == latest_run_id,
+                ),
+            )
+            .options(*self.determine_process_load_options())
+            .filter(Process.process_name == self.process_name)
+            .first()
+        )
+
+        if result is None:
+            return None, None
+
+        return result
+
+    def raise_run_error(
+        self, error_type_name, error_description=None, fail_run=False, end_date=None
+    ):
+        """
+        Raise a runtime error and fail the process run if the error is severe enough. The error also is recorded in
+        error_tracking.
+        :param error_type_name: The name of the type of error being triggered.
+        :param error_description: The description of the error to store in error tracking.
+        :param fail_run:  Flag for triggering a run failure, default False
+        :type fail_run: Boolean
+        :param end_date: If a specific datetime is required for the process_tracking end datetime.
+        :type end_date: datetime
+        :return:
+        """
+        if end_date is None:
+            end_date = (
+                datetime.now()
+            )  # Need the date to match across all parts of the event in case the run is failed.
+
+        if error_description is None:
+            error_description = "Unspecified error."
+
+        error_type = self.data_store.get_or_create_item(
+            model=ErrorType, create=False, error_type_name=error_type_name
+        )
+
+        run_error = ErrorTracking(
+            error_type_id=error_type.error_type_id,
+            error_description=error_description,
+            process_tracking_id=self.process_tracking_run.process_tracking_id,
+            error_occurrence_date_time=end_date,
+        )
+
+        self.logger.error(
+            "%s - %s - %s" % (self.process_name, error_type_name, error_description)
+        )
+        self.session.add(run_error)
+        self.data_store.commit()
+
+        if fail_run:
+            self.change_run_status(new_status="failed", end_date=end_date)
+
+            raise Exception("Process halting.  An error triggered the process to fail.")
+
+    def read_from_primary(self):
+        """
+        If a read replica is configured, the finder methods (find_extracts_by_*, find_process_*, etc.) read from it.
+        Within a with block of this method they read from the primary data store instead, i.e. to find records written
+        moments ago that may not be replicated yet.
+        Example:  with process_tracker.read_from_primary(): ...
+        :return: Context manager
+        """
+        return self.data_store.read_from_primary()
+
+    def register_extracts(
+        self,
+        files,
+        location=None,
+        location_path=None,
+        location_name=None,
+        status="initializing",
+        compression_type=None,
+        filetype=None,
+    ):
+        """
+        Register many extract files for the process run at once.  Unlike ExtractTracker, which takes several queries and
+        commits per file, the extracts and their process, dataset type and source associations are written with a few
+        set based statements and committed together.  Files already registered are associated and set to the status.
+        :param files: The filenames of the extracts.
+        :type files: list
+        :param location: LocationTracker object of the location the files are in.
+        :param location_path: Location (filepath, s3 bucket, etc.) where the files are stored, if no location provided.
+        :type location_path: str
+        :param location_name: Optional name for the location when using location_path.
+        :type location_name: str
+        :param status: The status to register the extracts with.  Default 'initializing'.
+        :type status: str
+        :param compression_type: Optional compression format of the extracts.
+        :type compression_type: str
+        :param filetype: Optional file type of the extracts.  Derived from each filename's extension if not provided.
+        :type filetype: str
+        :return: List of ExtractReference objects, in the same order as files.
+        """
+        extract_status_types = self.data_store.get_lookup_names(model=ExtractStatus)
+
+        if status not in extract_status_types:
+            error_msg = (
+                "%s is not a valid extract status type.  "
+                "Please add the status to extract_status_lkup" % status
+            )
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+
+        status_id = extract_status_types[status]
+
+        if location is None:
+            if location_path is None:
+                error_msg = "A location object or location_path must be provided."
+                self.logger.error(error_msg)
+                raise Exception(error_msg)
+
+            location = LocationTracker(
+                location_name=location_name,
+                location_path=location_path,
+                data_store=self.data_store,
+            )
+
+        location_id = location.location.location_id
+
+        compression_type_id = None
+
+        if compression_type is not None:
+            try:
+                compression_type_id = self.data_store.get_or_create_item(
+                    model=ExtractCompressionType,
+                    create=False,
+                    extract_compression_type=compression_type,
+                ).extract_compression_type_id
+            except Exception:
+                error_msg = "%s is not a valid compression type." % compression_type
+                self.logger.error(error_msg)
+                raise Exception(error_msg)
+
+        filetype_ids = dict()
+
+        if filetype is not None:
+            try:
+                filetype_id = self.data_store.get_or_create_item(
+                    model=ExtractFileType, create=False, extract_filetype=filetype
+                ).extract_filetype_id
+            except Exception:
+                error_msg = "%s is not a valid file type." % filetype
+                self.logger.error(error_msg)
+                raise Exception(error_msg)
+
+        filenames = list(dict.fromkeys(files))
+
+        if not filenames:
+            return list()
+
+        rows = list()
+
+        for filename in filenames:
+            if filetype is None:
+                file_extension = os.path.splitext(filename)[1].replace(".", "")
+
+                if file_extension not in filetype_ids:
+                    filetype_ids[file_extension] = self.data_store.get_or_create_item(
+                        model=ExtractFileType,
+                        create=False,
+                        extract_filetype_code=file_extension,
+                    ).extract_filetype_id
+
+                filetype_id = filetype_ids[file_extension]
+
+            rows.append(
+                {
+                    "extract_filename": filename,
+                    "extract_location_id": location_id,
+                    "extract_status_id": status_id,
+                    "extract_compression_type_id": compression_type_id,
+                    "extract_filetype_id": filetype_id,
+                }
+            )
+
+        if status == "loading":
+            # Checked before anything is written.  Only extracts already registered can have dependencies.
+            existing_ids = list()
 
-    def get_latest_tracking_record(self):
-        """
-        For the given process, find the latest tracking record.
-        :return:
-        """
+            for offset in range(0, len(filenames), bulk_chunk_size):
+                chunk = filenames[offset : offset + bulk_chunk_size]
 
-        instance = (
-            self.session.query(ProcessTracking)
-            .filter(ProcessTracking.process_id == self.process.process_id)
-            .order_by(ProcessTracking.process_run_id.desc())
-            .first()
-        )
+                existing_ids.extend(
+                    extract_id
+                    for extract_id, in self.session.query(Extract.extract_id).filter(
+                        Extract.extract_filename.in_(chunk)
+                    )
+                )
 
-        return instance
+            blocked_ids = self.determine_blocked_extracts(extract_ids=existing_ids)
 
-    def get_process_status_types(self):
-        """
-        Get list of process status types and return dictionary.
-        :return:
-        """
-        status_types = {}
+            if blocked_ids:
+                error_msg = (
+                    "Extract files that extracts %s are dependent on have not been loaded, are being created, or are "
+                    "in the process of loading." % sorted(blocked_ids)
+                )
+                self.logger.error(error_msg)
+                raise Exception(error_msg)
 
-        for record in self.session.query(ProcessStatus):
-            status_types[record.process_status_name] = record.process_status_id
+        self.logger.info("Registering %s extracts." % len(rows))
 
-        return status_types
+        self.data_store.insert_ignore_duplicates(
+            model=Extract, rows=rows, key_fields=["extract_filename"]
+        )
 
-    def raise_run_error(
-        self, error_type_name, error_description=None, fail_run=False, end_date=None
-    ):
-        """
-        Raise a runtime error and fail the process run if the error is severe enough. The error also is recorded in
-        error_tracking.
-        :param error_type_name: The name of the type of error being triggered.
-        :param error_description: The description of the error to store in error tracking.
-        :param fail_run:  Flag for triggering a run failure, default False
-        :type fail_run: Boolean
-        :param end_date: If a specific datetime is required for the process_tracking end datetime.
-        :type end_date: datetime
-        :return:
-        """
-        if end_date is None:
-            end_date = (
-                datetime.now()
-            )  # Need the date to match across all parts of the event in case the run is failed.
+        extract_ids = dict()
 
-        if error_description is None:
-            error_description = "Unspecified error."
+        for offset in range(0, len(filenames), bulk_chunk_size):
+            chunk = filenames[offset : offset + bulk_chunk_size]
 
-        error_type = self.data_store.get_or_create_item(
-            model=ErrorType, create=False, error_type_name=error_type_name
-        )
+            extract_ids.update(
+                (filename, extract_id)
+                for extract_id, filename in self.session.query(
+                    Extract.extract_id, Extract.extract_filename
+                ).filter(Extract.extract_filename.in_(chunk))
+            )
 
-        run_error = ErrorTracking(
-            error_type_id=error_type.error_type_id,
-            error_description=error_description,
-            process_tracking_id=self.process_tracking_run.process_tracking_id,
-            error_occurrence_date_time=end_date,
+        ids = [extract_ids[filename] for filename in filenames]
+
+        # Inserted without the ORM, so the filename tokens' session listener does not see them.
+        add_filename_tokens(
+            connection=self.session.connection(),
+            extracts=[(extract_ids[filename], filename) for filename in filenames],
         )
 
-        self.logger.error(
-            "%s - %s - %s" % (self.process_name, error_type_name, error_description)
+        process_tracking_id = self.process_tracking_run.process_tracking_id
+        status_date = datetime.now()
+
+        self.data_store.insert_ignore_duplicates(
+            model=ExtractProcess,
+            rows=[
+                {
+                    "extract_tracking_id": extract_id,
+                    "process_tracking_id": process_tracking_id,
+                    "extract_process_status_id": status_id,
+                    "extract_process_event_date_time": status_date,
+                }
+                for extract_id in ids
+            ],
+            key_fields=["extract_tracking_id", "process_tracking_id"],
         )
-        self.session.add(run_error)
-        self.session.commit()
 
-        if fail_run:
-            self.change_run_status(new_status="failed", end_date=end_date)
+        if self.dataset_types is not None:
+            self.logger.info("Associating dataset type(s) with extracts.")
+
+            self.data_store.insert_ignore_duplicates(
+                model=ExtractDatasetType,
+                rows=[
+                    {
+                        "extract_id": extract_id,
+                        "dataset_type_id": dataset_type.dataset_type_id,
+                    }
+                    for extract_id in ids
+                    for dataset_type in self.dataset_types
+                ],
+                key_fields=["extract_id", "dataset_type_id"],
+            )
 
-            raise Exception("Process halting.  An error triggered the process to fail.")
+        if self.source_objects is not None:
+            self.logger.info(
+                "Associating source system(s) object(s) with extracts and location."
+            )
+
+            self.data_store.insert_ignore_duplicates(
+                model=ExtractSourceObject,
+                rows=[
+                    {
+                        "extract_id": extract_id,
+                        "source_object_id": source_object.source_object_id,
+                    }
+                    for extract_id in ids
+                    for source_object in self.source_objects
+                ],
+                key_fields=["extract_id", "source_object_id"],
+            )
+            self.data_store.insert_ignore_duplicates(
+                model=SourceObjectLocation,
+                rows=[
+                    {
+                        "source_object_id": source_object.source_object_id,
+                        "location_id": location_id,
+                    }
+                    for source_object in self.source_objects
+                ],
+                key_fields=["source_object_id", "location_id"],
+            )
+
+        elif self.sources is not None:
+            self.logger.info("Associating source system(s) with extracts and location.")
+
+            self.data_store.insert_ignore_duplicates(
+                model=ExtractSource,
+                rows=[
+                    {"extract_id": extract_id, "source_id": source.source_id}
+                    for extract_id in ids
+                    for source in self.sources
+                ],
+                key_fields=["extract_id", "source_id"],
+            )
+            self.data_store.insert_ignore_duplicates(
+                model=SourceLocation,
+                rows=[
+                    {"source_id": source.source_id, "location_id": location_id}
+                    for source in self.sources
+                ],
+                key_fields=["source_id", "location_id"],
+            )
+
+        else:
+            self.logger.info("No source system(s) to associate to.")
+
+        references = [
+            ExtractReference(
+                extract_id=extract_ids[filename],
+                extract_filename=filename,
+                extract_status_name=status,
+                location_id=location_id,
+                location_path=location.location.location_path,
+            )
+            for filename in filenames
+        ]
+
+        # Extracts and associations that were already registered are set to the status as well.  Dependencies were
+        # checked above.
+        self.update_extract_status(
+            extracts=references, extract_status=status, check_dependencies=False
+        )
+
+        return references
 
     def register_extracts_by_location(self, location_path, location_name=None):
         """
@@ -944,91 +2464,94 @@ class ProcessTracker:
 
     def register_new_process_run(self):
         """
-        When a new process instance is starting, register the run in process tracking.
+        When a new process instance is starting, register the run in process tracking.  Only one worker at a time can
+        register a run of a given process; if another worker is, ProcessRunLockError is raised.
         :return:
         """
-        child_process = aliased(Process)
-        parent_process = aliased(Process)
+        # End the session's transaction, even within a batch, so admission reads in a new one that sees the runs other
+        # workers committed before the lock was taken.  The replica is not used for admission, as it may lag behind.
+        self.data_store.commit(force=True)
 
-        last_run = self.get_latest_tracking_record()
+        with self.data_store.process_lock(process=self.process):
+            admission = self.determine_run_admission()
 
-        new_run_flag = True
-        new_run_id = 1
+            new_run_flag = True
+            new_run_id = 1
 
-        # Need to check the status of any dependencies.  If dependencies are running or failed, halt this process.
+            # Need to check the status of any dependencies, including the dependencies' own.  If dependencies are
+            # running or failed, halt this process.
 
-        dependency_hold = (
-            self.session.query(ProcessDependency)
-            .join(
-                parent_process,
-                ProcessDependency.parent_process_id == parent_process.process_id,
-            )
-            .join(
-                child_process,
-                ProcessDependency.child_process_id == child_process.process_id,
-            )
-            .join(
-                ProcessTracking, ProcessTracking.process_id == parent_process.process_id
-            )
-            .join(
-                ProcessStatus,
-                ProcessStatus.process_status_id == ProcessTracking.process_status_id,
-            )
-            .filter(child_process.process_id == self.process.process_id)
-            .filter(ProcessStatus.process_status_name.in_(("running", "failed")))
-            .count()
-        )
+            if admission["dependency_hold_count"] > 0:
+                raise Exception(
+                    "Processes that this process is dependent on are running or failed."
+                )
 
-        if dependency_hold > 0:
-            raise Exception(
-                "Processes that this process is dependent on are running or failed."
-            )
+            last_run_status = admission["last_run_status_id"]
 
-        if last_run is not None and last_run:
-            # Must validate that the process is not currently running.
+            if admission["last_run_tracking_id"] is not None:
+                # Must validate that the process is not currently running.
 
-            if (
-                last_run.process_status_id != self.process_status_running
-                and last_run.process_status_id != self.process_status_hold
-            ):
-                last_run.is_latest_run = False
-                new_run_flag = True
-                new_run_id = last_run.process_run_id + 1
-            else:
-                new_run_flag = False
+                if (
+                    last_run_status != self.process_status_running
+                    and last_run_status != self.process_status_hold
+                ):
+                    # Usually already in the session, loaded by preload_process.
+                    last_run = self.session.query(ProcessTracking).get(
+                        admission["last_run_tracking_id"]
+                    )
+                    last_run.is_latest_run = False
+
+                    new_run_flag = True
+                    new_run_id = admission["last_run_id"] + 1
+                else:
+                    new_run_flag = False
+
+                if self.determine_hold_status(
+                    last_run_status=last_run_status,
+                    last_run_id=admission["last_run_id"],
+                    failure_count=admission["failure_count"],
+                ):
+                    self.logger.error(
+                        "Process is on hold due to number of concurrent failures or previous run is in on-hold status."
+                    )
+                    new_run_flag = False
 
-            if self.determine_hold_status(
-                last_run_status=last_run.process_status_id,
-                last_run_id=last_run.process_run_id,
-            ):
-                self.logger.error(
-                    "Process is on hold due to number of concurrent failures or previous run is in on-hold status."
+            if new_run_flag:
+                new_run = ProcessTracking(
+                    process_id=self.process.process_id,
+                    process_status_id=self.process_status_running,
+                    process_run_id=new_run_id,
+                    process_run_start_date_time=datetime.now(),
+                    process_run_actor_id=self.actor.actor_id,
+                    is_latest_run=True,
+                    process_run_name=self.process_run_name,
                 )
-                new_run_flag = False
 
-        if new_run_flag:
-            new_run = ProcessTracking(
-                process_id=self.process.process_id,
-                process_status_id=self.process_status_running,
-                process_run_id=new_run_id,
-                process_run_start_date_time=datetime.now(),
-                process_run_actor_id=self.actor.actor_id,
-                is_latest_run=True,
-                process_run_name=self.process_run_name,
-            )
+                self.session.add(new_run)
+                self.update_process_run_state(
+                    process_run=new_run,
+                    failure_count=admission["failure_count"] if new_run_id > 1 else 0,
+                )
 
-            self.session.add(new_run)
-            self.session.commit()
+                # The run must be committed before the lock is released, so the next worker admitted sees it.
+                self.data_store.commit(force=True)
 
-            self.logger.info("Process tracking record added for %s" % self.process_name)
+                self.logger.info(
+                    "Process tracking record added for %s" % self.process_name
+                )
 
-            return new_run
+                return new_run
 
-        else:
-            raise Exception(
-                "The process %s is currently %s."
-                % (self.process_name, last_run.status.process_status_name)
-            )
+            else:
+                status_names = dict(
+                    (status_id, status_name)
+                    for status_name, status_id in self.process_status_types.items()
+                )
+
+                raise Exception(
+                    "The process %s is currently %s."
+                    % (self.process_name, status_names.get(last_run_status))
+                )
 
     def register_process_dataset_types(self, dataset_types):
         """
@@ -1037,26 +2560,78 @@ class ProcessTracker:
         :return:
         """
 
-        dataset_type_list = list()
-
         if not isinstance(dataset_types, list):
             dataset_types = [dataset_types]
 
-        for dataset_type in dataset_types:
-            self.logger.debug("Registering dataset_type %s to process." % dataset_type)
-            dataset_type = self.data_store.get_or_create_item(
-                model=DatasetType, dataset_type=dataset_type
+        self.logger.debug("Registering dataset_types %s to process." % dataset_types)
+
+        dataset_type_list = self.data_store.get_or_create_many(
+            model=DatasetType,
+            rows=[{"dataset_type": dataset_type} for dataset_type in dataset_types],
+            key_fields=["dataset_type"],
+        )
+
+        self.data_store.get_or_create_many(
+            model=ProcessDatasetType,
+            rows=[
+                {
+                    "process_id": self.process.process_id,
+                    "dataset_type_id": dataset_type.dataset_type_id,
+                }
+                for dataset_type in dataset_type_list
+            ],
+            key_fields=["process_id", "dataset_type_id"],
+        )
+
+        return dataset_type_list
+
+    def register_process_definition(self):
+        """
+        Register the process' dataset types, sources and targets.
+        :return:
+        """
+        # Dataset types should be loaded before source and target because they are also used there.
+
+        if self.dataset_types is not None:
+            self.dataset_types = self.register_process_dataset_types(
+                dataset_types=self.dataset_types
             )
+        else:
+            self.dataset_types = None
 
-            self.data_store.get_or_create_item(
-                model=ProcessDatasetType,
-                process_id=self.process.process_id,
-                dataset_type_id=dataset_type.dataset_type_id,
+        # sources, source_objects, or source_object_attributes should be set, not multiple.  Always go with
+        # lower grain if possible.
+
+        if self.source_object_attributes is not None:
+            self.source_object_attributes = self.register_process_sources(
+                source_object_attributes=self.source_object_attributes
+            )
+            self.sources = self.source_object_attributes
+        elif self.source_objects is not None:
+            self.source_objects = self.register_process_sources(
+                source_objects=self.source_objects
             )
+            self.sources = self.source_objects
+        elif self.sources is not None:
+            self.sources = self.register_process_sources(sources=self.sources)
+        else:
+            self.sources = None
 
-            dataset_type_list.append(dataset_type)
+        # targets, target_objects, or target_object_attributes should be set, not multiple.  Always go with lower
+        # grain if possible.
 
-        return dataset_type_list
+        if self.target_object_attributes is not None:
+            self.targets = self.register_process_targets(
+                target_object_attributes=self.target_object_attributes
+            )
+        elif self.target_objects is not None:
+            self.targets = self.register_process_targets(
+                target_objects=self.target_objects
+            )
+        elif self.targets is not None:
+            self.targets = self.register_process_targets(targets=self.targets)
+        else:
+            self.targets = None
 
     def register_process_sources(
         self, sources=None, source_objects=None, source_object_attributes=None
@@ -1074,43 +2649,27 @@ class ProcessTracker:
 
         if source_object_attributes is not None:
             if isinstance(source_object_attributes, dict):
-                for source, objects in source_object_attributes.items():
-                    self.logger.debug("Working on source %s" % source)
-                    source = self.data_store.get_or_create_item(
-                        model=Source, source_name=source
-                    )
+                registered = self.register_source_hierarchy(
+                    source_object_attributes=source_object_attributes
+                )
+                source_list = registered["source_object_attributes"]
 
-                    for source_object, attributes in objects.items():
-                        self.logger.debug("Working on object %s" % source_object)
-                        source_object = self.data_store.get_or_create_item(
-                            model=SourceObject,
-                            source_id=source.source_id,
-                            source_object_name=source_object,
-                        )
+                self.logger.debug(
+                    "Associating process %s with %s attributes."
+                    % (self.process.process_name, len(source_list))
+                )
 
-                        for attribute in attributes:
-                            self.logger.debug("Working on attribute %s" % attribute)
-                            object_attribute = self.data_store.get_or_create_item(
-                                model=SourceObjectAttribute,
-                                source_object_id=source_object.source_object_id,
-                                source_object_attribute_name=attribute,
-                            )
-
-                            self.logger.debug(
-                                "Associating process %s with %s"
-                                % (
-                                    self.process.process_name,
-                                    object_attribute.source_object_attribute_name,
-                                )
-                            )
-
-                            self.data_store.get_or_create_item(
-                                model=ProcessSourceObjectAttribute,
-                                source_object_attribute_id=object_attribute.source_object_attribute_id,
-                                process_id=self.process.process_id,
-                            )
-
-                            source_list.append(object_attribute)
+                self.data_store.get_or_create_many(
+                    model=ProcessSourceObjectAttribute,
+                    rows=[
+                        {
+                            "source_object_attribute_id": attribute.source_object_attribute_id,
+                            "process_id": self.process.process_id,
+                        }
+                        for attribute in source_list
+                    ],
+                    key_fields=["source_object_attribute_id", "process_id"],
+                )
             else:
                 error_msg = "source_object_attributes is not a dictionary."
                 self.logger.error(error_msg)
@@ -1118,77 +2677,59 @@ class ProcessTracker:
 
         elif source_objects is not None:
             if isinstance(source_objects, dict):
-                for source, objects in source_objects.items():
-
-                    source = self.data_store.get_or_create_item(
-                        model=Source, source_name=source
-                    )
-
-                    self.data_store.get_or_create_item(
-                        model=ProcessSource,
-                        source_id=source.source_id,
-                        process_id=self.process.process_id,
-                    )
-
-                    if self.dataset_types is not None:
-                        for dataset_type in self.dataset_types:
-                            self.data_store.get_or_create_item(
-                                model=SourceDatasetType,
-                                source_id=source.source_id,
-                                dataset_type_id=dataset_type.dataset_type_id,
-                            )
-
-                    for item in objects:
+                registered = self.register_source_hierarchy(
+                    source_objects=source_objects
+                )
+                source_list = registered["source_objects"]
 
-                        source_object = self.data_store.get_or_create_item(
-                            model=SourceObject,
-                            source_id=source.source_id,
-                            source_object_name=item,
-                        )
+                self.data_store.get_or_create_many(
+                    model=ProcessSource,
+                    rows=[
+                        {
+                            "source_id": source.source_id,
+                            "process_id": self.process.process_id,
+                        }
+                        for source in registered["sources"]
+                    ],
+                    key_fields=["source_id", "process_id"],
+                )
 
-                        if self.dataset_types is not None:
-                            for dataset_type in self.dataset_types:
-                                self.data_store.get_or_create_item(
-                                    model=SourceObjectDatasetType,
-                                    source_object_id=source_object.source_object_id,
-                                    dataset_type_id=dataset_type.dataset_type_id,
-                                )
-
-                        self.data_store.get_or_create_item(
-                            model=ProcessSourceObject,
-                            process_id=self.process.process_id,
-                            source_object_id=source_object.source_object_id,
-                        )
+                self.register_source_dataset_types(
+                    sources=registered["sources"], source_objects=source_list
+                )
 
-                        source_list.append(source_object)
+                self.data_store.get_or_create_many(
+                    model=ProcessSourceObject,
+                    rows=[
+                        {
+                            "process_id": self.process.process_id,
+                            "source_object_id": source_object.source_object_id,
+                        }
+                        for source_object in source_list
+                    ],
+                    key_fields=["process_id", "source_object_id"],
+                )
             else:
                 self.logger.error("It appears source_objects is not a dictionary.")
                 raise Exception("It appears source_objects is not a dictionary.")
 
         elif sources is not None:
-            if isinstance(sources, str):
-                sources = [sources]
-
-            for source in sources:
-                source = self.data_store.get_or_create_item(
-                    model=Source, source_name=source
-                )
-
-                if self.dataset_types is not None:
-                    for dataset_type in self.dataset_types:
-                        self.data_store.get_or_create_item(
-                            model=SourceDatasetType,
-                            source_id=source.source_id,
-                            dataset_type_id=dataset_type.dataset_type_id,
-                        )
-
-                self.data_store.get_or_create_item(
-                    model=ProcessSource,
-                    source_id=source.source_id,
-                    process_id=self.process.process_id,
-                )
-
-                source_list.append(source)
+            registered = self.register_source_hierarchy(sources=sources)
+            source_list = registered["sources"]
+
+            self.register_source_dataset_types(sources=source_list)
+
+            self.data_store.get_or_create_many(
+                model=ProcessSource,
+                rows=[
+                    {
+                        "source_id": source.source_id,
+                        "process_id": self.process.process_id,
+                    }
+                    for source in source_list
+                ],
+                key_fields=["source_id", "process_id"],
+            )
 
         return source_list
 
@@ -1208,43 +2749,27 @@ class ProcessTracker:
         target_list = list()
         if target_object_attributes is not None:
             if isinstance(target_object_attributes, dict):
-                for target, objects in target_object_attributes.items():
-                    self.logger.debug("Working on source %s" % target)
-                    source = self.data_store.get_or_create_item(
-                        model=Source, source_name=target
-                    )
+                registered = self.register_source_hierarchy(
+                    source_object_attributes=target_object_attributes
+                )
+                target_list = registered["source_object_attributes"]
 
-                    for target_object, attributes in objects.items():
-                        self.logger.debug("Working on object %s" % target_object)
-                        source_object = self.data_store.get_or_create_item(
-                            model=SourceObject,
-                            source_id=source.source_id,
-                            source_object_name=target_object,
-                        )
+                self.logger.debug(
+                    "Associating process %s with %s attributes."
+                    % (self.process.process_name, len(target_list))
+                )
 
-                        for attribute in attributes:
-                            self.logger.debug("Working on attribute %s" % attribute)
-                            object_attribute = self.data_store.get_or_create_item(
-                                model=SourceObjectAttribute,
-                                source_object_id=source_object.source_object_id,
-                                source_object_attribute_name=attribute,
-                            )
-
-                            self.logger.debug(
-                                "Associating process %s with %s"
-                                % (
-                                    self.process.process_name,
-                                    object_attribute.source_object_attribute_name,
-                                )
-                            )
-
-                            self.data_store.get_or_create_item(
-                                model=ProcessTargetObjectAttribute,
-                                target_object_attribute_id=object_attribute.source_object_attribute_id,
-                                process_id=self.process.process_id,
-                            )
-
-                            target_list.append(object_attribute)
+                self.data_store.get_or_create_many(
+                    model=ProcessTargetObjectAttribute,
+                    rows=[
+                        {
+                            "target_object_attribute_id": attribute.source_object_attribute_id,
+                            "process_id": self.process.process_id,
+                        }
+                        for attribute in target_list
+                    ],
+                    key_fields=["target_object_attribute_id", "process_id"],
+                )
             else:
                 error_msg = "target_object_attributes is not a dictionary."
                 self.logger.error(error_msg)
@@ -1252,76 +2777,163 @@ class ProcessTracker:
 
         elif target_objects is not None:
             if isinstance(target_objects, dict):
-                for target, objects in target_objects.items():
-
-                    target = self.data_store.get_or_create_item(
-                        model=Source, source_name=target
-                    )
-
-                    if self.dataset_types is not None:
-                        for dataset_type in self.dataset_types:
-                            self.data_store.get_or_create_item(
-                                model=SourceDatasetType,
-                                source_id=target.source_id,
-                                dataset_type_id=dataset_type.dataset_type_id,
-                            )
-
-                    self.data_store.get_or_create_item(
-                        model=ProcessTarget,
-                        target_source_id=target.source_id,
-                        process_id=self.process.process_id,
-                    )
+                registered = self.register_source_hierarchy(
+                    source_objects=target_objects
+                )
+                target_list = registered["source_objects"]
 
-                    for item in objects:
+                self.register_source_dataset_types(
+                    sources=registered["sources"], source_objects=target_list
+                )
 
-                        target_object = self.data_store.get_or_create_item(
-                            model=SourceObject,
-                            source_id=target.source_id,
-                            source_object_name=item,
-                        )
-                        if self.dataset_types is not None:
-                            for dataset_type in self.dataset_types:
-                                self.data_store.get_or_create_item(
-                                    model=SourceObjectDatasetType,
-                                    source_object_id=target_object.source_object_id,
-                                    dataset_type_id=dataset_type.dataset_type_id,
-                                )
-
-                        self.data_store.get_or_create_item(
-                            model=ProcessTargetObject,
-                            process_id=self.process.process_id,
-                            target_object_id=target_object.source_object_id,
-                        )
+                self.data_store.get_or_create_many(
+                    model=ProcessTarget,
+                    rows=[
+                        {
+                            "target_source_id": target.source_id,
+                            "process_id": self.process.process_id,
+                        }
+                        for target in registered["sources"]
+                    ],
+                    key_fields=["target_source_id", "process_id"],
+                )
 
-                        target_list.append(target_object)
+                self.data_store.get_or_create_many(
+                    model=ProcessTargetObject,
+                    rows=[
+                        {
+                            "process_id": self.process.process_id,
+                            "target_object_id": target_object.source_object_id,
+                        }
+                        for target_object in target_list
+                    ],
+                    key_fields=["process_id", "target_object_id"],
+                )
             else:
                 self.logger.error("It appears target_objects is not a dictionary.")
                 raise Exception("It appears target_objects is not a dictionary.")
 
         elif targets is not None:
-            if isinstance(targets, str):
-                targets = [targets]
+            registered = self.register_source_hierarchy(sources=targets)
+            target_list = registered["sources"]
+
+            self.register_source_dataset_types(sources=target_list)
+
+            self.data_store.get_or_create_many(
+                model=ProcessTarget,
+                rows=[
+                    {
+                        "target_source_id": target.source_id,
+                        "process_id": self.process.process_id,
+                    }
+                    for target in target_list
+                ],
+                key_fields=["target_source_id", "process_id"],
+            )
 
-            for target in targets:
-                source = self.data_store.get_or_create_item(
-                    model=Source, source_name=target
-                )
-                if self.dataset_types is not None:
-                    for dataset_type in self.dataset_types:
-                        self.data_store.get_or_create_item(
-                            model=SourceDatasetType,
-                            source_id=source.source_id,
-                            dataset_type_id=dataset_type.dataset_type_id,
-                        )
+        return target_list
 
-                self.data_store.get_or_create_item(
-                    model=ProcessTarget,
-                    target_source_id=source.source_id,
-                    process_id=self.process.process_id,
+    def register_source_dataset_types(self, sources=None, source_objects=None):
+        """
+        Associate the process' dataset types with the given sources and source objects in bulk.
+        :param sources: List of Source SQLAlchemy objects.
+        :param source_objects: List of SourceObject SQLAlchemy objects.
+        :return:
+        """
+        if self.dataset_types is None:
+            return
+
+        if sources is not None:
+            self.data_store.get_or_create_many(
+                model=SourceDatasetType,
+                rows=[
+                    {
+                        "source_id": source.source_id,
+                        "dataset_type_id": dataset_type.dataset_type_id,
+                    }
+                    for source in sources
+                    for dataset_type in self.dataset_types
+                ],
+                key_fields=["source_id", "dataset_type_id"],
+            )
+
+        if source_objects is not None:
+            self.data_store.get_or_create_many(
+                model=SourceObjectDatasetType,
+                rows=[
+                    {
+                        "source_object_id": source_object.source_object_id,
+                        "dataset_type_id": dataset_type.dataset_type_id,
+                    }
+                    for source_object in source_objects
+                    for dataset_type in self.dataset_types
+                ],
+                key_fields=["source_object_id", "dataset_type_id"],
+            )
+
+    def register_source_hierarchy(
+        self, sources=None, source_objects=None, source_object_attributes=None
+    ):
+        """
+        Bulk register sources and, if provided, their objects and object attributes.  Used for both process sources and
+        process targets.  Only one of the parameters should be set.
+        :param sources: A single source name or list of source names.
+        :type sources: list
+        :param source_objects: Source name(s) and the list of their objects.
+        :type source_objects: dict of lists
+        :param source_object_attributes: Source name(s), their objects, and the list of the objects' attributes.
+        :type source_object_attributes: dict of dicts
+        :return: Dictionary with the registered sources, source_objects and source_object_attributes, each a list of
+                 SQLAlchemy objects in the order provided.
+        """
+        hierarchy = self.determine_source_hierarchy(
+            sources=sources,
+            source_objects=source_objects,
+            source_object_attributes=source_object_attributes,
+        )
+
+        self.logger.debug("Working on sources %s" % [item[0] for item in hierarchy])
+
+        source_list = self.data_store.get_or_create_many(
+            model=Source,
+            rows=[{"source_name": source} for source, objects in hierarchy],
+            key_fields=["source_name"],
+        )
+
+        object_rows = list()
+        attribute_names = list()
+
+        for source, (source_name, objects) in zip(source_list, hierarchy):
+            for object_name, attributes in objects:
+                object_rows.append(
+                    {"source_id": source.source_id, "source_object_name": object_name}
                 )
+                attribute_names.append(attributes)
 
-                target_list.append(source)
-        return target_list
+        object_list = self.data_store.get_or_create_many(
+            model=SourceObject,
+            rows=object_rows,
+            key_fields=["source_id", "source_object_name"],
+        )
+
+        attribute_list = self.data_store.get_or_create_many(
+            model=SourceObjectAttribute,
+            rows=[
+                {
+                    "source_object_id": source_object.source_object_id,
+                    "source_object_attribute_name": attribute,
+                }
+                for source_object, attributes in zip(object_list, attribute_names)
+                for attribute in attributes
+            ],
+            key_fields=["source_object_id", "source_object_attribute_name"],
+        )
+
+        return {
+            "sources": source_list,
+            "source_objects": object_list,
+            "source_object_attributes": attribute_list,
+        }
 
     def set_process_run_low_high_dates(self, low_date=None, high_date=None):
         """
@@ -1348,7 +2960,7 @@ class ProcessTracker:
 
             self.process_tracking_run.process_run_high_date_time = high_date
 
-        self.session.commit()
+        self.data_store.commit()
 
     def record_count_manager(self, original_count, num_records):
         """
@@ -1399,4 +3011,145 @@ class ProcessTracker:
 
         self.process_tracking_run.process_run_record_count = num_records
 
-        self.session.commit()
+        self.data_store.commit()
+
+    def update_extract_status(self, extracts, extract_status, check_dependencies=True):
+        """
+        Given a set of extracts, update the extract records to the status and associate them with their process run
+        with that status.  Extract trackers are associated with their own process run and extract references with this
+        one; missing extract process records are created.  Dependencies are checked for the whole set with one query
+        and each table is updated with set based statements keyed by extract id, instead of changing the extracts one at
+        a time.
+        :param extracts: List of ExtractTracker or ExtractReference objects to be bulk updated.
+        :param extract_status: The status to change the extract files to.
+        :type extract_status: str
+        :param check_dependencies: Check that extracts being set to 'loading' have no unloaded dependencies.  Only
+                                   skipped if the caller already checked.
+        :type check_dependencies: bool
+        :return:
+        """
+        extract_status_types = self.data_store.get_lookup_names(model=ExtractStatus)
+
+        if extract_status not in extract_status_types:
+            error_msg = (
+                "%s is not a valid extract status type.  "
+                "Please add the status to extract_status_lkup" % extract_status
+            )
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+
+        status_id = extract_status_types[extract_status]
+        status_date = datetime.now()
+
+        process_tracking_ids = dict()
+
+        for extract in extracts:
+            if isinstance(extract, ExtractTracker):
+                process_tracking_ids[
+                    extract.extract.extract_id
+                ] = extract.process_run.process_tracking_run.process_tracking_id
+            else:
+                process_tracking_ids[
+                    extract.extract_id
+                ] = self.process_tracking_run.process_tracking_id
+
+        extract_ids = list(process_tracking_ids)
+
+        if extract_status == "loading" and check_dependencies:
+            blocked_ids = self.determine_blocked_extracts(extract_ids=extract_ids)
+
+            if blocked_ids:
+                error_msg = (
+                    "Extract files that extracts %s are dependent on have not been loaded, are being created, or are "
+                    "in the process of loading." % sorted(blocked_ids)
+                )
+                self.logger.error(error_msg)
+                raise Exception(error_msg)
+
+        self.logger.info(
+            "Setting %s extracts' status to %s" % (len(extract_ids), extract_status)
+        )
+
+        # Extracts not yet associated with their process run get an extract process record, like change_extract_status
+        # of an extract tracker keeps.
+        self.data_store.insert_ignore_duplicates(
+            model=ExtractProcess,
+            rows=[
+                {
+                    "extract_tracking_id": extract_id,
+                    "process_tracking_id": process_tracking_id,
+                    "extract_process_status_id": status_id,
+                    "extract_process_event_date_time": status_date,
+                }
+                for extract_id, process_tracking_id in process_tracking_ids.items()
+            ],
+            key_fields=["extract_tracking_id", "process_tracking_id"],
+        )
+
+        run_extract_ids = dict()
+
+        for extract_id, process_tracking_id in process_tracking_ids.items():
+            run_extract_ids.setdefault(process_tracking_id, list()).append(extract_id)
+
+        for offset in range(0, len(extract_ids), bulk_chunk_size):
+            chunk = extract_ids[offset : offset + bulk_chunk_size]
+
+            self.session.query(Extract).filter(Extract.extract_id.in_(chunk)).update(
+                {Extract.extract_status_id: status_id}, synchronize_session=False
+            )
+
+        for process_tracking_id, run_ids in run_extract_ids.items():
+            for offset in range(0, len(run_ids), bulk_chunk_size):
+                chunk = run_ids[offset : offset + bulk_chunk_size]
+
+                self.session.query(ExtractProcess).filter(
+                    ExtractProcess.process_tracking_id == process_tracking_id
+                ).filter(ExtractProcess.extract_tracking_id.in_(chunk)).update(
+                    {
+                        ExtractProcess.extract_process_status_id: status_id,
+                        ExtractProcess.extract_process_event_date_time: status_date,
+                    },
+                    synchronize_session=False,
+                )
+
+        self.data_store.commit()
+
+        # The updates bypass the session, so the records held by extract trackers are brought in line here.
+        for extract in extracts:
+            if isinstance(extract, ExtractTracker):
+                set_committed_value(extract.extract, "extract_status_id", status_id)
+
+                if (
+                    extract.extract_process is not None
+                    and extract.extract_process.process_tracking_id
+                    == process_tracking_ids[extract.extract.extract_id]
+                ):
+                    set_committed_value(
+                        extract.extract_process, "extract_process_status_id", status_id
+                    )
+                    set_committed_value(
+                        extract.extract_process,
+                        "extract_process_event_date_time",
+                        status_date,
+                    )
+
+    def update_process_run_state(self, process_run, failure_count):
+        """
+        Point the process run state at a newly registered run of the process, creating the state if the process does
+        not have one yet.
+        :param process_run: The new process run.
+        :type process_run: ProcessTracking SQLAlchemy object
+        :param failure_count: The number of runs that failed in a row before the new run.
+        :type failure_count: int
+        :return:
+        """
+        state = self.session.query(ProcessRunState).get(self.process.process_id)
+
+        if state is None:
+            state = ProcessRunState(process_id=self.process.process_id)
+            self.session.add(state)
+
+        state.process_runs = process_run
+        state.process_run_id = process_run.process_run_id
+        state.process_status_id = process_run.process_status_id
+        state.consecutive_failure_count = failure_count or 0
@@ -0,0 +1,152 @@
+# References
+# Lightweight, read only references to tracking records, for when the full SQLAlchemy objects are not needed.
+from pathlib import Path
+
+from process_tracker.extract_tracker import ExtractTracker
+
+
+class SourceReference:
+
+    __slots__ = (
+        "granularity",
+        "source_id",
+        "source_name",
+        "source_object_id",
+        "source_object_name",
+        "source_object_attribute_id",
+        "source_object_attribute_name",
+    )
+
+    def __init__(
+        self,
+        granularity,
+        source_id,
+        source_name,
+        source_object_id=None,
+        source_object_name=None,
+        source_object_attribute_id=None,
+        source_object_attribute_name=None,
+    ):
+        """
+        Reference to a source, source object or source object attribute used by a process.  Not attached to a data store
+        session, so it can be kept and passed around freely.
+        :param granularity: Either 'source', 'source_object' or 'source_object_attribute'.
+        :type granularity: str
+        :param source_id: The source's id.
+        :type source_id: int
+        :param source_name: The source's name.
+        :type source_name: str
+        :param source_object_id: The source object's id, if at least object granularity.
+        :type source_object_id: int
+        :param source_object_name: The source object's name, if at least object granularity.
+        :type source_object_name: str
+        :param source_object_attribute_id: The attribute's id, if attribute granularity.
+        :type source_object_attribute_id: int
+        :param source_object_attribute_name: The attribute's name, if attribute granularity.
+        :type source_object_attribute_name: str
+        """
+        self.granularity = granularity
+        self.source_id = source_id
+        self.source_name = source_name
+        self.source_object_id = source_object_id
+        self.source_object_name = source_object_name
+        self.source_object_attribute_id = source_object_attribute_id
+        self.source_object_attribute_name = source_object_attribute_name
+
+    def __eq__(self, other):
+
+        if not isinstance(other, SourceReference):
+            return NotImplemented
+
+        return all(
+            getattr(self, slot) == getattr(other, slot) for slot in self.__slots__
+        )
+
+    def __hash__(self):
+
+        return hash(tuple(getattr(self, slot) for slot in self.__slots__))
+
+    def __repr__(self):
+
+        return (
+            "<SourceReference (granularity=%s, source=%s, object=%s, attribute=%s)>"
+            % (
+                self.granularity,
+                self.source_name,
+                self.source_object_name,
+                self.source_object_attribute_name,
+            )
+        )
+
+
+class ExtractReference:
+
+    __slots__ = (
+        "extract_id",
+        "extract_filename",
+        "extract_status_name",
+        "location_id",
+        "location_path",
+    )
+
+    def __init__(
+        self,
+        extract_id,
+        extract_filename,
+        extract_status_name,
+        location_id,
+        location_path,
+    ):
+        """
+        Reference to a registered extract.  Not attached to a data store session, so thousands of them can be kept
+        without holding on to SQLAlchemy objects.
+        :param extract_id: The extract's id.
+        :type extract_id: int
+        :param extract_filename: The extract's filename.
+        :type extract_filename: str
+        :param extract_status_name: The extract's status when the reference was made.
+        :type extract_status_name: str
+        :param location_id: The id of the extract's location.
+        :type location_id: int
+        :param location_path: The path of the extract's location.
+        :type location_path: str
+        """
+        self.extract_id = extract_id
+        self.extract_filename = extract_filename
+        self.extract_status_name = extract_status_name
+        self.location_id = location_id
+        self.location_path = location_path
+
+    def __eq__(self, other):
+
+        if not isinstance(other, ExtractReference):
+            return NotImplemented
+
+        return all(
+            getattr(self, slot) == getattr(other, slot) for slot in self.__slots__
+        )
+
+    def __hash__(self):
+
+        return hash(tuple(getattr(self, slot) for slot in self.__slots__))
+
+    def __repr__(self):
+
+        return "<ExtractReference (id=%s, filename=%s, status=%s)>" % (
+            self.extract_id,
+            self.extract_filename,
+            self.extract_status_name,
+        )
+
+    def extract_tracker(self, process_run):
+        """
+        Build the full extract tracker for the extract, to work with it through the process run.
+        :param process_run: The process run working with the extract.
+        :type process_run: ProcessTracker object
+        :return: ExtractTracker object
+        """
+        return ExtractTracker(process_run=process_run, extract_id=self.extract_id)
+
+    def full_filepath(self):
+
+        return str(Path(self.location_path).joinpath(self.extract_filename))
@@ -0,0 +1,98 @@
+# Async Data Store
+# Asyncio interface to the data store, for use from event loop based orchestration.
+
+import asyncio
+import functools
+
+from process_tracker.utilities.data_store import DataStore
+
+
+class AsyncDataStore:
+    def __init__(self, data_store=None, config_location=None, executor=None):
+        """
+        Asyncio wrapper around a DataStore.  Data store calls are run in a worker thread so they do not block the event
+        loop.  Calls are serialized per data store, as its session must not be used by several threads at once; use one
+        data store (i.e. one tracker) per pipeline to run pipelines concurrently.  Concurrency across data stores is
+        bound by the executor and by the engine's pool settings (data_store_pool_size, data_store_max_overflow).
+        :param data_store: The DataStore to wrap.  If not provided, a new one is created.
+        :type data_store: DataStore
+        :param config_location: Location where Process Tracker configuration file is, if creating a new DataStore.
+        :type config_location: file path
+        :param executor: Optional executor to run data store calls in.  Default is the event loop's default executor.
+        :type executor: concurrent.futures.Executor
+        """
+        if data_store is None:
+            data_store = DataStore(config_location=config_location)
+
+        self.data_store = data_store
+        self.executor = executor
+
+        # Created on first use so that it belongs to the running event loop.
+        self.lock = None
+
+    async def close(self):
+        """
+        Close the data store session.
+        :return:
+        """
+        return await self.run(self.data_store.close)
+
+    async def commit(self):
+        """
+        Commit the data store session.
+        :return:
+        """
+        return await self.run(self.data_store.commit)
+
+    async def get_or_create_item(self, model, create=True, **kwargs):
+        """
+        Async version of DataStore.get_or_create_item.
+        :param model: The model entity type.
+        :type model: SQLAlchemy Model instance
+        :param create: If the entity instance does not exist, do we need to create or not?  Default is to create.
+        :type create: Boolean
+        :param kwargs: The filter criteria required to find the specific entity instance.
+        :return:
+        """
+        return await self.run(
+            self.data_store.get_or_create_item, model=model, create=create, **kwargs
+        )
+
+    async def get_or_create_many(self, model, rows, key_fields, create=True):
+        """
+        Async version of DataStore.get_or_create_many.
+        :param model: The model entity type.
+        :type model: SQLAlchemy Model instance
+        :param rows: The column values for each entity instance that should exist.
+        :type rows: list of dicts
+        :param key_fields: The columns that uniquely identify an entity instance.
+        :type key_fields: list
+        :param create: If an entity instance does not exist, do we need to create or not?  Default is to create.
+        :type create: Boolean
+        :return: List of entity instances, in the same order as rows.
+        """
+        return await self.run(
+            self.data_store.get_or_create_many,
+            model=model,
+            rows=rows,
+            key_fields=key_fields,
+            create=create,
+        )
+
+    async def run(self, function, *args, **kwargs):
+        """
+        Run a blocking call that uses this data store in a worker thread, one call at a time.
+        :param function: The blocking function or method to call.
+        :param args: Positional arguments for the call.
+        :param kwargs: Keyword arguments for the call.
+        :return: The result of the call.
+        """
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+
+        loop = asyncio.get_event_loop()
+
+        async with self.lock:
+            return await loop.run_in_executor(
+                self.executor, functools.partial(function, *args, **kwargs)
+            )
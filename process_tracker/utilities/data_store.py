@@ -1,11 +1,42 @@
+from contextlib import contextmanager
+import hashlib
 import logging
+from pathlib import Path
+import sqlite3
+import tempfile
+import threading
+import time
 
 from click import ClickException
 
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import (
+    create_engine,
+    event,
+    func,
+    inspect,
+    MetaData,
+    select,
+    Sequence,
+    text,
+)
+from sqlalchemy.dialects import mysql, postgresql
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import make_transient_to_detached, sessionmaker
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy_utils import database_exists
 
+from process_tracker.exceptions import ProcessRunLockError
+from process_tracker.utilities.dependency_closure import (
+    add_dependency_paths,
+    rebuild_dependency_closure,
+)
+from process_tracker.utilities.filename_tokens import (
+    add_filename_tokens,
+    rebuild_filename_tokens,
+)
+from process_tracker.utilities.lookup_cache import LookupCache
+from process_tracker.utilities.process_run_state import determine_missing_run_states
+from process_tracker.utilities.query_stats import QueryStats
 from process_tracker.utilities.settings import SettingsManager
 from process_tracker.utilities.utilities import decrypt_password
 
@@ -13,21 +44,32 @@ from process_tracker.models.model_base import Base
 from process_tracker.models.actor import Actor
 from process_tracker.models.capacity import Cluster, ClusterProcess
 from process_tracker.models.contact import Contact
-from process_tracker.models.extract import ExtractStatus
+from process_tracker.models.extract import (
+    Extract,
+    ExtractCompressionType,
+    ExtractFileType,
+    ExtractStatus,
+    FileSizeType,
+    LocationType,
+)
 from process_tracker.models.process import (
+    DependencyType,
     ErrorType,
     Process,
     ProcessDependency,
+    ProcessRunState,
     ProcessTracking,
     ProcessType,
     ProcessStatus,
 )
 from process_tracker.models.schedule import ScheduleFrequency
-from process_tracker.models.source import FilterType, Source
+from process_tracker.models.source import FilterType, Source, SourceType
 from process_tracker.models.system import System
 from process_tracker.models.tool import Tool
 
+preload_dependency_types = ["Undefined", "Hard", "Soft"]
 preload_error_types = ["File Error", "Data Error", "Process Error"]
+preload_extract_compression_types = ["zip"]
 preload_extract_status_types = [
     "initializing",
     "ready",
@@ -37,6 +79,21 @@ preload_extract_status_types = [
     "deleted",
     "error",
 ]
+preload_extract_filetypes = [
+    {
+        "code": "csv",
+        "name": "Comma Separated Values",
+        "delimiter": ",",
+        "quote": '"',
+        "escape": "/",
+    }
+]
+preload_filesize_types = [
+    {"code": "KB", "name": "kilobytes"},
+    {"code": "MB", "name": "megabytes"},
+    {"code": "GB", "name": "gigabytes"},
+    {"code": "B ", "name": "bytes"},
+]
 preload_filter_types = [
     {"code": "eq", "name": "equal to"},
     {"code": "lt", "name": "less than"},
@@ -58,9 +115,102 @@ preload_schedule_frequencies = [
     "quarterly",
     "annually",
 ]
-preload_system_keys = [{"version", "0.7.0"}]
+preload_source_types = ["Undefined", "Database", "Internal", "External"]
+preload_system_keys = [("version", "0.7.0")]
+
+# Maximum number of keys sent in a single IN list by the bulk helpers.
+bulk_chunk_size = 1000
+
+supported_data_stores = [
+    "postgresql",
+    "mysql",
+    "oracle",
+    "mssql",
+    "snowflake",
+    "sqlite",
+]
 
-supported_data_stores = ["postgresql", "mysql", "oracle", "mssql", "snowflake"]
+# Data stores that run in process and do not need a server connection.
+embedded_data_stores = ["sqlite"]
+
+# Data stores that can skip rows locked by other transactions with SELECT ... FOR UPDATE SKIP LOCKED.  MySQL only can
+# from 8.0, and 5.7 is still supported.
+skip_locked_data_stores = ["postgresql"]
+
+# Applied to every SQLite connection.  WAL lets readers work alongside the writer, and a NORMAL sync is still safe in
+# WAL mode.
+sqlite_pragmas = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=30000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+]
+
+# Statements that start a SQLite write transaction.  Reads run outside of a transaction so they always see the latest
+# committed data; see configure_sqlite_engine.
+sqlite_write_statements = [
+    "ALTER",
+    "CREATE",
+    "DELETE",
+    "DROP",
+    "INSERT",
+    "REPLACE",
+    "SAVEPOINT",
+    "UPDATE",
+]
+
+# Small lookup tables that are cached in process, with the columns they can be looked up by.  The first column is the
+# name column used for name to id mappings.
+lookup_models = {
+    Actor: ["actor_name"],
+    ErrorType: ["error_type_name"],
+    ExtractCompressionType: ["extract_compression_type"],
+    ExtractFileType: ["extract_filetype", "extract_filetype_code"],
+    ExtractStatus: ["extract_status_name"],
+    FilterType: ["filter_type_code", "filter_type_name"],
+    LocationType: ["location_type_name"],
+    ProcessStatus: ["process_status_name"],
+    ProcessType: ["process_type_name"],
+    ScheduleFrequency: ["schedule_frequency_name"],
+    Tool: ["tool_name"],
+}
+
+# CLI topics that write to cached lookup tables.
+topic_lookup_models = {
+    "actor": Actor,
+    "error type": ErrorType,
+    "extract status": ExtractStatus,
+    "process status": ProcessStatus,
+    "process type": ProcessType,
+    "tool": Tool,
+}
+
+# Shared by every DataStore in the process.
+query_stats = QueryStats()
+
+# Lookup caches shared by every DataStore in the process connecting to the same data store, keyed by connection url, so
+# data stores connected to different databases never see each other's records.
+lookup_cache_registry = dict()
+
+# Engines shared by every DataStore in the process, keyed by connection url.
+engine_registry = dict()
+engine_registry_lock = threading.Lock()
+
+# Connection urls of data stores already verified to exist by this process.
+verified_data_stores = set()
+
+# Key space of the PostgreSQL advisory locks taken on processes, so they do not collide with other advisory locks taken
+# on the same database.
+process_lock_space = 7301
+
+# Filename search indexes that only PostgreSQL supports, with their definition on extract_tracking.  They serve prefix,
+# suffix and contains filename matches.  The trigram index needs the pg_trgm extension.
+postgresql_filename_search_indexes = {
+    "extract_tracking_idx03": "(extract_filename text_pattern_ops)",
+    "extract_tracking_idx04": "(reverse(extract_filename) text_pattern_ops)",
+    "extract_tracking_idx05": "using gin (extract_filename gin_trgm_ops)",
+}
 
 
 class DataStore:
@@ -78,15 +228,381 @@ class DataStore:
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(log_level)
 
+        # Unit of work state for batch().  While a batch is active, commits are deferred.
+        self.batch_depth = 0
+        self.batch_size = None
+        self.batch_pending = 0
+        self.batch_close = False
+
+        # The session, and with it the data store connection, is only opened on first use.  See session.
+        self.data_store_session = None
+
         data_store = self.verify_and_connect_to_data_store()
         self.engine = data_store["engine"]
         self.meta = data_store["meta"]
-        self.session = data_store["session"]
         self.data_store_type = data_store["data_store_type"]
         self.data_store_host = data_store["data_store_host"]
         self.data_store_port = data_store["data_store_port"]
         self.data_store_name = data_store["data_store_name"]
 
+        self.lookup_cache = self.get_lookup_cache(connection_url=str(self.engine.url))
+        self.lookup_cache.configure(
+            max_entries=int(self.config["DEFAULT"].get("lookup_cache_size", 1000)),
+            ttl=int(self.config["DEFAULT"].get("lookup_cache_ttl", 300)),
+        )
+
+        # Optional read replica for read only queries.  See read_session.
+        self.replica_engine = None
+        self.replica_session = None
+        self.primary_read_depth = 0
+
+        if self.config.has_section("replica"):
+            self.configure_replica()
+
+        self.query_stats = query_stats
+
+        if self.config["DEFAULT"].getboolean("data_store_stats", fallback=False):
+            self.enable_stats(
+                stats_file=self.config["DEFAULT"].get("data_store_stats_file")
+            )
+
+    @property
+    def session(self):
+        """
+        The data store session.  Opened on first use, after verifying that the data store exists.
+        :return: SQLAlchemy session
+        """
+        if self.data_store_session is None:
+            self.verify_data_store_exists()
+
+            session = sessionmaker(bind=self.engine)
+
+            session = session(expire_on_commit=False)
+
+            if self.data_store_type == "postgresql":
+                session.execute("SET search_path TO %s" % self.data_store_name)
+            elif self.data_store_type == "mysql":
+                session.execute("USE %s" % self.data_store_name)
+
+            self.data_store_session = session
+
+        return self.data_store_session
+
+    @property
+    def read_session(self):
+        """
+        The session used by read only queries.  If a replica is configured, reads go to the replica, except within a
+        batch or read_from_primary block, so those reads see this data store's own writes.
+        :return: SQLAlchemy session
+        """
+        if (
+            self.replica_engine is None
+            or self.batch_depth > 0
+            or self.primary_read_depth > 0
+        ):
+            return self.session
+
+        if self.replica_session is None:
+            # Each query runs in its own transaction so that polling always sees the latest replicated data.  The
+            # models are schema qualified, so no search path is needed.
+            session = sessionmaker(bind=self.replica_engine, autocommit=True)
+
+            self.replica_session = session(expire_on_commit=False)
+
+        return self.replica_session
+
+    @contextmanager
+    def batch(self, size=None, commit_on_error=False):
+        """
+        Unit of work mode.  Within the block, commits requested by tracking calls are deferred and all pending writes are
+        committed in one transaction when the block exits, or every 'size' writes if size is provided.  New records are
+        still flushed so that their keys are available and reads within the block see the pending writes.  If the block
+        raises, pending writes are rolled back and the error is raised again, unless commit_on_error is set, in which
+        case they are committed first so tracking records (i.e. errors, failed status) are not lost.  Batches can be
+        nested; only the outermost batch commits.
+        :param size: Optional maximum number of deferred writes before committing.
+        :type size: int
+        :param commit_on_error: Commit pending writes even if the block raises.  Default is to roll them back.
+        :type commit_on_error: bool
+        :return:
+        """
+        outermost = self.batch_depth == 0
+
+        self.batch_depth += 1
+
+        if outermost:
+            self.batch_size = size
+            self.batch_pending = 0
+            self.batch_close = False
+
+        try:
+            yield self
+        except BaseException:
+            self.batch_depth -= 1
+
+            if outermost:
+                try:
+                    if commit_on_error:
+                        self.logger.debug(
+                            "Batch failed.  Committing %s pending writes."
+                            % self.batch_pending
+                        )
+                        try:
+                            self.session.commit()
+                        except Exception as e:
+                            # Keep the original error; the session may already have been in a failed state.
+                            self.logger.error(
+                                "Unable to commit pending writes of failed batch.  %s"
+                                % e
+                            )
+                            self.session.rollback()
+                    else:
+                        self.logger.debug(
+                            "Batch failed.  Rolling back %s pending writes."
+                            % self.batch_pending
+                        )
+                        self.session.rollback()
+                finally:
+                    self.end_batch()
+
+            raise
+        else:
+            self.batch_depth -= 1
+
+            if outermost:
+                self.logger.debug(
+                    "Batch finished.  Committing %s pending writes."
+                    % self.batch_pending
+                )
+                try:
+                    self.session.commit()
+                except Exception:
+                    self.session.rollback()
+                    raise
+                finally:
+                    self.end_batch()
+
+    def cache_lookup_item(self, model, instance, **kwargs):
+        """
+        If the model is a cached lookup table, add the entity instance to the lookup cache along with the filter
+        criteria it was found with.
+        :param model: The model entity type.
+        :type model: SQLAlchemy Model instance
+        :param instance: The entity instance to cache.
+        :param kwargs: The filter criteria used to find the entity instance.
+        :return:
+        """
+        lookup_field = self.determine_lookup_field(model=model, **kwargs)
+
+        if lookup_field is None:
+            return
+
+        table_name = model.__tablename__
+        primary_key = inspect(model).primary_key[0].key
+
+        row = {
+            attribute.key: getattr(instance, attribute.key)
+            for attribute in inspect(model).column_attrs
+        }
+
+        self.lookup_cache.set((table_name, primary_key, row[primary_key]), row)
+
+        if lookup_field != primary_key:
+            self.lookup_cache.set(
+                (table_name, lookup_field, kwargs[lookup_field]), row[primary_key]
+            )
+
+    def close(self):
+        """
+        Close the session.  If a batch is active, the session is closed once the batch has committed.
+        :return:
+        """
+        if self.batch_depth > 0:
+            self.batch_close = True
+        else:
+            self.session.close()
+
+        if self.replica_session is not None:
+            self.replica_session.close()
+
+    def commit(self, force=False):
+        """
+        Commit the session.  If a batch is active the commit is deferred until the batch ends or its size is reached;
+        new records are flushed instead so their keys are available.
+        :param force: Commit even if a batch is active, i.e. so other workers see the writes straight away.  Pending
+                      writes of the batch are committed with them.
+        :type force: bool
+        :return:
+        """
+        if self.batch_depth == 0:
+            self.session.commit()
+            return
+
+        if force:
+            self.logger.debug(
+                "Forced commit within batch.  Committing %s pending writes."
+                % (self.batch_pending + 1)
+            )
+            self.session.commit()
+            self.batch_pending = 0
+            return
+
+        self.batch_pending += 1
+
+        if self.batch_size is not None and self.batch_pending >= self.batch_size:
+            self.logger.debug(
+                "Batch size reached.  Committing %s pending writes."
+                % self.batch_pending
+            )
+            self.session.commit()
+            self.batch_pending = 0
+
+        elif self.session.new:
+            self.session.flush()
+
+    def configure_replica(self):
+        """
+        Create the engine for the read replica set up in the [replica] section of the config file.  Settings not in the
+        section (i.e. data_store_type, data_store_username) are taken from DEFAULT, so usually only data_store_host needs
+        to be set.
+        :return:
+        """
+        replica = self.verify_and_connect_to_data_store(config_section="replica")
+
+        self.logger.info(
+            "Routing read only queries to replica at %s:%s"
+            % (replica["data_store_host"], replica["data_store_port"])
+        )
+
+        self.replica_engine = replica["engine"]
+
+    def configure_sqlite_engine(self, engine):
+        """
+        Prepare a SQLite engine for use as a data store.  Every connection gets the tuned pragmas and the process_tracker
+        schema is translated to the main database since SQLite has no schemas.  Reads run outside of a transaction, so
+        a session that only reads never pins an old WAL snapshot and always sees the latest committed data.  The first
+        write (or savepoint) begins the transaction with BEGIN IMMEDIATE, taking the write lock up front so that it
+        waits on busy_timeout for other writers instead of failing on a snapshot that went stale.
+        :param engine: The SQLite engine.
+        :type engine: SQLAlchemy engine
+        :return: SQLAlchemy engine
+        """
+
+        @event.listens_for(engine, "connect")
+        def connect(dbapi_connection, connection_record):
+            # Stop pysqlite from managing transactions itself; they are begun below instead.
+            dbapi_connection.isolation_level = None
+
+            cursor = dbapi_connection.cursor()
+
+            for pragma in sqlite_pragmas:
+                cursor.execute(pragma)
+
+            cursor.close()
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def begin_write(
+            connection, cursor, statement, parameters, context, executemany
+        ):
+            dbapi_connection = cursor.connection
+
+            if (
+                not dbapi_connection.in_transaction
+                and statement.split(None, 1)[0].upper() in sqlite_write_statements
+            ):
+                dbapi_connection.execute("BEGIN IMMEDIATE")
+
+        return engine.execution_options(schema_translate_map={"process_tracker": None})
+
+    def create_missing_indexes(self):
+        """
+        Create the indexes declared on the models that are missing from the data store.  On PostgreSQL they are built
+        concurrently, so the tracking tables stay writable while the indexes build.
+        :return: List of the indexes created.
+        """
+        missing_indexes = self.determine_missing_indexes()
+
+        for index in missing_indexes:
+            self.logger.info(
+                "Creating index %s on %s." % (index.name, index.table.name)
+            )
+
+            if self.data_store_type == "postgresql":
+                statement = str(CreateIndex(index).compile(dialect=self.engine.dialect))
+                statement = statement.replace(
+                    "CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1
+                )
+
+                # Concurrent index builds can not run inside a transaction.
+                with self.engine.connect() as connection:
+                    connection.execution_options(isolation_level="AUTOCOMMIT").execute(
+                        text(statement)
+                    )
+            else:
+                index.create(self.engine)
+
+        return missing_indexes
+
+    def create_filename_search_indexes(self):
+        """
+        Create the PostgreSQL only filename search indexes that are missing from the data store, concurrently so
+        extract_tracking stays writable while they build.  If the pg_trgm extension can not be installed, the trigram
+        index is skipped and contains matches scan extract_tracking.  Other data stores search filenames through the
+        filename token table instead.
+        :return: List of the names of the indexes created.
+        """
+        if self.data_store_type != "postgresql":
+            return list()
+
+        schema_map = self.engine.get_execution_options().get("schema_translate_map", {})
+        schema = schema_map.get("process_tracker", "process_tracker")
+        created_indexes = list()
+
+        # Concurrent index builds can not run inside a transaction.
+        with self.engine.connect() as connection:
+            connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+
+            existing_indexes = set(
+                row[0]
+                for row in connection.execute(
+                    text(
+                        "SELECT indexname FROM pg_indexes WHERE schemaname = :schema "
+                        "AND tablename = 'extract_tracking'"
+                    ),
+                    schema=schema,
+                )
+            )
+
+            for index_name, definition in sorted(
+                postgresql_filename_search_indexes.items()
+            ):
+                if index_name in existing_indexes:
+                    continue
+
+                if "gin_trgm_ops" in definition:
+                    try:
+                        connection.execute(
+                            text("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                        )
+                    except DBAPIError as e:
+                        self.logger.warning(
+                            "Extension pg_trgm could not be installed, skipping index %s.  %s"
+                            % (index_name, e)
+                        )
+                        continue
+
+                self.logger.info("Creating index %s on extract_tracking." % index_name)
+
+                connection.execute(
+                    text(
+                        "CREATE INDEX CONCURRENTLY %s ON %s.extract_tracking %s"
+                        % (index_name, schema, definition)
+                    )
+                )
+                created_indexes.append(index_name)
+
+        return created_indexes
+
     def delete_data_store(self):
         """
         Initializes data store deletion, including wiping of all data within.
@@ -112,6 +628,313 @@ class DataStore:
 
         self.session.query(System.system_value).filter(System.system_key == "version")
 
+    def determine_insert_values(self, model, row):
+        """
+        Convert entity instance values to column values for a Core insert, adding the scalar column defaults of the
+        model that were not provided.  Those are otherwise only applied by the ORM or by Core insert constructs.
+        :param model: The model entity type.
+        :type model: SQLAlchemy Model instance
+        :param row: The entity instance values, keyed by attribute name.
+        :type row: dict
+        :return: The column values, keyed by column name.
+        """
+        values = dict()
+
+        for attribute in inspect(model).column_attrs:
+            column = attribute.columns[0]
+
+            if attribute.key in row:
+                values[column.key] = row[attribute.key]
+            elif not column.primary_key and getattr(column.default, "is_scalar", False):
+                values[column.key] = column.default.arg
+
+        return values
+
+    def determine_lookup_field(self, model, **kwargs):
+        """
+        Determine if the filter criteria can be served by the lookup cache.  Only single column lookups on cached lookup
+        tables, by one of their lookup columns or primary key, are cached.
+        :param model: The model entity type.
+        :type model: SQLAlchemy Model instance
+        :param kwargs: The filter criteria.
+        :return: The column being looked up by, or None if not cacheable.
+        """
+        if model not in lookup_models or len(kwargs) != 1:
+            return None
+
+        lookup_field = next(iter(kwargs))
+
+        if (
+            lookup_field in lookup_models[model]
+            or lookup_field == inspect(model).primary_key[0].key
+        ):
+            return lookup_field
+
+        return None
+
+    def determine_missing_indexes(self):
+        """
+        Compare the indexes declared on the models to the ones in the data store.  An index is only missing if no
+        existing index, or primary key, starts with the same columns.  Tables that do not exist yet are skipped.
+        :return: List of the missing SQLAlchemy Index objects.
+        """
+        inspector = inspect(self.engine)
+        schema_map = self.engine.get_execution_options().get("schema_translate_map", {})
+        missing_indexes = []
+
+        for table in Base.metadata.sorted_tables:
+            if not table.indexes:
+                continue
+
+            schema = schema_map.get(table.schema, table.schema)
+
+            if table.name not in inspector.get_table_names(schema=schema):
+                self.logger.warning(
+                    "Table %s does not exist.  Its indexes will not be checked."
+                    % table.name
+                )
+                continue
+
+            existing_columns = [
+                index["column_names"]
+                for index in inspector.get_indexes(table.name, schema=schema)
+            ]
+            existing_columns.append(
+                inspector.get_pk_constraint(table.name, schema=schema)[
+                    "constrained_columns"
+                ]
+            )
+
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                columns = [column.name for column in index.columns]
+
+                if not any(
+                    existing[: len(columns)] == columns for existing in existing_columns
+                ):
+                    self.logger.info(
+                        "Index %s on %s is missing." % (index.name, table.name)
+                    )
+                    missing_indexes.append(index)
+
+        return missing_indexes
+
+    def determine_pool_settings(self):
+        """
+        Read the connection pool settings from the config file.  Only the settings that are present are passed on, so
+        the dialect defaults apply otherwise.  Valid settings:  data_store_pool_size, data_store_max_overflow,
+        data_store_pool_pre_ping, data_store_pool_recycle.
+        :return: Dictionary of create_engine keyword arguments.
+        """
+        config = self.config["DEFAULT"]
+        pool_settings = dict()
+
+        if config.get("data_store_pool_size") is not None:
+            pool_settings["pool_size"] = config.getint("data_store_pool_size")
+
+        if config.get("data_store_max_overflow") is not None:
+            pool_settings["max_overflow"] = config.getint("data_store_max_overflow")
+
+        if config.get("data_store_pool_pre_ping") is not None:
+            pool_settings["pool_pre_ping"] = config.getboolean(
+                "data_store_pool_pre_ping"
+            )
+
+        if config.get("data_store_pool_recycle") is not None:
+            pool_settings["pool_recycle"] = config.getint("data_store_pool_recycle")
+
+        return pool_settings
+
+    def enable_stats(self, stats_file=None):
+        """
+        Start collecting query statistics for this data store's engine.  See stats.
+        :param stats_file: Optional path of a JSON file the statistics are written to when the process exits.
+        :type stats_file: str
+        :return:
+        """
+        self.query_stats.attach(engine=self.engine)
+
+        if self.replica_engine is not None:
+            self.query_stats.attach(engine=self.replica_engine)
+
+        if stats_file is not None:
+            self.query_stats.dump_at_exit(file_path=stats_file)
+
+    def end_batch(self):
+        """
+        Reset the unit of work state once the outermost batch has committed or rolled back, closing the session if a
+        close was requested during the batch.
+        :return:
+        """
+        self.batch_size = None
+        self.batch_pending = 0
+
+        if self.batch_close:
+            self.batch_close = False
+            self.session.close()
+
+    def find_items_by_keys(self, model, key_fields, keys):
+        """
+        For the given model, find all entity instances matching the provided keys.  Each key column is filtered with an
+        IN list and the exact key combinations are matched afterwards, which keeps the query portable across data stores
+        that do not support tuple IN comparisons.  The data store may compare values differently than Python does (i.e.
+        case insensitive or trailing space ignoring collations, or values coerced to the column type), so if a record
+        found does not equal any key, the keys left unmatched are looked up one by one and compared by the data store.
+        :param model: The model entity type.
+        :type model: SQLAlchemy Model instance
+        :param key_fields: The columns that make up the key.
+        :type key_fields: list
+        :param keys: The key values to look for, each a tuple ordered like key_fields.
+        :type keys: iterable of tuples
+        :return: Dictionary of key tuple to entity instance.
+        """
+        keys = list(set(keys))
+        instances = dict()
+
+        for offset in range(0, len(keys), bulk_chunk_size):
+            chunk = keys[offset : offset + bulk_chunk_size]
+            chunk_keys = set(chunk)
+            unmatched_found = False
+
+            query = self.session.query(model)
+
+            for position, field in enumerate(key_fields):
+                values = set(key[position] for key in chunk)
+                query = query.filter(getattr(model, field).in_(values))
+
+            for instance in query:
+                key = tuple(getattr(instance, field) for field in key_fields)
+
+                if key in chunk_keys:
+                    instances[key] = instance
+                else:
+                    unmatched_found = True
+
+            if unmatched_found:
+                self.logger.debug(
+                    "Records in %s did not match their keys exactly.  Looking up unmatched keys one by one."
+                    % model.__tablename__
+                )
+
+                for key in chunk_keys.difference(instances):
+                    instance = (
+                        self.session.query(model)
+                        .filter_by(**dict(zip(key_fields, key)))
+                        .first()
+                    )
+
+                    if instance is not None:
+                        instances[key] = instance
+
+        return instances
+
+    def get_cached_lookup_item(self, model, **kwargs):
+        """
+        Try to find a lookup table entity instance in the lookup cache.
+        :param model: The model entity type.
+        :type model: SQLAlchemy Model instance
+        :param kwargs: The filter criteria required to find the specific entity instance.
+        :return: Entity instance attached to this data store's session, or None if not cached.
+        """
+        lookup_field = self.determine_lookup_field(model=model, **kwargs)
+
+        if lookup_field is None:
+            return None
+
+        table_name = model.__tablename__
+        primary_key = inspect(model).primary_key[0].key
+
+        if lookup_field == primary_key:
+            item_id = kwargs[lookup_field]
+        else:
+            item_id = self.lookup_cache.get(
+                (table_name, lookup_field, kwargs[lookup_field])
+            )
+
+        if item_id is None:
+            return None
+
+        row = self.lookup_cache.get((table_name, primary_key, item_id))
+
+        if row is None:
+            return None
+
+        self.logger.debug("Record found in lookup cache for %s." % table_name)
+
+        instance = model(**row)
+        make_transient_to_detached(instance)
+
+        return self.session.merge(instance, load=False)
+
+    def get_engine(self, connection_url):
+        """
+        Get the engine for the given connection url from the process wide engine registry.  The engine, and its
+        connection pool, is only created the first time a data store connects to that url.
+        :param connection_url: The SQLAlchemy connection url of the data store.
+        :type connection_url: str
+        :return: SQLAlchemy engine
+        """
+        with engine_registry_lock:
+            engine = engine_registry.get(connection_url)
+
+            if engine is None:
+                pool_settings = self.determine_pool_settings()
+
+                self.logger.info(
+                    "Creating data store engine with pool settings: %s" % pool_settings
+                )
+
+                engine = create_engine(connection_url, **pool_settings)
+
+                if engine.dialect.name == "sqlite":
+                    engine = self.configure_sqlite_engine(engine=engine)
+
+                engine_registry[connection_url] = engine
+            else:
+                self.logger.debug("Reusing data store engine from engine registry.")
+
+        return engine
+
+    def get_lookup_cache(self, connection_url):
+        """
+        Get the lookup cache for the given connection url from the process wide lookup cache registry.
+        :param connection_url: The SQLAlchemy connection url of the data store.
+        :type connection_url: str
+        :return: LookupCache
+        """
+        with engine_registry_lock:
+            cache = lookup_cache_registry.get(connection_url)
+
+            if cache is None:
+                cache = LookupCache()
+                lookup_cache_registry[connection_url] = cache
+
+        return cache
+
+    def get_lookup_names(self, model):
+        """
+        For the given lookup table, get the mapping of record names to ids, from the lookup cache if possible.
+        :param model: The model entity type.  Must be one of the cached lookup tables.
+        :type model: SQLAlchemy Model instance
+        :return: Dictionary of name to id.
+        """
+        table_name = model.__tablename__
+        names = self.lookup_cache.get((table_name, "names"))
+
+        if names is None:
+            self.logger.debug("Loading %s names into lookup cache." % table_name)
+
+            name_field = getattr(model, lookup_models[model][0])
+            primary_key = inspect(model).primary_key[0]
+
+            names = dict()
+
+            for name, item_id in self.session.query(name_field, primary_key):
+                names[name] = item_id
+
+            self.lookup_cache.set((table_name, "names"), names)
+
+        return dict(names)
+
     def get_or_create_item(self, model, create=True, **kwargs):
         """
         Testing if an entity instance exists or not.  If does, return entity key.  If not, create entity instance
@@ -124,6 +947,11 @@ class DataStore:
         :return:
         """
         self.logger.debug("Attempting to obtain record.")
+        instance = self.get_cached_lookup_item(model=model, **kwargs)
+
+        if instance is not None:
+            return instance
+
         instance = self.session.query(model).filter_by(**kwargs).first()
 
         if instance is None:
@@ -134,17 +962,54 @@ class DataStore:
 
                 self.logger.info("Creating instance.")
 
-                instance = model(**kwargs)
+                # Within a batch, only this record's writes are undone on failure.  The batch's earlier pending writes
+                # are left for batch() to commit or roll back.
+                savepoint = (
+                    self.session.begin_nested() if self.batch_depth > 0 else None
+                )
 
                 try:
+                    instance = self.upsert_item(model=model, **kwargs)
+
+                    if instance is None:
+                        raise Exception(
+                            "The record could not be created and does not match an existing record."
+                        )
+
+                    if model is ProcessDependency:
+                        # Created without the ORM, so the closure's session listener does not see it.
+                        add_dependency_paths(
+                            connection=self.session.connection(),
+                            parent_process_id=instance.parent_process_id,
+                            child_process_id=instance.child_process_id,
+                        )
+                    elif model is Extract:
+                        # Created without the ORM, so the filename tokens' session listener does not see it.
+                        add_filename_tokens(
+                            connection=self.session.connection(),
+                            extracts=[(instance.extract_id, instance.extract_filename)],
+                        )
+
+                    if savepoint is not None:
+                        savepoint.commit()
+
                     self.logger.debug("Committing instance.")
-                    self.session.add(instance)
-                except Exception as e:
-                    self.logger.error(e)
-                try:
-                    self.session.commit()
+                    self.commit()
                 except Exception as e:
-                    self.logger.error(e)
+                    if savepoint is None:
+                        self.session.rollback()
+                    elif savepoint.is_active:
+                        savepoint.rollback()
+
+                    error_msg = "Unable to create record in %s.  %s" % (
+                        model.__tablename__,
+                        e,
+                    )
+                    self.logger.error(error_msg)
+                    raise Exception(error_msg)
+
+                if model in lookup_models:
+                    self.invalidate_lookup_cache(model=model)
             else:
                 raise Exception(
                     "There is no record match in %s ." % model.__tablename__
@@ -152,8 +1017,86 @@ class DataStore:
         else:
             self.logger.info("The instance already exists in %s." % model.__tablename__)
 
+            self.cache_lookup_item(model=model, instance=instance, **kwargs)
+
         return instance
 
+    def get_or_create_many(self, model, rows, key_fields, create=True):
+        """
+        Bulk version of get_or_create_item.  Existing entity instances are found with one keyed IN query per chunk of
+        rows and only the missing ones are inserted, in a single multi-row statement.
+        :param model: The model entity type.
+        :type model: SQLAlchemy Model instance
+        :param rows: The column values for each entity instance that should exist.
+        :type rows: list of dicts
+        :param key_fields: The columns that uniquely identify an entity instance.  Must be present in every row.
+        :type key_fields: list
+        :param create: If an entity instance does not exist, do we need to create or not?  Default is to create.
+        :type create: Boolean
+        :return: List of entity instances, in the same order as rows.
+        """
+        if isinstance(key_fields, str):
+            key_fields = [key_fields]
+
+        rows = list(rows)
+
+        if not rows:
+            return list()
+
+        row_keys = [tuple(row[field] for field in key_fields) for row in rows]
+
+        self.logger.debug(
+            "Attempting to obtain %s records from %s."
+            % (len(row_keys), model.__tablename__)
+        )
+        instances = self.find_items_by_keys(
+            model=model, key_fields=key_fields, keys=row_keys
+        )
+
+        missing_rows = list()
+        missing_keys = set()
+
+        for key, row in zip(row_keys, rows):
+            if key not in instances and key not in missing_keys:
+                missing_keys.add(key)
+                missing_rows.append(row)
+
+        if missing_rows:
+
+            if not create:
+                raise Exception(
+                    "There is no record match in %s ." % model.__tablename__
+                )
+
+            self.logger.info(
+                "Creating %s instances in %s."
+                % (len(missing_rows), model.__tablename__)
+            )
+
+            self.insert_ignore_duplicates(
+                model=model, rows=missing_rows, key_fields=key_fields
+            )
+
+            instances.update(
+                self.find_items_by_keys(
+                    model=model, key_fields=key_fields, keys=missing_keys
+                )
+            )
+
+            self.commit()
+
+            unmatched_keys = missing_keys.difference(instances)
+
+            if unmatched_keys:
+                error_msg = (
+                    "Unable to find records in %s after creating them.  Unmatched keys: %s"
+                    % (model.__tablename__, sorted(unmatched_keys, key=str))
+                )
+                self.logger.error(error_msg)
+                raise Exception(error_msg)
+
+        return [instances[key] for key in row_keys]
+
     def initialize_data_store(self, overwrite=False):
         """
         Only run if data store does not already exist.  Initializes data store creation and populates system defaults.
@@ -173,6 +1116,8 @@ class DataStore:
             except Exception:
                 self.logger.error("Object %s already exists?" % table)
 
+        self.create_filename_search_indexes()
+
         self.logger.info("Setting up application defaults.")
 
         self.logger.info("Adding error types...")
@@ -212,16 +1157,403 @@ class DataStore:
             )
 
         self.logger.info("Adding filter types...")
-        for code, name in preload_filter_types:
-            self.logger.info("Adding %s" % name)
+        for filter_type in preload_filter_types:
+            self.logger.info("Adding %s" % filter_type["name"])
+            self.get_or_create_item(
+                model=FilterType,
+                filter_type_code=filter_type["code"],
+                filter_type_name=filter_type["name"],
+            )
+
+        self.logger.info("Adding source types...")
+        for source_type in preload_source_types:
+            self.logger.info("Adding %s" % source_type)
+            self.get_or_create_item(model=SourceType, source_type_name=source_type)
+
+        self.logger.info("Adding dependency types...")
+        for dependency_type in preload_dependency_types:
+            self.logger.info("Adding %s" % dependency_type)
+            self.get_or_create_item(
+                model=DependencyType, dependency_type_name=dependency_type
+            )
+
+        self.logger.info("Adding filesize types...")
+        for filesize_type in preload_filesize_types:
+            self.logger.info("Adding %s" % filesize_type["name"])
             self.get_or_create_item(
-                model=FilterType, filter_type_code=code, filter_type_name=name
+                model=FileSizeType,
+                filesize_type_code=filesize_type["code"],
+                filesize_type_name=filesize_type["name"],
+            )
+
+        self.logger.info("Adding extract compression types...")
+        for compression_type in preload_extract_compression_types:
+            self.logger.info("Adding %s" % compression_type)
+            self.get_or_create_item(
+                model=ExtractCompressionType, extract_compression_type=compression_type
+            )
+
+        self.logger.info("Adding extract filetypes...")
+        for filetype in preload_extract_filetypes:
+            self.logger.info("Adding %s" % filetype["name"])
+            self.get_or_create_item(
+                model=ExtractFileType,
+                extract_filetype_code=filetype["code"],
+                extract_filetype=filetype["name"],
+                delimiter_char=filetype["delimiter"],
+                quote_char=filetype["quote"],
+                escape_char=filetype["escape"],
             )
 
         self.session.commit()
 
         self.logger.debug("Finished the initialization check.")
 
+    def insert_ignore_duplicates(self, model, rows, key_fields):
+        """
+        Insert entity instances, skipping those that already exist, with the data store's native upsert so that
+        concurrent workers inserting the same instances do not fail on unique constraints.  PostgreSQL uses
+        INSERT ... ON CONFLICT DO NOTHING, MySQL uses INSERT ... ON DUPLICATE KEY UPDATE and Oracle, MSSQL and Snowflake
+        use MERGE.  Other data stores insert within a savepoint and fall back to row by row inserts on conflict.
+        :param model: The model entity type.
+        :type model: SQLAlchemy Model instance
+        :param rows: The column values for each entity instance, keyed by attribute name.
+        :type rows: list of dicts
+        :param key_fields: The columns that uniquely identify an entity instance.  Used to match rows with MERGE.
+        :type key_fields: list
+        :return:
+        """
+        table = model.__table__
+        values = [self.determine_insert_values(model=model, row=row) for row in rows]
+
+        if not values:
+            return
+
+        self.logger.debug("Upserting %s instances into %s." % (len(values), table.name))
+
+        if self.data_store_type == "postgresql":
+            self.session.execute(
+                postgresql.insert(table).on_conflict_do_nothing(), values
+            )
+
+        elif self.data_store_type == "mysql":
+            primary_key = inspect(model).primary_key[0]
+
+            self.session.execute(
+                mysql.insert(table).on_duplicate_key_update(
+                    {primary_key.name: primary_key}
+                ),
+                values,
+            )
+
+        elif self.data_store_type in ["oracle", "mssql", "snowflake"]:
+            self.session.execute(
+                self.merge_statement(
+                    table=table, columns=list(values[0]), key_fields=key_fields
+                ),
+                values,
+            )
+
+        else:
+            try:
+                with self.session.begin_nested():
+                    self.session.execute(table.insert(), values)
+            except IntegrityError:
+                self.logger.info(
+                    "Instances already exist in %s.  Inserting row by row." % table.name
+                )
+                for value in values:
+                    try:
+                        with self.session.begin_nested():
+                            self.session.execute(table.insert(), value)
+                    except IntegrityError:
+                        self.logger.debug(
+                            "The instance already exists in %s." % table.name
+                        )
+
+    def invalidate_lookup_cache(self, model=None):
+        """
+        Remove cached lookup records so that they are read from the data store again.
+        :param model: The model entity type to invalidate.  If not provided, the whole lookup cache is cleared.
+        :type model: SQLAlchemy Model instance
+        :return:
+        """
+        if model is None:
+            self.logger.debug("Clearing lookup cache.")
+            self.lookup_cache.invalidate()
+        else:
+            self.logger.debug("Invalidating lookup cache for %s." % model.__tablename__)
+            self.lookup_cache.invalidate(table_name=model.__tablename__)
+
+    def merge_statement(self, table, columns, key_fields):
+        """
+        Build a MERGE statement inserting a row into the table unless a row with the same key values already exists.
+        :param table: The table to merge into.
+        :type table: SQLAlchemy Table
+        :param columns: The column names being inserted, also used as bind parameter names.
+        :type columns: list
+        :param key_fields: The columns matching an existing row.
+        :type key_fields: list
+        :return: The MERGE statement.
+        """
+        source = ", ".join(":%s AS %s" % (column, column) for column in columns)
+
+        if self.data_store_type == "oracle":
+            source = "SELECT %s FROM dual" % source
+        else:
+            source = "SELECT %s" % source
+
+        target = table.fullname
+        insert_columns = list(columns)
+        insert_values = ["source.%s" % column for column in columns]
+
+        for column in table.primary_key.columns:
+            if (
+                column.name not in columns
+                and isinstance(column.default, Sequence)
+                and self.data_store_type != "mssql"
+            ):
+                sequence = column.default.name
+
+                if column.default.schema is not None:
+                    sequence = "%s.%s" % (column.default.schema, sequence)
+
+                insert_columns.append(column.name)
+                insert_values.append("%s.nextval" % sequence)
+
+        if self.data_store_type == "mssql":
+            target = "%s WITH (HOLDLOCK)" % target
+
+        return text(
+            "MERGE INTO %s target USING (%s) source ON (%s) "
+            "WHEN NOT MATCHED THEN INSERT (%s) VALUES (%s)%s"
+            % (
+                target,
+                source,
+                " AND ".join(
+                    "target.%s = source.%s" % (field, field) for field in key_fields
+                ),
+                ", ".join(insert_columns),
+                ", ".join(insert_values),
+                ";" if self.data_store_type == "mssql" else "",
+            )
+        )
+
+    @contextmanager
+    def process_lock(self, process):
+        """
+        Hold a lock on a process for the duration of the block, so only one worker at a time admits a run of it.  If
+        another worker holds the lock, ProcessRunLockError is raised straight away instead of waiting.  The lock is held
+        on its own connection, so it outlasts the session's commits within the block.  PostgreSQL and MySQL use advisory
+        locks and MSSQL an application lock.  Oracle locks the process record and Snowflake, which has no row locks,
+        the process table, so on Snowflake runs of other processes admitted at the same moment are also refused.
+        SQLite locks a lock file kept next to the data store for each process.
+        :param process: The process to lock.
+        :type process: Process SQLAlchemy object
+        :return:
+        """
+        if self.data_store_type == "sqlite":
+            lock_file = "%s.process_%s.lock" % (
+                self.engine.url.database,
+                process.process_id,
+            )
+
+            # SQLite locks whole databases, so each process gets a lock database of its own.
+            connection = sqlite3.connect(lock_file, timeout=0, isolation_level=None)
+
+            try:
+                try:
+                    connection.execute("BEGIN IMMEDIATE")
+                except sqlite3.OperationalError as e:
+                    self.logger.error(
+                        "Unable to lock process %s.  %s" % (process.process_name, e)
+                    )
+                    raise ProcessRunLockError(process_name=process.process_name)
+
+                yield
+            finally:
+                connection.close()
+
+            return
+
+        if self.data_store_type == "postgresql":
+            lock_key = {
+                "lock_space": process_lock_space,
+                "process_id": process.process_id,
+            }
+            lock_statement = text(
+                "SELECT pg_try_advisory_lock(:lock_space, :process_id)"
+            )
+            unlock_statement = text(
+                "SELECT pg_advisory_unlock(:lock_space, :process_id)"
+            )
+
+        elif self.data_store_type == "mysql":
+            lock_key = {"lock_name": "process_tracker.process.%s" % process.process_id}
+            lock_statement = text("SELECT GET_LOCK(:lock_name, 0)")
+            unlock_statement = text("SELECT RELEASE_LOCK(:lock_name)")
+
+        else:
+            # Locks that are released with the transaction holding them.
+            table = Process.__table__
+
+            with self.engine.connect() as connection:
+                if self.data_store_type == "snowflake":
+                    connection.execute("ALTER SESSION SET LOCK_TIMEOUT = 0")
+
+                transaction = connection.begin()
+
+                try:
+                    try:
+                        if self.data_store_type == "mssql":
+                            locked = (
+                                connection.execute(
+                                    text(
+                                        "SET NOCOUNT ON; DECLARE @result int; "
+                                        "EXEC @result = sp_getapplock @Resource = :lock_name, "
+                                        "@LockMode = 'Exclusive', @LockOwner = 'Transaction', @LockTimeout = 0; "
+                                        "SELECT @result"
+                                    ),
+                                    lock_name="process_tracker.process.%s"
+                                    % process.process_id,
+                                ).scalar()
+                                >= 0
+                            )
+
+                        elif self.data_store_type == "snowflake":
+                            connection.execute(
+                                table.update()
+                                .where(table.c.process_id == process.process_id)
+                                .values(update_date_time=table.c.update_date_time)
+                            )
+                            locked = True
+
+                        else:
+                            connection.execute(
+                                select([table.c.process_id])
+                                .where(table.c.process_id == process.process_id)
+                                .with_for_update(nowait=True)
+                            ).fetchall()
+                            locked = True
+
+                    except DBAPIError as e:
+                        self.logger.error(
+                            "Unable to lock process %s.  %s" % (process.process_name, e)
+                        )
+                        locked = False
+
+                    if not locked:
+                        self.logger.error(
+                            "Process %s is locked by another worker."
+                            % process.process_name
+                        )
+                        raise ProcessRunLockError(process_name=process.process_name)
+
+                    yield
+                finally:
+                    transaction.rollback()
+
+                    if self.data_store_type == "snowflake":
+                        connection.execute("ALTER SESSION UNSET LOCK_TIMEOUT")
+
+            return
+
+        with self.engine.connect() as connection:
+            if not connection.execute(lock_statement, **lock_key).scalar():
+                self.logger.error(
+                    "Process %s is locked by another worker." % process.process_name
+                )
+                raise ProcessRunLockError(process_name=process.process_name)
+
+            try:
+                yield
+            finally:
+                connection.execute(unlock_statement, **lock_key)
+
+    @contextmanager
+    def read_from_primary(self):
+        """
+        Within the block, read only queries go to the primary data store instead of the replica.  Use when reading
+        records that were just written, as the replica may not have them yet.
+        :return:
+        """
+        self.primary_read_depth += 1
+
+        try:
+            yield self
+        finally:
+            self.primary_read_depth -= 1
+
+    def rebuild_extract_filename_tokens(self):
+        """
+        Rebuild the extract filename tokens from the extracts.  Extracts registered through the data store keep the
+        tokens up to date; this is only needed for extracts registered before they were kept.
+        :return: The number of extracts tokenized.
+        """
+        self.logger.info("Rebuilding extract filename tokens.")
+
+        extract_count = rebuild_filename_tokens(connection=self.session.connection())
+        self.session.commit()
+
+        self.logger.info("Tokenized %s extract filenames." % extract_count)
+
+        return extract_count
+
+    def rebuild_process_dependency_closure(self):
+        """
+        Rebuild the process dependency closure from the process dependencies.  Dependencies added or deleted through the
+        data store keep the closure up to date; this is only needed for dependencies added before it was kept.
+        :return: The number of ancestor/descendant pairs in the closure.
+        """
+        self.logger.info("Rebuilding process dependency closure.")
+
+        pair_count = rebuild_dependency_closure(connection=self.session.connection())
+        self.session.commit()
+
+        self.logger.info(
+            "Process dependency closure holds %s ancestor/descendant pairs."
+            % pair_count
+        )
+
+        return pair_count
+
+    def rebuild_process_run_state(self, process_ids=None):
+        """
+        Add the run state of processes that have runs but no run state, from their latest run.  Runs registered through
+        the process tracker keep the run state up to date; this is only needed for processes tracked before it was kept.
+        :param process_ids: Only rebuild the run state of these processes.  Default is every process.
+        :type process_ids: list
+        :return: The number of run states added.
+        """
+        self.logger.info("Rebuilding process run state.")
+
+        process_statuses = self.get_lookup_names(model=ProcessStatus)
+
+        run_states = determine_missing_run_states(
+            connection=self.session.connection(),
+            completed_status_id=process_statuses["completed"],
+            failed_status_id=process_statuses["failed"],
+            process_ids=process_ids,
+        )
+
+        # Processes registering a run in the meantime add their own, more recent, run state.
+        self.insert_ignore_duplicates(
+            model=ProcessRunState, rows=run_states, key_fields=["process_id"]
+        )
+        self.commit()
+
+        self.logger.info("Added run state of %s processes." % len(run_states))
+
+        return len(run_states)
+
+    def stats(self):
+        """
+        Query statistics collected since stats were enabled, either through the data_store_stats config setting or
+        enable_stats.  Statements are grouped by the public tracker method (or DataStore method) that issued them.
+        :return: Dictionary of operation name to statement count, total time in seconds and slowest statements.
+        """
+        return self.query_stats.stats()
+
     def topic_creator(
         self,
         topic,
@@ -356,6 +1688,9 @@ class DataStore:
 
             self.logger.error("Invalid topic type.")
 
+        if topic in topic_lookup_models:
+            self.invalidate_lookup_cache(model=topic_lookup_models[topic])
+
         return item
 
     def topic_deleter(self, topic, name, parent=None, child=None, cluster=None):
@@ -490,6 +1825,9 @@ class DataStore:
         if item_delete:
             self.session.commit()
 
+            if topic in topic_lookup_models:
+                self.invalidate_lookup_cache(model=topic_lookup_models[topic])
+
     def topic_updater(
         self,
         topic,
@@ -627,6 +1965,16 @@ class DataStore:
 
                     item.process_status_id = process_status_completed.process_status_id
 
+                    self.session.query(ProcessRunState).filter(
+                        ProcessRunState.process_tracking_id == item.process_tracking_id
+                    ).update(
+                        {
+                            ProcessRunState.process_status_id: process_status_completed.process_status_id,
+                            ProcessRunState.consecutive_failure_count: 0,
+                        },
+                        synchronize_session=False,
+                    )
+
                     self.logger.info(
                         "%s %s updated to finished status." % (topic, name)
                     )
@@ -660,6 +2008,9 @@ class DataStore:
 
             self.session.commit()
 
+            if topic in topic_lookup_models:
+                self.invalidate_lookup_cache(model=topic_lookup_models[topic])
+
         else:
             ClickException("Invalid topic.  Unable to update instance.").show()
             self.logger.error("%s is an invalid topic.  Unable to update." % topic)
@@ -702,35 +2053,104 @@ class DataStore:
             )
             return False
 
-    def verify_and_connect_to_data_store(self):
+    def upsert_item(self, model, **kwargs):
+        """
+        Create an entity instance if it does not exist yet, without failing if a concurrent worker creates it first.
+        On PostgreSQL the instance is created and returned in one round trip.
+        :param model: The model entity type.
+        :type model: SQLAlchemy Model instance
+        :param kwargs: The column values of the entity instance, also used to find it if it already exists.
+        :return: The entity instance.
+        """
+        if self.data_store_type == "postgresql":
+            attributes = inspect(model).column_attrs
+            statement = (
+                postgresql.insert(model.__table__)
+                .values(self.determine_insert_values(model=model, row=kwargs))
+                .on_conflict_do_nothing()
+                .returning(*[attribute.columns[0] for attribute in attributes])
+            )
+
+            row = self.session.execute(statement).first()
+
+            if row is not None:
+                instance = model(
+                    **{
+                        attribute.key: value
+                        for attribute, value in zip(attributes, row)
+                    }
+                )
+                make_transient_to_detached(instance)
+
+                return self.session.merge(instance, load=False)
+
+        elif self.data_store_type == "mysql":
+            # Only a single auto increment key can be read back with LAST_INSERT_ID.  Records keyed by several columns
+            # (i.e. association tables) are found again by their values below.
+            primary_key = model.__table__._autoincrement_column
+
+            if primary_key is None:
+                self.insert_ignore_duplicates(
+                    model=model, rows=[kwargs], key_fields=list(kwargs)
+                )
+            else:
+                statement = (
+                    mysql.insert(model.__table__)
+                    .values(self.determine_insert_values(model=model, row=kwargs))
+                    .on_duplicate_key_update(
+                        {primary_key.name: func.last_insert_id(primary_key)}
+                    )
+                )
+
+                # LAST_INSERT_ID(expr) makes the key of an already existing record available as well.
+                item_id = self.session.execute(statement).lastrowid
+
+                if item_id:
+                    return self.session.query(model).get(item_id)
+
+        else:
+            self.insert_ignore_duplicates(
+                model=model, rows=[kwargs], key_fields=list(kwargs)
+            )
+
+        return self.session.query(model).filter_by(**kwargs).first()
+
+    def verify_and_connect_to_data_store(self, config_section="DEFAULT"):
         """
-        Based on environment variables, create the data store connection engine.
+        Based on environment variables, create the data store connection engine.  No connection is made until the
+        session is first used.
+        :param config_section: The config file section with the data store settings.  Default is 'DEFAULT'.
+        :type config_section: str
         :return:
         """
+        config = self.config[config_section]
 
-        data_store_type = self.config["DEFAULT"]["data_store_type"]
-        data_store_username = self.config["DEFAULT"]["data_store_username"]
-        data_store_password = self.config["DEFAULT"]["data_store_password"]
-        data_store_host = self.config["DEFAULT"]["data_store_host"]
-        data_store_port = self.config["DEFAULT"]["data_store_port"]
-        data_store_name = self.config["DEFAULT"]["data_store_name"]
+        data_store_type = config["data_store_type"]
+        data_store_username = config.get("data_store_username")
+        data_store_password = config.get("data_store_password")
+        data_store_host = config.get("data_store_host")
+        data_store_port = config.get("data_store_port")
+        data_store_name = config["data_store_name"]
 
         errors = []
 
         if data_store_type is None or data_store_type == "None":
             errors.append(Exception("Data store type is not set."))
 
-        if data_store_username is None or data_store_username == "None":
-            errors.append(Exception("Data store username is not set."))
+        # Embedded data stores only need the data store name, which is the path of the data store file.
+        if data_store_type not in embedded_data_stores:
 
-        if data_store_password is None or data_store_password == "None":
-            errors.append(Exception("Data store password is not set"))
+            if data_store_username is None or data_store_username == "None":
+                errors.append(Exception("Data store username is not set."))
 
-        if data_store_host is None or data_store_host == "None":
-            errors.append(Exception("Data store host is not set"))
+            if data_store_password is None or data_store_password == "None":
+                errors.append(Exception("Data store password is not set"))
 
-        if data_store_port is None or data_store_port == "None":
-            errors.append(Exception("Data store port is not set"))
+            if data_store_host is None or data_store_host == "None":
+                errors.append(Exception("Data store host is not set"))
+
+            if data_store_port is None or data_store_port == "None":
+                errors.append(Exception("Data store port is not set"))
 
         if data_store_name is None or data_store_name == "None":
             errors.append(Exception("Data store name is not set"))
@@ -746,7 +2166,7 @@ class DataStore:
 
             raise Exception(errors)
 
-        if "Encrypted" in data_store_password:
+        if data_store_password is not None and "Encrypted" in data_store_password:
             data_store_password = decrypt_password(password=data_store_password)
 
         if data_store_type in supported_data_stores:
@@ -760,7 +2180,7 @@ class DataStore:
                 or data_store_type == "snowflake"
             ):
 
-                engine = create_engine(
+                engine = self.get_engine(
                     data_store_type
                     + "://"
                     + data_store_username
@@ -776,7 +2196,7 @@ class DataStore:
 
             elif data_store_type == "mysql":
 
-                engine = create_engine(
+                engine = self.get_engine(
                     "mysql+pymysql://"
                     + data_store_username
                     + ":"
@@ -790,7 +2210,7 @@ class DataStore:
                 )
             elif data_store_type == "mssql":
 
-                engine = create_engine(
+                engine = self.get_engine(
                     "mssql+pymssql://"
                     + data_store_username
                     + ":"
@@ -803,43 +2223,23 @@ class DataStore:
                     + data_store_name
                 )
 
-            else:
-                self.logger.error("Data store type valid but not configured.")
-                raise Exception("Data store type valid but not configured.")
-
-            self.logger.info(
-                "Attempting to connect to data store %s, found at %s:%s"
-                % (data_store_name, data_store_host, data_store_port)
-            )
-
-            if database_exists(engine.url):
-
-                self.logger.info("Data store exists.  Continuing to work.")
-
-            else:
+            elif data_store_type == "sqlite":
 
-                self.logger.error(
-                    "Data store does not exist.  Please create and try again."
-                )
-                raise Exception(
-                    "Data store does not exist.  Please create and try again."
+                # Sessions are never shared between threads, but may be closed by another thread than the one
+                # that opened them (i.e. AsyncDataStore).
+                engine = self.get_engine(
+                    "sqlite:///" + data_store_name + "?check_same_thread=false"
                 )
 
-            session = sessionmaker(bind=engine)
-
-            session = session(expire_on_commit=False)
-
-            if data_store_type == "postgresql":
-                session.execute("SET search_path TO %s" % data_store_name)
-            elif data_store_type == "mysql":
-                session.execute("USE %s" % data_store_name)
+            else:
+                self.logger.error("Data store type valid but not configured.")
+                raise Exception("Data store type valid but not configured.")
 
             meta = MetaData(schema="process_tracking")
 
             data_store = dict()
             data_store["engine"] = engine
             data_store["meta"] = meta
-            data_store["session"] = session
             data_store["data_store_type"] = data_store_type
             data_store["data_store_host"] = data_store_host
             data_store["data_store_port"] = data_store_port
@@ -853,3 +2253,57 @@ class DataStore:
                 "Invalid data store type provided.  Please use: "
                 + ", ".join(supported_data_stores)
             )
+
+    def verify_data_store_exists(self):
+        """
+        Verify the data store exists before connecting to it.  The check is only run once per process and, if
+        data_store_check_ttl is set (default 300 seconds), its result is cached on disk for that long so short lived
+        jobs do not each run it.
+        :return:
+        """
+        if self.data_store_type in embedded_data_stores:
+            # The data store file is created on first connect.
+            return
+
+        connection_url = str(self.engine.url)
+
+        if connection_url in verified_data_stores:
+            return
+
+        check_ttl = int(self.config["DEFAULT"].get("data_store_check_ttl", 300))
+
+        # Only a hash of the url is written to disk, as the url holds the password.
+        check_file = Path(tempfile.gettempdir()).joinpath(
+            "process_tracker_%s.check"
+            % hashlib.sha256(connection_url.encode("utf-8")).hexdigest()
+        )
+
+        if check_ttl > 0 and check_file.exists():
+            if time.time() - check_file.stat().st_mtime < check_ttl:
+                self.logger.debug("Data store existence check cached on disk.")
+                verified_data_stores.add(connection_url)
+                return
+
+        self.logger.info(
+            "Attempting to connect to data store %s, found at %s:%s"
+            % (self.data_store_name, self.data_store_host, self.data_store_port)
+        )
+
+        if database_exists(self.engine.url):
+
+            self.logger.info("Data store exists.  Continuing to work.")
+
+        else:
+
+            self.logger.error(
+                "Data store does not exist.  Please create and try again."
+            )
+            raise Exception("Data store does not exist.  Please create and try again.")
+
+        verified_data_stores.add(connection_url)
+
+        if check_ttl > 0:
+            try:
+                check_file.touch()
+            except OSError as e:
+                self.logger.debug("Unable to cache data store existence check.  %s" % e)
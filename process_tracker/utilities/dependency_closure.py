@@ -0,0 +1,240 @@
+# Process Dependency Closure
+# Keeps process_dependency_closure, every process each process depends on directly or through other processes, in line
+# with process_dependency so transitive dependencies can be checked with one indexed query.
+
+from sqlalchemy import event, select
+
+from process_tracker.models.process import ProcessDependency, ProcessDependencyClosure
+
+closure = ProcessDependencyClosure.__table__
+dependency = ProcessDependency.__table__
+
+
+def add_dependency_paths(connection, parent_process_id, child_process_id):
+    """
+    Add the ancestors gained through a new process dependency:  the parent and its ancestors become ancestors of the
+    child and of everything depending on the child.  Pairs already in the closure are left alone, so adding the same
+    dependency twice is harmless.
+    :param connection: The connection the dependency was added on.
+    :param parent_process_id: The parent process of the dependency.
+    :type parent_process_id: int
+    :param child_process_id: The child process of the dependency.
+    :type child_process_id: int
+    :return:
+    """
+    ancestor_ids = determine_ancestors(
+        connection=connection, process_ids=[parent_process_id]
+    )[parent_process_id] | {parent_process_id}
+
+    if child_process_id in ancestor_ids:
+        raise Exception(
+            "Process dependency would make process %s dependent on itself."
+            % child_process_id
+        )
+
+    descendant_ids = determine_descendants(
+        connection=connection, process_id=child_process_id
+    ) | {child_process_id}
+
+    existing_paths = set(
+        tuple(row)
+        for row in connection.execute(
+            select([closure.c.ancestor_process_id, closure.c.descendant_process_id])
+            .where(closure.c.ancestor_process_id.in_(ancestor_ids))
+            .where(closure.c.descendant_process_id.in_(descendant_ids))
+        )
+    )
+
+    new_paths = [
+        {"ancestor_process_id": ancestor_id, "descendant_process_id": descendant_id}
+        for ancestor_id in sorted(ancestor_ids)
+        for descendant_id in sorted(descendant_ids)
+        if (ancestor_id, descendant_id) not in existing_paths
+    ]
+
+    if new_paths:
+        connection.execute(closure.insert(), new_paths)
+
+
+def determine_ancestors(connection, process_ids):
+    """
+    Read the ancestors of the given processes from the closure.
+    :param connection: The connection to read the closure with.
+    :param process_ids: The processes to find the ancestors of.
+    :type process_ids: list
+    :return: Dictionary of process_id to the set of its ancestors' process_ids.
+    """
+    ancestors = dict((process_id, set()) for process_id in process_ids)
+
+    for ancestor_id, descendant_id in connection.execute(
+        select([closure.c.ancestor_process_id, closure.c.descendant_process_id]).where(
+            closure.c.descendant_process_id.in_(process_ids)
+        )
+    ):
+        ancestors[descendant_id].add(ancestor_id)
+
+    return ancestors
+
+
+def determine_closure(parents, known_ancestors=None):
+    """
+    Work out the ancestors of every process in parents from the direct dependencies.
+    :param parents: Dictionary of process_id to the process_ids of its direct parents.
+    :type parents: dict
+    :param known_ancestors: Dictionary of process_id to the set of its ancestors, for parents whose ancestors are
+                            already known and that are not in parents themselves.
+    :type known_ancestors: dict
+    :return: Dictionary of process_id to the set of its ancestors' process_ids.
+    """
+    known_ancestors = known_ancestors or dict()
+    ancestors = dict()
+
+    def find_ancestors(process_id, path=()):
+        if process_id in ancestors:
+            return ancestors[process_id]
+
+        if process_id not in parents:
+            return known_ancestors.get(process_id, set())
+
+        if process_id in path:
+            raise Exception(
+                "Process dependencies make process %s dependent on itself." % process_id
+            )
+
+        process_ancestors = set()
+
+        for parent_id in parents[process_id]:
+            process_ancestors.add(parent_id)
+            process_ancestors |= find_ancestors(parent_id, path + (process_id,))
+
+        ancestors[process_id] = process_ancestors
+
+        return process_ancestors
+
+    for process_id in parents:
+        find_ancestors(process_id)
+
+    return ancestors
+
+
+def determine_descendants(connection, process_id):
+    """
+    Read the processes depending on a process, directly or through other processes, from the closure.
+    :param connection: The connection to read the closure with.
+    :param process_id: The process to find the descendants of.
+    :type process_id: int
+    :return: Set of the descendants' process_ids.
+    """
+    return set(
+        row[0]
+        for row in connection.execute(
+            select([closure.c.descendant_process_id]).where(
+                closure.c.ancestor_process_id == process_id
+            )
+        )
+    )
+
+
+def rebuild_dependency_closure(connection):
+    """
+    Rebuild the closure from process_dependency.  Only needed for data stores whose dependencies were added before the
+    closure was kept.
+    :param connection: The connection to rebuild the closure with.
+    :return: The number of ancestor/descendant pairs in the closure.
+    """
+    parents = dict()
+
+    for parent_id, child_id in connection.execute(
+        select([dependency.c.parent_process_id, dependency.c.child_process_id])
+    ):
+        parents.setdefault(child_id, []).append(parent_id)
+
+    rows = [
+        {"ancestor_process_id": ancestor_id, "descendant_process_id": process_id}
+        for process_id, ancestor_ids in sorted(determine_closure(parents).items())
+        for ancestor_id in sorted(ancestor_ids)
+    ]
+
+    connection.execute(closure.delete())
+
+    if rows:
+        connection.execute(closure.insert(), rows)
+
+    return len(rows)
+
+
+def remove_dependency_paths(connection, parent_process_id, child_process_id):
+    """
+    Remove the ancestors lost through a deleted process dependency.  Only the child and the processes depending on it
+    can lose ancestors; theirs are worked out again from the remaining dependencies, so ancestors still reachable
+    another way are kept.
+    :param connection: The connection the dependency was deleted on.
+    :param parent_process_id: The parent process of the deleted dependency.
+    :type parent_process_id: int
+    :param child_process_id: The child process of the deleted dependency.
+    :type child_process_id: int
+    :return:
+    """
+    affected_ids = determine_descendants(
+        connection=connection, process_id=child_process_id
+    ) | {child_process_id}
+
+    parents = dict((process_id, []) for process_id in affected_ids)
+
+    for parent_id, child_id in connection.execute(
+        select([dependency.c.parent_process_id, dependency.c.child_process_id]).where(
+            dependency.c.child_process_id.in_(affected_ids)
+        )
+    ):
+        if (parent_id, child_id) != (parent_process_id, child_process_id):
+            parents[child_id].append(parent_id)
+
+    unaffected_parent_ids = (
+        set(parent_id for parent_ids in parents.values() for parent_id in parent_ids)
+        - affected_ids
+    )
+
+    ancestors = determine_closure(
+        parents=parents,
+        known_ancestors=determine_ancestors(
+            connection=connection, process_ids=list(unaffected_parent_ids)
+        ),
+    )
+
+    for process_id in sorted(affected_ids):
+        statement = closure.delete().where(
+            closure.c.descendant_process_id == process_id
+        )
+
+        if ancestors[process_id]:
+            statement = statement.where(
+                closure.c.ancestor_process_id.notin_(ancestors[process_id])
+            )
+
+        connection.execute(statement)
+
+
+@event.listens_for(ProcessDependency, "after_insert")
+def process_dependency_inserted(mapper, connection, target):
+    """
+    Keep the closure up to date with process dependencies added through a session.
+    :return:
+    """
+    add_dependency_paths(
+        connection=connection,
+        parent_process_id=target.parent_process_id,
+        child_process_id=target.child_process_id,
+    )
+
+
+@event.listens_for(ProcessDependency, "after_delete")
+def process_dependency_deleted(mapper, connection, target):
+    """
+    Keep the closure up to date with process dependencies deleted through a session.
+    :return:
+    """
+    remove_dependency_paths(
+        connection=connection,
+        parent_process_id=target.parent_process_id,
+        child_process_id=target.child_process_id,
+    )
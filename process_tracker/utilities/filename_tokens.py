@@ -0,0 +1,132 @@
+# Filename Tokens
+# Keeps extract_filename_token, the words making up each extract's filename, in line with extract_tracking so filenames
+# can be searched with an index on data stores without trigram indexes.
+
+import re
+
+from sqlalchemy import event, select
+
+from process_tracker.models.extract import Extract, ExtractFilenameToken
+
+extract = Extract.__table__
+filename_token = ExtractFilenameToken.__table__
+
+# Tokens are the runs of letters and digits in the lower cased filename, so 'Sales_2020-01.csv' is sales, 2020, 01, csv.
+filename_token_pattern = re.compile(r"[a-z0-9]+")
+
+# Number of extracts whose tokens are read or written per statement.
+token_chunk_size = 500
+
+
+def add_filename_tokens(connection, extracts):
+    """
+    Add the tokens of the given extracts' filenames.  Extracts that already have their tokens are left alone, so adding
+    the same extracts twice is harmless.  Filenames do not change once registered, so tokens are never updated.
+    :param connection: The connection the extracts were added on.
+    :param extracts: The extracts, each a tuple of extract_id and filename.
+    :type extracts: list of tuples
+    :return:
+    """
+    extracts = list(extracts)
+
+    for offset in range(0, len(extracts), token_chunk_size):
+        chunk = extracts[offset : offset + token_chunk_size]
+
+        tokenized_ids = set(
+            row[0]
+            for row in connection.execute(
+                select([filename_token.c.extract_id])
+                .where(
+                    filename_token.c.extract_id.in_(
+                        [extract_id for extract_id, filename in chunk]
+                    )
+                )
+                .distinct()
+            )
+        )
+
+        rows = [
+            {"filename_token": token, "extract_id": extract_id}
+            for extract_id, filename in chunk
+            if extract_id not in tokenized_ids
+            for token in determine_filename_tokens(filename=filename)
+        ]
+
+        if rows:
+            connection.execute(filename_token.insert(), rows)
+
+
+def determine_filename_tokens(filename):
+    """
+    Split a filename, or part of one, into its tokens.
+    :param filename: The filename.
+    :type filename: str
+    :return: Sorted list of the distinct tokens.
+    """
+    return sorted(set(filename_token_pattern.findall(filename.lower())))
+
+
+def determine_whole_tokens(filename, match):
+    """
+    Find the tokens of a search term that must be whole tokens of any filename it matches.  A token cut off by the
+    start or end of the term might only be part of a filename token, unless the match is anchored at that end.
+    :param filename: The search term.
+    :type filename: str
+    :param match: How the term is matched.  Valid values: contains, prefix, suffix, token.
+    :type match: str
+    :return: Sorted list of the distinct whole tokens.
+    """
+    filename = filename.lower()
+    tokens = set()
+
+    for token in filename_token_pattern.finditer(filename):
+        starts_whole = token.start() > 0 or match in ("prefix", "token")
+        ends_whole = token.end() < len(filename) or match in ("suffix", "token")
+
+        if starts_whole and ends_whole:
+            tokens.add(token.group())
+
+    return sorted(tokens)
+
+
+def escape_like_pattern(value):
+    """
+    Escape the LIKE wildcards in a filename, so it is matched literally.  Use with escape="/".
+    :param value: The filename, or part of one.
+    :type value: str
+    :return: The escaped filename.
+    """
+    return value.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+def rebuild_filename_tokens(connection):
+    """
+    Rebuild the filename tokens from extract_tracking.  Only needed for data stores whose extracts were registered
+    before the tokens were kept.
+    :param connection: The connection to rebuild the tokens with.
+    :return: The number of extracts tokenized.
+    """
+    connection.execute(filename_token.delete())
+
+    extracts = [
+        tuple(row)
+        for row in connection.execute(
+            select([extract.c.extract_id, extract.c.extract_filename])
+        )
+    ]
+
+    add_filename_tokens(connection=connection, extracts=extracts)
+
+    return len(extracts)
+
+
+@event.listens_for(Extract, "after_insert")
+def extract_inserted(mapper, connection, target):
+    """
+    Keep the filename tokens up to date with extracts added through a session.
+    :return:
+    """
+    add_filename_tokens(
+        connection=connection,
+        extracts=[(target.extract_id, target.extract_filename)],
+    )
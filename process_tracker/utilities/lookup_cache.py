@@ -0,0 +1,103 @@
+# Lookup Cache
+# In-process cache for small lookup tables (statuses, types, actors, tools, etc.) shared by every data store.
+
+from collections import OrderedDict
+import threading
+import time
+
+
+class LookupCache:
+    def __init__(self, max_entries=1000, ttl=300):
+        """
+        Bounded, time limited cache for lookup table records.  Entries are keyed by tuples that start with the table
+        name so that all entries of a given table can be invalidated together.
+        :param max_entries: Maximum number of entries held.  Least recently used entries are evicted first.
+        :type max_entries: int
+        :param ttl: Number of seconds an entry stays valid.
+        :type ttl: int
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def configure(self, max_entries=None, ttl=None):
+        """
+        Change the size and/or time to live of the cache.  Entries already cached are kept, except for those beyond the
+        new size.
+        :param max_entries: Maximum number of entries held.
+        :type max_entries: int
+        :param ttl: Number of seconds an entry stays valid.
+        :type ttl: int
+        :return:
+        """
+        with self.lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if ttl is not None:
+                self.ttl = ttl
+
+            self.evict()
+
+    def evict(self):
+        """
+        Drop least recently used entries until the cache is within its size.  Caller must hold the lock.
+        :return:
+        """
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, key):
+        """
+        Retrieve an entry from the cache.
+        :param key: Tuple starting with the table name.
+        :type key: tuple
+        :return: The cached value or None if not cached or expired.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                return None
+
+            expires, value = entry
+
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+
+            return value
+
+    def invalidate(self, table_name=None):
+        """
+        Remove entries from the cache.
+        :param table_name: If provided, only entries for that table are removed.  Otherwise the whole cache is cleared.
+        :type table_name: str
+        :return:
+        """
+        with self.lock:
+            if table_name is None:
+                self.entries.clear()
+            else:
+                for key in [key for key in self.entries if key[0] == table_name]:
+                    del self.entries[key]
+
+    def set(self, key, value):
+        """
+        Add or replace an entry in the cache.
+        :param key: Tuple starting with the table name.
+        :type key: tuple
+        :param value: The value to be cached.
+        :return:
+        """
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+
+            self.evict()
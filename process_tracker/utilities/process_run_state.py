@@ -0,0 +1,103 @@
+# Process Run State
+# Works out process_run_state, each process' current run, its status and the number of runs failed in a row, from
+# process_tracking for processes tracked before the run state was kept.
+
+from sqlalchemy import and_, func, select
+
+from process_tracker.models.process import ProcessRunState, ProcessTracking
+
+run_state = ProcessRunState.__table__
+tracking = ProcessTracking.__table__
+
+
+def determine_missing_run_states(
+    connection, completed_status_id, failed_status_id, process_ids=None
+):
+    """
+    Work out the run state of the processes that have runs but no run state, from their latest run.  The runs failed
+    in a row are the failed runs since the latest completed run.  Processes that already have a run state are left
+    alone, as their runs keep it up to date.
+    :param connection: The connection to read the run history with.
+    :param completed_status_id: The process status of completed runs.
+    :type completed_status_id: int
+    :param failed_status_id: The process status of failed runs.
+    :type failed_status_id: int
+    :param process_ids: Only work out the run state of these processes.  Default is every process.
+    :type process_ids: list
+    :return: List of run state rows, keyed by column name.
+    """
+    latest_run_ids = select(
+        [
+            tracking.c.process_id,
+            func.max(tracking.c.process_run_id).label("process_run_id"),
+        ]
+    ).where(tracking.c.process_id.notin_(select([run_state.c.process_id])))
+
+    if process_ids is not None:
+        latest_run_ids = latest_run_ids.where(tracking.c.process_id.in_(process_ids))
+
+    latest_run_ids = latest_run_ids.group_by(tracking.c.process_id).alias()
+
+    last_completed_run_ids = (
+        select(
+            [
+                tracking.c.process_id,
+                func.max(tracking.c.process_run_id).label("process_run_id"),
+            ]
+        )
+        .where(tracking.c.process_status_id == completed_status_id)
+        .group_by(tracking.c.process_id)
+        .alias()
+    )
+
+    failure_counts = dict(
+        (process_id, failure_count)
+        for process_id, failure_count in connection.execute(
+            select([tracking.c.process_id, func.count(tracking.c.process_tracking_id)])
+            .select_from(
+                tracking.join(
+                    latest_run_ids,
+                    latest_run_ids.c.process_id == tracking.c.process_id,
+                ).outerjoin(
+                    last_completed_run_ids,
+                    last_completed_run_ids.c.process_id == tracking.c.process_id,
+                )
+            )
+            .where(tracking.c.process_status_id == failed_status_id)
+            .where(
+                tracking.c.process_run_id
+                > func.coalesce(last_completed_run_ids.c.process_run_id, 0)
+            )
+            .group_by(tracking.c.process_id)
+        )
+    )
+
+    return [
+        {
+            "process_id": process_id,
+            "process_tracking_id": process_tracking_id,
+            "process_run_id": process_run_id,
+            "process_status_id": process_status_id,
+            "consecutive_failure_count": failure_counts.get(process_id, 0),
+        }
+        for process_id, process_tracking_id, process_run_id, process_status_id in connection.execute(
+            select(
+                [
+                    tracking.c.process_id,
+                    tracking.c.process_tracking_id,
+                    tracking.c.process_run_id,
+                    tracking.c.process_status_id,
+                ]
+            )
+            .select_from(
+                tracking.join(
+                    latest_run_ids,
+                    and_(
+                        latest_run_ids.c.process_id == tracking.c.process_id,
+                        latest_run_ids.c.process_run_id == tracking.c.process_run_id,
+                    ),
+                )
+            )
+            .order_by(tracking.c.process_id)
+        )
+    ]
@@ -0,0 +1,198 @@
+# Query Statistics
+# Statement counts and timings of data store queries, grouped by the tracking operation that issued them.
+
+import atexit
+from collections import OrderedDict
+import heapq
+import json
+import sys
+import threading
+import time
+
+from sqlalchemy import event
+
+
+class QueryStats:
+    def __init__(self, slowest=5):
+        """
+        Collects statistics for every statement run through the engines it is attached to.  Statements are grouped by
+        the innermost public tracker method (i.e. ProcessTracker.register_process_sources) that issued them, or by the
+        DataStore method if not issued through a tracker.
+        :param slowest: Number of slowest statements kept per operation.
+        :type slowest: int
+        """
+        self.slowest = slowest
+
+        self.engines = set()
+        self.operations = dict()
+        self.lock = threading.Lock()
+
+        self.dump_files = set()
+
+    def after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        """
+        Engine event hook.  Records the statement against the operation that issued it.
+        :return:
+        """
+        start_times = conn.info.get("query_stats_start")
+
+        if not start_times:
+            return
+
+        elapsed = time.perf_counter() - start_times.pop()
+
+        self.record(
+            operation=self.determine_operation(), statement=statement, elapsed=elapsed
+        )
+
+    def attach(self, engine):
+        """
+        Start collecting statistics for the given engine.  Attaching an engine more than once has no effect.
+        :param engine: The data store engine.
+        :type engine: SQLAlchemy engine
+        :return:
+        """
+        with self.lock:
+            if id(engine) in self.engines:
+                return
+
+            self.engines.add(id(engine))
+
+        event.listen(engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self.after_cursor_execute)
+
+    def before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        """
+        Engine event hook.  Marks the start of the statement.
+        :return:
+        """
+        conn.info.setdefault("query_stats_start", []).append(time.perf_counter())
+
+    @staticmethod
+    def determine_operation():
+        """
+        Walk the call stack to find the operation that issued the current statement.
+        :return: Name of the operation, as Class.method where the method belongs to a class.
+        """
+        frame = sys._getframe(1)
+        fallback = None
+
+        while frame is not None:
+            module = frame.f_globals.get("__name__", "")
+            name = frame.f_code.co_name
+
+            if module.startswith("process_tracker.") and not name.startswith(
+                ("_", "<")
+            ):
+                instance = frame.f_locals.get("self")
+
+                if instance is not None:
+                    name = "%s.%s" % (type(instance).__name__, name)
+
+                if not module.startswith("process_tracker.utilities."):
+                    return name
+
+                if (
+                    fallback is None
+                    and module == "process_tracker.utilities.data_store"
+                ):
+                    fallback = name
+
+            frame = frame.f_back
+
+        return fallback or "other"
+
+    def dump(self, file_path):
+        """
+        Write the statistics to a JSON file.
+        :param file_path: Path of the JSON file.
+        :type file_path: str
+        :return:
+        """
+        with open(file_path, "w") as stats_file:
+            json.dump(self.stats(), stats_file, indent=2)
+
+    def dump_at_exit(self, file_path):
+        """
+        Write the statistics to a JSON file when the process exits.
+        :param file_path: Path of the JSON file.
+        :type file_path: str
+        :return:
+        """
+        with self.lock:
+            if file_path in self.dump_files:
+                return
+
+            self.dump_files.add(file_path)
+
+        atexit.register(self.dump, file_path=file_path)
+
+    def record(self, operation, statement, elapsed):
+        """
+        Add a statement to the statistics of an operation.
+        :param operation: Name of the operation that issued the statement.
+        :type operation: str
+        :param statement: The SQL statement.
+        :type statement: str
+        :param elapsed: Time taken by the statement, in seconds.
+        :type elapsed: float
+        :return:
+        """
+        with self.lock:
+            stats = self.operations.get(operation)
+
+            if stats is None:
+                stats = self.operations[operation] = {
+                    "statements": 0,
+                    "total_time": 0.0,
+                    "slowest": [],
+                }
+
+            stats["statements"] += 1
+            stats["total_time"] += elapsed
+
+            if len(stats["slowest"]) < self.slowest:
+                heapq.heappush(stats["slowest"], (elapsed, statement))
+            elif elapsed > stats["slowest"][0][0]:
+                heapq.heapreplace(stats["slowest"], (elapsed, statement))
+
+    def reset(self):
+        """
+        Clear all collected statistics.
+        :return:
+        """
+        with self.lock:
+            self.operations.clear()
+
+    def stats(self):
+        """
+        Get the collected statistics, operations with the most total time first.
+        :return: Dictionary of operation name to statement count, total time and slowest statements.
+        """
+        with self.lock:
+            operations = sorted(
+                self.operations.items(),
+                key=lambda operation: operation[1]["total_time"],
+                reverse=True,
+            )
+
+            return OrderedDict(
+                (
+                    operation,
+                    {
+                        "statements": stats["statements"],
+                        "total_time": stats["total_time"],
+                        "slowest": [
+                            {"time": elapsed, "statement": statement}
+                            for elapsed, statement in sorted(
+                                stats["slowest"], reverse=True
+                            )
+                        ],
+                    },
+                )
+                for operation, stats in operations
+            )
@@ -14,6 +14,8 @@ from process_tracker.models.process import (
     Process,
     ProcessDatasetType,
     ProcessDependency,
+    ProcessDependencyClosure,
+    ProcessRunState,
     ProcessSource,
     ProcessSourceObject,
     ProcessTarget,
@@ -47,7 +49,9 @@ def setup_and_teardown():
     session.query(ProcessTargetObject).delete()
     session.query(ProcessSource).delete()
     session.query(ProcessTarget).delete()
+    session.query(ProcessDependencyClosure).delete()
     session.query(ProcessDependency).delete()
+    session.query(ProcessRunState).delete()
     session.query(ProcessTracking).delete()
     session.query(Process).delete()
     session.commit()
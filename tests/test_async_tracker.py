@@ -0,0 +1,170 @@
+# Tests for validating the async tracking operations work as expected.
+
+import asyncio
+import unittest
+
+from process_tracker.models.extract import (
+    Extract,
+    ExtractDatasetType,
+    ExtractFilenameToken,
+    ExtractProcess,
+    ExtractSource,
+    Location,
+)
+from process_tracker.models.process import (
+    Process,
+    ProcessDatasetType,
+    ProcessRunState,
+    ProcessSource,
+    ProcessTarget,
+    ProcessTracking,
+)
+from process_tracker.models.source import (
+    DatasetType,
+    SourceDatasetType,
+    SourceLocation,
+)
+
+from process_tracker.async_tracker import AsyncProcessTracker
+from process_tracker.utilities.data_store import DataStore, embedded_data_stores
+
+
+class TestAsyncTracker(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data_store = DataStore()
+        cls.session = cls.data_store.session
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.session.close()
+
+    def setUp(self):
+        """
+        Creating an initial process tracking run record for testing.
+        :return:
+        """
+        self.process_tracker = asyncio.run(
+            AsyncProcessTracker.start(
+                process_name="Testing Async Process Tracking",
+                process_type="Extract",
+                actor_name="UnitTesting",
+                tool_name="Spark",
+                sources="Unittests",
+                targets="Unittests",
+                dataset_types="Category 1",
+            )
+        )
+
+    def tearDown(self):
+        """
+        Need to clean up tables to return them to pristine state for other tests.
+        :return:
+        """
+        self.session.query(ExtractProcess).delete()
+        self.session.query(ExtractSource).delete()
+        self.session.query(ExtractDatasetType).delete()
+        self.session.query(SourceDatasetType).delete()
+        self.session.query(SourceLocation).delete()
+        self.session.query(ExtractFilenameToken).delete()
+        self.session.query(Extract).delete()
+        self.session.query(Location).delete()
+        self.session.query(ProcessDatasetType).delete()
+        self.session.query(ProcessSource).delete()
+        self.session.query(ProcessTarget).delete()
+        self.session.query(ProcessRunState).delete()
+        self.session.query(ProcessTracking).delete()
+        self.session.query(Process).delete()
+        self.session.query(DatasetType).delete()
+        self.session.commit()
+        self.data_store.invalidate_lookup_cache()
+
+    def test_change_run_status(self):
+        """
+        Testing that the process run status can be changed through the async tracker.
+        :return:
+        """
+        asyncio.run(self.process_tracker.change_run_status(new_status="completed"))
+
+        given_result = (
+            self.session.query(ProcessTracking)
+            .filter(
+                ProcessTracking.process_tracking_id
+                == self.process_tracker.process_tracker.process_tracking_run.process_tracking_id
+            )
+            .first()
+        )
+
+        self.assertEqual(
+            self.process_tracker.process_tracker.process_status_complete,
+            given_result.process_status_id,
+        )
+
+    def test_concurrent_process_runs(self):
+        """
+        Testing that several process runs can be tracked concurrently from one event loop.
+        :return:
+        """
+        if self.data_store.data_store_type in embedded_data_stores:
+            self.skipTest("Embedded data stores only allow one writer at a time.")
+
+        async def run_pipeline(number):
+            process_tracker = await AsyncProcessTracker.start(
+                process_name="Testing Async Process Tracking %s" % number,
+                process_type="Extract",
+                actor_name="UnitTesting",
+                tool_name="Spark",
+            )
+            await process_tracker.set_process_run_record_count(num_records=number)
+            await process_tracker.change_run_status(new_status="completed")
+
+            return (
+                process_tracker.process_tracker.process_tracking_run.process_run_record_count
+            )
+
+        async def run_pipelines():
+            return await asyncio.gather(*[run_pipeline(number) for number in range(5)])
+
+        given_result = asyncio.run(run_pipelines())
+
+        self.assertEqual(list(range(5)), given_result)
+
+    def test_register_and_find_extracts(self):
+        """
+        Testing that extracts registered through the async tracker can be found and have their status changed.
+        :return:
+        """
+
+        async def register_and_find():
+            extract = await self.process_tracker.register_extract(
+                filename="async_test.csv",
+                location_path="/async/test/path",
+                status="ready",
+            )
+            await extract.set_extract_record_count(num_records=10)
+
+            extracts = await self.process_tracker.find_extracts_by_filename(
+                filename="async_test.csv"
+            )
+            await self.process_tracker.bulk_change_extract_status(
+                extracts=extracts, extract_status="loading"
+            )
+
+            return extract, extracts
+
+        extract, extracts = asyncio.run(register_and_find())
+
+        given_result = (
+            self.session.query(Extract)
+            .filter(Extract.extract_id == extract.extract_tracker.extract.extract_id)
+            .first()
+        )
+
+        self.assertEqual(
+            [extract.extract_tracker.extract.extract_id],
+            [item.extract_tracker.extract.extract_id for item in extracts],
+        )
+        self.assertEqual(
+            extract.extract_tracker.extract_status_loading,
+            given_result.extract_status_id,
+        )
@@ -21,6 +21,8 @@ from process_tracker.models.process import (
     Process,
     ProcessDatasetType,
     ProcessDependency,
+    ProcessDependencyClosure,
+    ProcessRunState,
     ProcessSource,
     ProcessTarget,
     ProcessTracking,
@@ -42,10 +44,12 @@ class TestCliDataStore(unittest.TestCase):
 
     @classmethod
     def tearDownClass(cls):
+        cls.session.query(ProcessDependencyClosure).delete()
         cls.session.query(ProcessDependency).delete()
         cls.session.query(ProcessSource).delete()
         cls.session.query(ProcessTarget).delete()
         cls.session.query(ProcessDatasetType).delete()
+        cls.session.query(ProcessRunState).delete()
         cls.session.query(ProcessTracking).delete()
         cls.session.query(Process).delete()
         cls.session.commit()
@@ -56,9 +60,11 @@ class TestCliDataStore(unittest.TestCase):
 
     def tearDown(self):
         self.session.query(ErrorTracking).delete()
+        self.session.query(ProcessRunState).delete()
         self.session.query(ProcessTracking).delete()
         self.session.query(ErrorType).delete()
         self.session.commit()
+        self.data_store.invalidate_lookup_cache()
 
     @unittest.skipIf(
         "TRAVIS" in os.environ and os.environ["TRAVIS"] == "true",
@@ -783,6 +789,17 @@ class TestCli(unittest.TestCase):
 
     # def test_delete_process_dependency(self):
     #
+
+    def test_indexes_check(self):
+        """
+        Testing that checking the indexes reports when all expected indexes are in place.
+        :return:
+        """
+        result = self.runner.invoke(main, "indexes --check")
+
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("All expected indexes are in place.", result.output)
+
     def test_update_actor(self):
         """
         Testing that when updating an actor record it is updated.
@@ -7,6 +7,7 @@ from process_tracker.models.capacity import ClusterProcess
 from process_tracker.models.extract import (
     Extract,
     ExtractDatasetType,
+    ExtractFilenameToken,
     ExtractProcess,
     ExtractSource,
     ExtractSourceObject,
@@ -16,6 +17,8 @@ from process_tracker.models.process import (
     Process,
     ProcessDatasetType,
     ProcessDependency,
+    ProcessDependencyClosure,
+    ProcessRunState,
     ProcessSource,
     ProcessSourceObject,
     ProcessTarget,
@@ -59,10 +62,12 @@ class TestExtractTracker(unittest.TestCase):
         cls.session.query(ErrorTracking).delete()
         cls.session.query(ExtractProcess).delete()
         cls.session.query(ProcessDatasetType).delete()
+        cls.session.query(ProcessRunState).delete()
         cls.session.query(ProcessTracking).delete()
         cls.session.query(ProcessSource).delete()
         cls.session.query(ProcessSourceObject).delete()
         cls.session.query(ProcessTarget).delete()
+        cls.session.query(ProcessDependencyClosure).delete()
         cls.session.query(ProcessDependency).delete()
         cls.session.query(Process).delete()
         cls.session.commit()
@@ -93,6 +98,7 @@ class TestExtractTracker(unittest.TestCase):
         self.session.query(ExtractDatasetType).delete()
         self.session.query(ExtractDependency).delete()
         self.session.query(ExtractProcess).delete()
+        self.session.query(ExtractFilenameToken).delete()
         self.session.query(Extract).delete()
         self.session.query(Location).delete()
         self.session.commit()
@@ -210,6 +216,37 @@ class TestExtractTracker(unittest.TestCase):
 
         self.assertEqual(expected_result, given_result)
 
+    def test_change_extract_status_batch(self):
+        """
+        Testing that status changes made within a batch are visible in the session and committed when the batch exits.
+        :return:
+        """
+        extract_id = self.extract.extract.extract_id
+
+        with self.extract.batch():
+            self.extract.change_extract_status("ready")
+
+            given_during = (
+                self.session.query(Extract.extract_status_id)
+                .filter(Extract.extract_id == extract_id)
+                .scalar()
+            )
+
+        self.session.rollback()
+
+        given_after = (
+            self.session.query(Extract.extract_status_id)
+            .filter(Extract.extract_id == extract_id)
+            .scalar()
+        )
+
+        expected_result = [
+            self.extract.extract_status_ready,
+            self.extract.extract_status_ready,
+        ]
+
+        self.assertEqual(expected_result, [given_during, given_after])
+
     def test_change_extract_status_invalid_type(self):
         """
         When trying to change a extract's status and the status is an invalid type, throw and error.
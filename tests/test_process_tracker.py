@@ -11,12 +11,14 @@ from unittest.mock import patch
 import boto3
 import botocore
 from moto import mock_s3
-from sqlalchemy.orm import aliased, Session
+from sqlalchemy.orm import aliased, Query, Session
 
 from process_tracker.models.contact import Contact
 from process_tracker.models.extract import (
     Extract,
     ExtractDatasetType,
+    ExtractDependency,
+    ExtractFilenameToken,
     ExtractProcess,
     ExtractStatus,
     ExtractSource,
@@ -29,7 +31,9 @@ from process_tracker.models.process import (
     ProcessContact,
     ProcessDatasetType,
     ProcessDependency,
+    ProcessDependencyClosure,
     ProcessFilter,
+    ProcessRunState,
     ProcessSource,
     ProcessSourceObject,
     ProcessSourceObjectAttribute,
@@ -51,6 +55,7 @@ from process_tracker.models.source import (
     SourceObjectLocation,
 )
 
+from process_tracker.exceptions import ProcessRunLockError
 from process_tracker.utilities.data_store import DataStore, ClusterProcess
 from process_tracker.extract_tracker import ExtractTracker
 from process_tracker.process_tracker import ProcessTracker
@@ -86,6 +91,7 @@ class TestProcessTracker(unittest.TestCase):
         cls.session.query(ProcessTargetObject).delete()
         cls.session.query(ProcessSource).delete()
         cls.session.query(ProcessTarget).delete()
+        cls.session.query(ProcessDependencyClosure).delete()
         cls.session.query(ProcessDependency).delete()
         cls.session.query(Process).delete()
         cls.session.delete(cls.blarg)
@@ -120,6 +126,7 @@ class TestProcessTracker(unittest.TestCase):
         Need to clean up tables to return them to pristine state for other tests.
         :return:
         """
+        self.session.query(ExtractDependency).delete()
         self.session.query(ExtractProcess).delete()
         self.session.query(ExtractSource).delete()
         self.session.query(ExtractDatasetType).delete()
@@ -129,11 +136,14 @@ class TestProcessTracker(unittest.TestCase):
         self.session.query(SourceObjectLocation).delete()
         self.session.query(ProcessDatasetType).delete()
         self.session.query(ErrorTracking).delete()
+        self.session.query(ProcessRunState).delete()
         self.session.query(ProcessTracking).delete()
         self.session.query(Process)
+        self.session.query(ExtractFilenameToken).delete()
         self.session.query(Extract).delete()
         self.session.query(ErrorType).delete()
         self.session.commit()
+        self.data_store.invalidate_lookup_cache()
 
     def process_run_setup(self, process_name, status, num_runs):
         """
@@ -197,6 +207,387 @@ class TestProcessTracker(unittest.TestCase):
 
         self.assertEqual(expected_result, given_result)
 
+    def test_bulk_change_extract_status_static(self):
+        """
+        Testing that bulk change can still be called on the class, associating extract trackers with their own process
+        run.
+        :return:
+        """
+        extract = ExtractTracker(
+            process_run=self.process_tracker,
+            filename="test_extract_filename2.csv",
+            location_name="Test Location",
+            location_path="/home/test/extract_dir",
+        )
+
+        ProcessTracker.bulk_change_extract_status(
+            extracts=[extract], extract_status="ready"
+        )
+
+        given_result = (
+            self.session.query(ExtractProcess.extract_process_status_id)
+            .filter(
+                ExtractProcess.process_tracking_id
+                == self.process_tracker.process_tracking_run.process_tracking_id
+            )
+            .filter(ExtractProcess.extract_tracking_id == extract.extract.extract_id)
+            .scalar()
+        )
+
+        self.assertEqual(extract.extract_status_ready, given_result)
+
+    def test_bulk_change_extract_status_creates_extract_process(self):
+        """
+        Testing that bulk changing extracts not yet associated with the process run, i.e. registered by another run,
+        associates them with the status.
+        :return:
+        """
+        extracts = self.process_tracker.register_extracts(
+            files=["test_extract_filename2.csv", "test_extract_filename3.csv"],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+
+        self.session.query(ExtractProcess).filter(
+            ExtractProcess.extract_tracking_id == extracts[0].extract_id
+        ).delete(synchronize_session=False)
+        self.session.commit()
+
+        self.process_tracker.bulk_change_extract_status(
+            extracts=extracts, extract_status="loaded", process_run=self.process_tracker
+        )
+
+        given_result = (
+            self.session.query(ExtractProcess.extract_tracking_id)
+            .join(ExtractStatus)
+            .filter(
+                ExtractProcess.process_tracking_id
+                == self.process_tracker.process_tracking_run.process_tracking_id
+            )
+            .filter(ExtractStatus.extract_status_name == "loaded")
+        )
+
+        self.assertEqual(
+            sorted(extract.extract_id for extract in extracts),
+            sorted(extract_id for extract_id, in given_result),
+        )
+
+    def test_bulk_change_extract_status_references_need_process_run(self):
+        """
+        Testing that bulk changing only extract references on the class, without a process run, raises an exception.
+        :return:
+        """
+        extracts = self.process_tracker.register_extracts(
+            files=["test_extract_filename2.csv"],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+
+        with self.assertRaises(Exception) as context:
+            ProcessTracker.bulk_change_extract_status(
+                extracts=extracts, extract_status="loaded"
+            )
+
+        self.assertTrue(
+            "A process run must be provided to change the status of extract references."
+            in str(context.exception)
+        )
+
+    def test_update_extract_status_dependency_hold(self):
+        """
+        Testing that changing extracts to 'loading' fails if any of them depends on an extract that is not loaded
+        and not in the set, and that nothing is changed.
+        :return:
+        """
+        extract, extract2, extract3 = self.process_tracker.register_extracts(
+            files=[
+                "test_extract_filename2.csv",
+                "test_extract_filename3.csv",
+                "test_extract_filename4.csv",
+            ],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+
+        self.session.add(
+            ExtractDependency(
+                parent_extract_id=extract.extract_id,
+                child_extract_id=extract3.extract_id,
+            )
+        )
+        self.session.commit()
+
+        with self.assertRaises(Exception) as context:
+            self.process_tracker.update_extract_status(
+                extracts=[extract2, extract3], extract_status="loading"
+            )
+
+        self.assertTrue(
+            "are dependent on have not been loaded" in str(context.exception)
+        )
+
+        given_result = (
+            self.session.query(Extract)
+            .join(ExtractStatus)
+            .filter(ExtractStatus.extract_status_name == "loading")
+            .count()
+        )
+
+        self.assertEqual(0, given_result)
+
+    def test_update_extract_status_dependency_in_set(self):
+        """
+        Testing that changing extracts to 'loading' succeeds when the extracts they depend on are in the set.
+        :return:
+        """
+        extracts = self.process_tracker.register_extracts(
+            files=["test_extract_filename2.csv", "test_extract_filename3.csv"],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+
+        self.session.add(
+            ExtractDependency(
+                parent_extract_id=extracts[0].extract_id,
+                child_extract_id=extracts[1].extract_id,
+            )
+        )
+        self.session.commit()
+
+        self.process_tracker.update_extract_status(
+            extracts=extracts, extract_status="loading"
+        )
+
+        given_result = (
+            self.session.query(Extract)
+            .join(ExtractStatus)
+            .filter(ExtractStatus.extract_status_name == "loading")
+            .count()
+        )
+
+        self.assertEqual(2, given_result)
+
+    def test_claim_extracts(self):
+        """
+        Testing that ready extracts are claimed oldest first, moved to 'loading' for the process run, and not claimed
+        again.
+        :return:
+        """
+        extracts = self.process_tracker.register_extracts(
+            files=[
+                "test_claim_filename1.csv",
+                "test_claim_filename2.csv",
+                "test_claim_filename3.csv",
+            ],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+
+        first_claim = self.process_tracker.claim_extracts(n=2)
+        second_claim = self.process_tracker.claim_extracts(n=2)
+        third_claim = self.process_tracker.claim_extracts(n=2)
+
+        self.assertEqual(
+            [extract.extract_id for extract in extracts[:2]],
+            [extract.extract_id for extract in first_claim],
+        )
+        self.assertEqual(
+            [extracts[2].extract_id], [extract.extract_id for extract in second_claim]
+        )
+        self.assertEqual([], third_claim)
+
+        given_result = (
+            self.session.query(ExtractProcess)
+            .join(ExtractStatus)
+            .filter(
+                ExtractProcess.process_tracking_id
+                == self.process_tracker.process_tracking_run.process_tracking_id
+            )
+            .filter(ExtractStatus.extract_status_name == "loading")
+            .count()
+        )
+
+        self.assertEqual(3, given_result)
+
+    def test_claim_extracts_lost_race(self):
+        """
+        Testing that an extract claimed by another worker between reading and claiming it is replaced with the next
+        ready extract.
+        :return:
+        """
+        lost, *others = self.process_tracker.register_extracts(
+            files=[
+                "test_claim_filename1.csv",
+                "test_claim_filename2.csv",
+                "test_claim_filename3.csv",
+            ],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+        status_loading = self.data_store.get_lookup_names(model=ExtractStatus)[
+            "loading"
+        ]
+        original_update = Query.update
+        other_worker = DataStore()
+
+        def update(query, values, synchronize_session="evaluate"):
+            update.calls += 1
+
+            # Another worker claims the first extract just before this worker does.
+            if update.calls == 1:
+                original_update(
+                    other_worker.session.query(Extract).filter(
+                        Extract.extract_id == lost.extract_id
+                    ),
+                    {Extract.extract_status_id: status_loading},
+                    synchronize_session=False,
+                )
+                other_worker.session.commit()
+
+            return original_update(query, values, synchronize_session)
+
+        update.calls = 0
+
+        with patch.object(Query, "update", autospec=True, side_effect=update):
+            given_result = self.process_tracker.claim_extracts(n=2)
+
+        other_worker.close()
+
+        self.assertEqual(
+            [extract.extract_id for extract in others],
+            [extract.extract_id for extract in given_result],
+        )
+
+    def test_claim_extracts_lost_race_stale_read(self):
+        """
+        Testing that an extract another worker claimed is not tried again, even if the data store still shows it as
+        ready (i.e. a REPEATABLE READ snapshot), so claiming ends.
+        :return:
+        """
+        lost, *others = self.process_tracker.register_extracts(
+            files=[
+                "test_claim_filename1.csv",
+                "test_claim_filename2.csv",
+                "test_claim_filename3.csv",
+            ],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+        original_update = Query.update
+
+        def update(query, values, synchronize_session="evaluate"):
+            update.calls += 1
+
+            # The first extract's claim is lost, while it stays ready for every read.
+            if update.calls == 1:
+                return 0
+
+            return original_update(query, values, synchronize_session)
+
+        update.calls = 0
+
+        with patch.object(Query, "update", autospec=True, side_effect=update):
+            given_result = self.process_tracker.claim_extracts(n=2)
+
+        self.assertEqual(
+            [extract.extract_id for extract in others],
+            [extract.extract_id for extract in given_result],
+        )
+
+    def test_claim_extracts_within_batch(self):
+        """
+        Testing that extracts claimed within a batch are committed straight away, so other workers see them claimed.
+        :return:
+        """
+        self.process_tracker.register_extracts(
+            files=["test_claim_filename1.csv", "test_claim_filename2.csv"],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+        other_worker = DataStore()
+
+        with self.process_tracker.batch():
+            given_result = self.process_tracker.claim_extracts(n=2)
+
+            given_statuses = [
+                row.extract_status_name
+                for row in other_worker.session.query(ExtractStatus.extract_status_name)
+                .join(
+                    Extract,
+                    Extract.extract_status_id == ExtractStatus.extract_status_id,
+                )
+                .filter(
+                    Extract.extract_id.in_(
+                        [extract.extract_id for extract in given_result]
+                    )
+                )
+            ]
+
+        other_worker.close()
+
+        self.assertEqual(2, len(given_result))
+        self.assertEqual(["loading", "loading"], given_statuses)
+
+    def test_claim_extracts_dependency_hold(self):
+        """
+        Testing that extracts depending on extracts that are not loaded yet are not claimed.
+        :return:
+        """
+        parent, child = self.process_tracker.register_extracts(
+            files=["test_claim_filename1.csv", "test_claim_filename2.csv"],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+
+        self.session.add(
+            ExtractDependency(
+                parent_extract_id=parent.extract_id, child_extract_id=child.extract_id
+            )
+        )
+        self.session.commit()
+
+        given_result = self.process_tracker.claim_extracts(n=2)
+
+        self.assertEqual(
+            [parent.extract_id], [extract.extract_id for extract in given_result]
+        )
+
+        self.process_tracker.update_extract_status(
+            extracts=given_result, extract_status="loaded"
+        )
+
+        given_result = self.process_tracker.claim_extracts(n=2)
+
+        self.assertEqual(
+            [child.extract_id], [extract.extract_id for extract in given_result]
+        )
+
+    def test_claim_extracts_by_process(self):
+        """
+        Testing that only extracts associated with the given process are claimed.
+        :return:
+        """
+        self.process_tracker.register_extracts(
+            files=["test_claim_filename1.csv"],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+
+        given_result = self.process_tracker.claim_extracts(
+            n=2, extract_process_name="Not A Process"
+        )
+
+        self.assertEqual([], given_result)
+
+        given_result = self.process_tracker.claim_extracts(
+            n=2, extract_process_name="Testing Process Tracking Initialization"
+        )
+
+        self.assertEqual(
+            ["test_claim_filename1.csv"],
+            [extract.extract_filename for extract in given_result],
+        )
+
     def test_change_status_invalid_type(self):
         """
         Testing that if an invalid process status type is passed, it will trigger an exception.
@@ -208,6 +599,56 @@ class TestProcessTracker(unittest.TestCase):
             "The provided status type blarg is invalid." in str(context.exception)
         )
 
+    def test_find_blocked_extracts(self):
+        """
+        Testing that only the extracts depending on unloaded extracts outside of the batch are returned as blocked.
+        :return:
+        """
+        (
+            parent,
+            in_batch_child,
+            blocked_child,
+            loaded_parent,
+        ) = self.process_tracker.register_extracts(
+            files=[
+                "test_extract_filename2.csv",
+                "test_extract_filename3.csv",
+                "test_extract_filename4.csv",
+                "test_extract_filename5.csv",
+            ],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+        self.process_tracker.update_extract_status(
+            extracts=[loaded_parent], extract_status="loaded"
+        )
+
+        for parent_extract, child_extract in [
+            (parent, in_batch_child),
+            (parent, blocked_child),
+            (loaded_parent, in_batch_child),
+        ]:
+            self.session.add(
+                ExtractDependency(
+                    parent_extract_id=parent_extract.extract_id,
+                    child_extract_id=child_extract.extract_id,
+                )
+            )
+
+        self.session.commit()
+
+        given_result = self.process_tracker.find_blocked_extracts(
+            extracts=[in_batch_child, parent, blocked_child]
+        )
+
+        self.assertEqual([], given_result)
+
+        given_result = self.process_tracker.find_blocked_extracts(
+            extracts=[in_batch_child, blocked_child]
+        )
+
+        self.assertEqual([in_batch_child, blocked_child], given_result)
+
     def test_find_extracts_by_filename_custom_status(self):
         """
         Testing that for the given full filename and a custom status, find the extract.
@@ -263,6 +704,67 @@ class TestProcessTracker(unittest.TestCase):
 
         self.assertCountEqual(expected_result, given_result)
 
+    def test_find_extracts_by_filename_match(self):
+        """
+        Testing that extracts can be found by the start, end or words of their filename, and that wildcard characters in
+        the filename are matched literally.
+        :return:
+        """
+        self.process_tracker.register_extracts(
+            files=[
+                "sales_2020-01-01.csv",
+                "sales_2020-01-02.csv",
+                "salesXregion_2020-01-01.csv",
+                "returns_2020-01-01.csv",
+            ],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+
+        for match, filename, expected_result in [
+            ("prefix", "sales_", ["sales_2020-01-01.csv", "sales_2020-01-02.csv"]),
+            (
+                "suffix",
+                "01-01.csv",
+                [
+                    "returns_2020-01-01.csv",
+                    "salesXregion_2020-01-01.csv",
+                    "sales_2020-01-01.csv",
+                ],
+            ),
+            (
+                "token",
+                "2020 Sales CSV",
+                ["sales_2020-01-01.csv", "sales_2020-01-02.csv"],
+            ),
+            (
+                "contains",
+                "es_2020-01-0",
+                ["sales_2020-01-01.csv", "sales_2020-01-02.csv"],
+            ),
+        ]:
+            extracts = self.process_tracker.iter_extracts_by_filename(
+                filename=filename, match=match
+            )
+
+            given_result = sorted(extract.extract_filename for extract in extracts)
+
+            self.assertEqual(expected_result, given_result, match)
+
+    def test_find_extracts_by_filename_match_invalid(self):
+        """
+        Testing that an invalid filename match raises an exception.
+        :return:
+        """
+        with self.assertRaises(Exception) as context:
+            self.process_tracker.find_extracts_by_filename(
+                filename="sales", match="regex"
+            )
+
+        self.assertTrue(
+            "regex is not a valid filename match." in str(context.exception)
+        )
+
     def test_find_extracts_by_filename_partial(self):
         """
         Testing that for the given partial filename, find the extracts, provided they are in 'ready' state. Should return in
@@ -347,10 +849,10 @@ class TestProcessTracker(unittest.TestCase):
 
     def test_find_extracts_by_location_name_custom_status(self):
         """
-         Testing that for the given location name and custom status, find the extracts.  Should return
-         them in ascending order by registration datettime.
-         :return:
-         """
+        Testing that for the given location name and custom status, find the extracts.  Should return
+        them in ascending order by registration datettime.
+        :return:
+        """
         extract = ExtractTracker(
             process_run=self.process_tracker,
             filename="test_extract_filename4-1.csv",
@@ -465,10 +967,10 @@ class TestProcessTracker(unittest.TestCase):
 
     def test_find_extracts_by_location_path_custom_status(self):
         """
-                Testing that for the given location path and custom status, find the extracts.  Should return
-                them in ascending order by registration datettime.
-                :return:
-                """
+        Testing that for the given location path and custom status, find the extracts.  Should return
+        them in ascending order by registration datettime.
+        :return:
+        """
         extract = ExtractTracker(
             process_run=self.process_tracker,
             filename="test_extract_filename4-1.csv",
@@ -821,10 +1323,255 @@ class TestProcessTracker(unittest.TestCase):
             in str(context.exception)
         )
 
+    def test_iter_extracts_by_filename(self):
+        """
+        Testing that extracts matching the filename are yielded across pages, in registration order, and can be turned
+        into extract trackers.
+        :return:
+        """
+        self.process_tracker.register_extracts(
+            files=[
+                "test_iter_filename1.csv",
+                "test_iter_filename2.csv",
+                "test_iter_filename3.csv",
+                "test_other_filename.csv",
+            ],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+
+        extracts = list(
+            self.process_tracker.iter_extracts_by_filename(
+                filename="test_iter", page_size=2
+            )
+        )
+
+        expected_result = [
+            "test_iter_filename1.csv",
+            "test_iter_filename2.csv",
+            "test_iter_filename3.csv",
+        ]
+        given_result = [extract.extract_filename for extract in extracts]
+
+        self.assertEqual(expected_result, given_result)
+
+        given_result = extracts[0].extract_tracker(process_run=self.process_tracker)
+
+        self.assertEqual(extracts[0].extract_id, given_result.extract.extract_id)
+        self.assertEqual(
+            extracts[0].full_filepath(), given_result.extract.full_filepath()
+        )
+
+    def test_iter_extracts_by_location(self):
+        """
+        Testing that extracts changing status while being worked through are neither skipped nor returned twice.
+        :return:
+        """
+        self.process_tracker.register_extracts(
+            files=["test_iter_filename%s.csv" % number for number in range(5)],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+
+        given_result = list()
+
+        for extract in self.process_tracker.iter_extracts_by_location(
+            location_path="/home/test/extract_dir", page_size=2
+        ):
+            given_result.append(extract.extract_filename)
+
+            self.process_tracker.update_extract_status(
+                extracts=[extract], extract_status="loading"
+            )
+
+        expected_result = ["test_iter_filename%s.csv" % number for number in range(5)]
+
+        self.assertEqual(expected_result, given_result)
+
+    def test_iter_extracts_by_process(self):
+        """
+        Testing that extracts used by several runs of the process are only yielded once.
+        :return:
+        """
+        extracts = self.process_tracker.register_extracts(
+            files=["test_iter_filename1.csv", "test_iter_filename2.csv"],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+        self.process_tracker.change_run_status("completed")
+
+        process_run = ProcessTracker(
+            process_name="Testing Process Tracking Initialization",
+            process_type="Extract",
+            actor_name="UnitTesting",
+            tool_name="Spark",
+            sources="Unittests",
+            targets="Unittests",
+            dataset_types="Category 1",
+        )
+        process_run.register_extracts(
+            files=["test_iter_filename1.csv", "test_iter_filename2.csv"],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+
+        given_result = list(
+            process_run.iter_extracts_by_process(
+                extract_process_name="Testing Process Tracking Initialization"
+            )
+        )
+
+        self.assertEqual(extracts, given_result)
+
+    def test_register_extracts(self):
+        """
+        Testing that extracts registered in bulk are set to the status, associated to the process run, dataset types and
+        sources, and returned as references in the order provided.
+        :return:
+        """
+        given_result = self.process_tracker.register_extracts(
+            files=["test_bulk_2.csv", "test_bulk_1.csv"],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+
+        self.assertEqual(
+            ["test_bulk_2.csv", "test_bulk_1.csv"],
+            [reference.extract_filename for reference in given_result],
+        )
+        self.assertEqual(
+            str(Path("/home/test/extract_dir").joinpath("test_bulk_2.csv")),
+            given_result[0].full_filepath(),
+        )
+
+        extract_ids = [reference.extract_id for reference in given_result]
+
+        extracts = (
+            self.session.query(Extract.extract_id, ExtractStatus.extract_status_name)
+            .join(ExtractStatus)
+            .filter(Extract.extract_id.in_(extract_ids))
+        )
+        extract_processes = self.session.query(ExtractProcess).filter(
+            ExtractProcess.process_tracking_id
+            == self.process_tracker.process_tracking_run.process_tracking_id
+        )
+
+        self.assertEqual(
+            {"ready"}, set(extract.extract_status_name for extract in extracts)
+        )
+        self.assertEqual(
+            sorted(extract_ids),
+            sorted(process.extract_tracking_id for process in extract_processes),
+        )
+        self.assertEqual(
+            {self.data_store.get_lookup_names(model=ExtractStatus)["ready"]},
+            set(process.extract_process_status_id for process in extract_processes),
+        )
+        self.assertEqual(
+            2,
+            self.session.query(ExtractDatasetType)
+            .filter(ExtractDatasetType.extract_id.in_(extract_ids))
+            .count(),
+        )
+        self.assertEqual(
+            2,
+            self.session.query(ExtractSource)
+            .filter(ExtractSource.extract_id.in_(extract_ids))
+            .count(),
+        )
+
+    def test_register_extracts_existing(self):
+        """
+        Testing that registering extracts that are already registered keeps the existing extracts and changes their
+        status.
+        :return:
+        """
+        extract = ExtractTracker(
+            process_run=self.process_tracker,
+            filename="test_bulk_1.csv",
+            location_path="/home/test/extract_dir",
+        )
+
+        given_result = self.process_tracker.register_extracts(
+            files=["test_bulk_1.csv", "test_bulk_2.csv"],
+            location=extract.location,
+            status="ready",
+        )
+
+        # Ending the read transaction, so the query sees the extracts registered by the process tracker.
+        self.session.commit()
+
+        registered_extract = self.session.query(Extract).get(extract.extract.extract_id)
+
+        self.assertEqual(extract.extract.extract_id, given_result[0].extract_id)
+        self.assertEqual(
+            extract.extract_status_ready, registered_extract.extract_status_id
+        )
+        self.assertEqual(
+            2,
+            self.session.query(Extract)
+            .filter(Extract.extract_filename.like("test_bulk_%"))
+            .count(),
+        )
+
+    def test_register_extracts_dependency_hold(self):
+        """
+        Testing that registering extracts as 'loading' fails before anything is written if any of them depends on an
+        extract that is not loaded.
+        :return:
+        """
+        parent, child = self.process_tracker.register_extracts(
+            files=["test_bulk_1.csv", "test_bulk_2.csv"],
+            location_path="/home/test/extract_dir",
+            status="ready",
+        )
+
+        self.session.add(
+            ExtractDependency(
+                parent_extract_id=parent.extract_id, child_extract_id=child.extract_id
+            )
+        )
+        self.session.commit()
+
+        with self.assertRaises(Exception) as context:
+            self.process_tracker.register_extracts(
+                files=["test_bulk_2.csv", "test_bulk_3.csv"],
+                location_path="/home/test/extract_dir",
+                status="loading",
+            )
+
+        self.process_tracker.data_store.commit()
+
+        self.assertTrue(
+            "are dependent on have not been loaded" in str(context.exception)
+        )
+        self.assertEqual(
+            2,
+            self.session.query(Extract)
+            .filter(Extract.extract_filename.like("test_bulk_%"))
+            .count(),
+        )
+
+    def test_register_extracts_invalid_status(self):
+        """
+        Testing that registering extracts with an invalid status raises an exception.
+        :return:
+        """
+        with self.assertRaises(Exception) as context:
+            self.process_tracker.register_extracts(
+                files=["test_bulk_1.csv"],
+                location_path="/home/test/extract_dir",
+                status="not a status",
+            )
+
+        self.assertTrue(
+            "not a status is not a valid extract status type." in str(context.exception)
+        )
+
     def test_register_extracts_by_location_local_file_count(self):
         """
         Testing that when the location is local, all the extracts are counted and registered in the location's file count.
-        :return: 
+        :return:
         """
         with patch("os.listdir") as mocked_os_listdir:
             mocked_os_listdir.return_value = [
@@ -1047,6 +1794,88 @@ class TestProcessTracker(unittest.TestCase):
             in str(context.exception)
         )
 
+    def test_register_new_process_run_locked(self):
+        """
+        Testing that a new run record is not created while another worker holds the process' lock, and that the lock
+        error is raised straight away.
+        :return:
+        """
+        lock_holder = DataStore()
+
+        self.process_tracker.change_run_status(new_status="completed")
+
+        with lock_holder.process_lock(process=self.process_tracker.process):
+            with self.assertRaises(ProcessRunLockError):
+                self.process_tracker.register_new_process_run()
+
+        lock_holder.close()
+
+        given_result = (
+            self.session.query(ProcessTracking)
+            .filter(ProcessTracking.process_id == self.process_id)
+            .count()
+        )
+
+        self.assertEqual(1, given_result)
+
+    def test_register_new_process_run_lock_held_across_commit(self):
+        """
+        Testing that a worker admitting a run keeps the process' lock when its session commits, so a second concurrent
+        admission is refused.
+        :return:
+        """
+        lock_holder = DataStore()
+
+        self.process_tracker.change_run_status(new_status="completed")
+
+        with lock_holder.process_lock(process=self.process_tracker.process):
+            lock_holder.commit()
+
+            with self.assertRaises(ProcessRunLockError):
+                self.process_tracker.register_new_process_run()
+
+        lock_holder.close()
+
+    def test_register_new_process_run_within_batch(self):
+        """
+        Testing that a run admitted within a batch is committed before the process' lock is released, so other workers
+        see it straight away.
+        :return:
+        """
+        self.process_tracker.change_run_status(new_status="completed")
+        self.process_tracker.process_run_name = (
+            "Testing Process Tracking Initialization 02"
+        )
+
+        with self.process_tracker.batch():
+            self.process_tracker.register_new_process_run()
+
+            data_store = DataStore()
+            given_result = (
+                data_store.session.query(ProcessTracking)
+                .filter(ProcessTracking.process_id == self.process_id)
+                .count()
+            )
+            data_store.close()
+
+        self.assertEqual(2, given_result)
+
+    def test_register_new_process_run_lock_released(self):
+        """
+        Testing that the process' lock is released once the run is registered, so the next run can be admitted.
+        :return:
+        """
+        self.process_tracker.change_run_status(new_status="completed")
+        self.process_tracker.process_run_name = (
+            "Testing Process Tracking Initialization 02"
+        )
+        self.process_tracker.register_new_process_run()
+
+        with self.process_tracker.data_store.process_lock(
+            process=self.process_tracker.process
+        ):
+            pass
+
     def test_register_new_process_run_with_previous_run(self):
         """
         Testing that a new run record is created if there is another instance of same process in 'completed' or 'failed'
@@ -1071,54 +1900,156 @@ class TestProcessTracker(unittest.TestCase):
 
         self.assertEqual(expected_result, given_result)
 
-    def test_register_new_process_run_dependencies_completed(self):
+    def test_register_new_process_run_dependencies_completed(self):
+        """
+        Testing that for a given process, if there are completed dependencies, then the process run is created.
+        :return:
+        """
+        dependent_process = ProcessTracker(
+            process_name="Testing Process Tracking Dependency",
+            process_type="Extract",
+            actor_name="UnitTesting",
+            tool_name="Spark",
+        )
+
+        dependent_process.change_run_status(new_status="completed")
+        self.process_tracker.change_run_status(new_status="completed")
+        self.data_store.get_or_create_item(
+            model=ProcessDependency,
+            parent_process_id=dependent_process.process_tracking_run.process_id,
+            child_process_id=self.process_id,
+        )
+
+        self.process_tracker.process_run_name = (
+            "Testing Process Tracking Initialization 02"
+        )
+        self.process_tracker.register_new_process_run()
+
+        given_count = (
+            self.session.query(ProcessTracking)
+            .filter(ProcessTracking.process_id == self.process_id)
+            .count()
+        )
+
+        expected_count = 2
+
+        self.assertEqual(expected_count, given_count)
+
+    def test_register_new_process_run_dependencies_running(self):
+        """
+        Testing that for a given process, if there are running dependencies, then the process run is prevented from starting.
+        :return:
+        """
+        dependent_process = ProcessTracker(
+            process_name="Testing Process Tracking Dependency Running",
+            process_type="Extract",
+            actor_name="UnitTesting",
+            tool_name="Spark",
+        )
+
+        dependent_process.change_run_status(new_status="running")
+        self.process_tracker.change_run_status(new_status="completed")
+        self.data_store.get_or_create_item(
+            model=ProcessDependency,
+            parent_process_id=dependent_process.process_tracking_run.process_id,
+            child_process_id=self.process_id,
+        )
+
+        with self.assertRaises(Exception) as context:
+            self.process_tracker.register_new_process_run()
+
+        return self.assertTrue(
+            "Processes that this process is dependent on are running or failed."
+            in str(context.exception)
+        )
+
+    def test_register_new_process_run_dependencies_failed(self):
+        """
+        Testing that for a given process, if there are failed dependencies, then the process run is prevented from starting.
+        :return:
+        """
+        dependent_process = ProcessTracker(
+            process_name="Testing Process Tracking Dependency Failed",
+            process_type="Extract",
+            actor_name="UnitTesting",
+            tool_name="Spark",
+        )
+
+        dependent_process.change_run_status(new_status="failed")
+        self.process_tracker.change_run_status(new_status="completed")
+        self.data_store.get_or_create_item(
+            model=ProcessDependency,
+            parent_process_id=dependent_process.process_tracking_run.process_id,
+            child_process_id=self.process_id,
+        )
+
+        with self.assertRaises(Exception) as context:
+            self.process_tracker.register_new_process_run()
+
+        return self.assertTrue(
+            "Processes that this process is dependent on are running or failed."
+            in str(context.exception)
+        )
+
+    def test_determine_run_admission_dependency_without_run_state(self):
         """
-        Testing that for a given process, if there are completed dependencies, then the process run is created.
+        Testing that dependencies without a run state are checked against their run history, so run admission from the
+        run state and from the run history agree.
         :return:
         """
-        dependent_process = ProcessTracker(
-            process_name="Testing Process Tracking Dependency",
+        completed_process = ProcessTracker(
+            process_name="Testing Process Tracking Dependency Completed",
             process_type="Extract",
             actor_name="UnitTesting",
             tool_name="Spark",
         )
+        completed_process.change_run_status(new_status="completed")
 
-        dependent_process.change_run_status(new_status="completed")
-        self.process_tracker.change_run_status(new_status="completed")
-        self.data_store.get_or_create_item(
-            model=ProcessDependency,
-            parent_process_id=dependent_process.process_tracking_run.process_id,
-            child_process_id=self.process_id,
+        failed_process = ProcessTracker(
+            process_name="Testing Process Tracking Dependency Failed",
+            process_type="Extract",
+            actor_name="UnitTesting",
+            tool_name="Spark",
         )
+        failed_process.change_run_status(new_status="failed")
 
-        self.process_tracker.process_run_name = (
-            "Testing Process Tracking Initialization 02"
-        )
-        self.process_tracker.register_new_process_run()
+        for parent_process in [completed_process, failed_process]:
+            self.data_store.get_or_create_item(
+                model=ProcessDependency,
+                parent_process_id=parent_process.process.process_id,
+                child_process_id=self.process_id,
+            )
 
-        given_count = (
-            self.session.query(ProcessTracking)
-            .filter(ProcessTracking.process_id == self.process_id)
-            .count()
-        )
+        self.session.query(ProcessRunState).filter(
+            ProcessRunState.process_id == failed_process.process.process_id
+        ).delete(synchronize_session=False)
+        self.session.commit()
 
-        expected_count = 2
+        given_result = self.process_tracker.determine_run_admission(
+            rebuild_run_state=False
+        )
+        expected_result = self.process_tracker.determine_run_admission_from_history()
 
-        self.assertEqual(expected_count, given_count)
+        self.assertEqual(1, given_result["dependency_hold_count"])
+        self.assertEqual(
+            expected_result["dependency_hold_count"],
+            given_result["dependency_hold_count"],
+        )
 
-    def test_register_new_process_run_dependencies_running(self):
+    def test_register_new_process_run_rebuilds_run_state(self):
         """
-        Testing that for a given process, if there are running dependencies, then the process run is prevented from starting.
+        Testing that if a process has no run state, i.e. it was tracked before the run state was kept, the run state of
+        the process and its dependencies is rebuilt from their run history, so failed dependencies still hold it back.
         :return:
         """
         dependent_process = ProcessTracker(
-            process_name="Testing Process Tracking Dependency Running",
+            process_name="Testing Process Tracking Dependency Failed",
             process_type="Extract",
             actor_name="UnitTesting",
             tool_name="Spark",
         )
 
-        dependent_process.change_run_status(new_status="running")
+        dependent_process.change_run_status(new_status="failed")
         self.process_tracker.change_run_status(new_status="completed")
         self.data_store.get_or_create_item(
             model=ProcessDependency,
@@ -1126,32 +2057,73 @@ class TestProcessTracker(unittest.TestCase):
             child_process_id=self.process_id,
         )
 
+        self.session.query(ProcessRunState).delete()
+        self.session.commit()
+
         with self.assertRaises(Exception) as context:
             self.process_tracker.register_new_process_run()
 
-        return self.assertTrue(
+        self.assertTrue(
             "Processes that this process is dependent on are running or failed."
             in str(context.exception)
         )
 
-    def test_register_new_process_run_dependencies_failed(self):
+        given_result = self.session.query(ProcessRunState).get(
+            dependent_process.process_tracking_run.process_id
+        )
+
+        self.assertEqual(
+            dependent_process.process_tracking_run.process_tracking_id,
+            given_result.process_tracking_id,
+        )
+        self.assertEqual(
+            dependent_process.process_status_failed, given_result.process_status_id
+        )
+        self.assertEqual(1, given_result.consecutive_failure_count)
+
+        given_result = self.session.query(ProcessRunState).get(self.process_id)
+
+        self.assertEqual(
+            self.process_tracker.process_status_complete,
+            given_result.process_status_id,
+        )
+        self.assertEqual(0, given_result.consecutive_failure_count)
+
+    def test_register_new_process_run_dependencies_transitive_failed(self):
         """
-        Testing that for a given process, if there are failed dependencies, then the process run is prevented from starting.
+        Testing that for a given process, if a dependency of its dependencies failed, then the process run is prevented
+        from starting.
         :return:
         """
-        dependent_process = ProcessTracker(
-            process_name="Testing Process Tracking Dependency Failed",
+        grandparent_process = ProcessTracker(
+            process_name="Testing Process Tracking Dependency Grandparent",
             process_type="Extract",
             actor_name="UnitTesting",
             tool_name="Spark",
         )
+        grandparent_process.change_run_status(new_status="failed")
+
+        parent_process = ProcessTracker(
+            process_name="Testing Process Tracking Dependency Parent",
+            process_type="Extract",
+            actor_name="UnitTesting",
+            tool_name="Spark",
+        )
+        parent_process.change_run_status(new_status="completed")
 
-        dependent_process.change_run_status(new_status="failed")
         self.process_tracker.change_run_status(new_status="completed")
-        self.data_store.get_or_create_item(
-            model=ProcessDependency,
-            parent_process_id=dependent_process.process_tracking_run.process_id,
-            child_process_id=self.process_id,
+
+        self.data_store.topic_creator(
+            topic="process dependency",
+            name=None,
+            parent="Testing Process Tracking Dependency Grandparent",
+            child="Testing Process Tracking Dependency Parent",
+        )
+        self.data_store.topic_creator(
+            topic="process dependency",
+            name=None,
+            parent="Testing Process Tracking Dependency Parent",
+            child="Testing Process Tracking Initialization",
         )
 
         with self.assertRaises(Exception) as context:
@@ -1433,7 +2405,7 @@ class TestProcessTracker(unittest.TestCase):
         """
         Testing that when a new process is registered with target_objects, and target_objects is not in dict format,
         throw an error.
-        :return: 
+        :return:
         """
 
         with self.assertRaises(Exception) as context:
@@ -1481,9 +2453,9 @@ class TestProcessTracker(unittest.TestCase):
 
     def test_register_process_target_objects_one_target(self):
         """
-         Testing that when a new process is registered with source_objects, those source objects are registered as well.
-         :return:
-         """
+        Testing that when a new process is registered with source_objects, those source objects are registered as well.
+        :return:
+        """
 
         self.process_tracker = ProcessTracker(
             process_name="Loading Target Objects",
@@ -1507,10 +2479,10 @@ class TestProcessTracker(unittest.TestCase):
 
     def test_register_process_target_objects_two_targets(self):
         """
-         Testing that when a new process is registered with multiple source objects, those source objects are
-         registered as well.
-         :return:
-         """
+        Testing that when a new process is registered with multiple source objects, those source objects are
+        registered as well.
+        :return:
+        """
 
         self.process_tracker = ProcessTracker(
             process_name="Loading Target Objects",
@@ -2314,3 +3286,331 @@ class TestProcessTracker(unittest.TestCase):
         expected_result = "Extract"
 
         return self.assertEqual(expected_result, given_result)
+
+    def test_process_definition_unchanged_skips_registration(self):
+        """
+        Testing that when a process is run again with the same definition, its sources, targets and dataset types are
+        loaded instead of registered again.
+        :return:
+        """
+        self.process_tracker.change_run_status("completed")
+
+        with patch.object(
+            ProcessTracker, "register_process_definition"
+        ) as mocked_registration:
+            process = ProcessTracker(
+                process_name="Testing Process Tracking Initialization",
+                process_type="Extract",
+                actor_name="UnitTesting",
+                tool_name="Spark",
+                sources="Unittests",
+                targets="Unittests",
+                dataset_types="Category 1",
+            )
+
+        mocked_registration.assert_not_called()
+
+        self.assertEqual(
+            [source.source_id for source in self.process_tracker.sources],
+            [source.source_id for source in process.sources],
+        )
+        self.assertEqual(
+            [target.source_id for target in self.process_tracker.targets],
+            [target.source_id for target in process.targets],
+        )
+        self.assertEqual(
+            [
+                dataset_type.dataset_type_id
+                for dataset_type in self.process_tracker.dataset_types
+            ],
+            [dataset_type.dataset_type_id for dataset_type in process.dataset_types],
+        )
+
+    def test_process_definition_changed_registers(self):
+        """
+        Testing that when a process is run again with a changed definition, the new definition is registered.
+        :return:
+        """
+        self.process_tracker.change_run_status("completed")
+
+        process = ProcessTracker(
+            process_name="Testing Process Tracking Initialization",
+            process_type="Extract",
+            actor_name="UnitTesting",
+            tool_name="Spark",
+            source_objects={"Unittests": ["Table1"]},
+            targets="Unittests",
+            dataset_types="Category 1",
+        )
+
+        given_result = (
+            self.session.query(SourceObject.source_object_name)
+            .join(ProcessSourceObject)
+            .filter(ProcessSourceObject.process_id == process.process.process_id)
+            .all()
+        )
+
+        self.assertEqual([("Table1",)], given_result)
+        self.assertNotEqual(
+            self.process_tracker.process.process_definition_hash,
+            process.process.process_definition_hash,
+        )
+
+    def test_process_definition_hash_ignores_order(self):
+        """
+        Testing that the order sources are provided in does not change the process definition fingerprint.
+        :return:
+        """
+        first_hash = self.process_tracker.determine_process_definition_hash()
+
+        self.process_tracker.sources = ["Source B", "Source A"]
+        second_hash = self.process_tracker.determine_process_definition_hash()
+
+        self.process_tracker.sources = ["Source A", "Source B"]
+        third_hash = self.process_tracker.determine_process_definition_hash()
+
+        self.assertNotEqual(first_hash, second_hash)
+        self.assertEqual(second_hash, third_hash)
+
+    def test_existing_process_preloaded(self):
+        """
+        Testing that when an existing process is run again, it is loaded with its context and latest run instead of
+        each being looked up or created separately.
+        :return:
+        """
+        self.process_tracker.change_run_status("completed")
+
+        with patch.object(
+            DataStore,
+            "get_or_create_item",
+            autospec=True,
+            side_effect=DataStore.get_or_create_item,
+        ) as mocked_get_or_create:
+            process = ProcessTracker(
+                process_name="Testing Process Tracking Initialization",
+                process_type="Extract",
+                actor_name="UnitTesting",
+                tool_name="Spark",
+                sources="Unittests",
+                targets="Unittests",
+                dataset_types="Category 1",
+            )
+
+        given_models = [
+            call[1]["model"] for call in mocked_get_or_create.call_args_list
+        ]
+
+        self.assertNotIn(Process, given_models)
+        self.assertEqual(self.process_id, process.process.process_id)
+        self.assertEqual("Spark", process.tool.tool_name)
+        self.assertEqual(
+            self.process_tracker.process_tracking_run.process_run_id + 1,
+            process.process_tracking_run.process_run_id,
+        )
+
+    def test_determine_process_sources_and_targets(self):
+        """
+        Testing that a process' sources and targets are found at their lowest granularity in one query.
+        :return:
+        """
+        process = ProcessTracker(
+            process_name="Testing Process Sources and Targets",
+            process_type="Extract",
+            actor_name="UnitTesting",
+            tool_name="Spark",
+            source_objects={"Unittests": ["Table2", "Table1"]},
+            targets="Unittest Target",
+        )
+
+        given_result = process.determine_process_sources_and_targets(
+            process_run_id=process.process_tracking_run.process_tracking_id
+        )
+
+        self.assertEqual(
+            [("Unittests", "Table1"), ("Unittests", "Table2")],
+            [
+                (reference.source_name, reference.source_object_name)
+                for reference in given_result["sources"]
+            ],
+        )
+        self.assertEqual(
+            ["source_object", "source_object"],
+            [reference.granularity for reference in given_result["sources"]],
+        )
+        self.assertEqual(
+            [("source", "Unittest Target")],
+            [
+                (reference.granularity, reference.source_name)
+                for reference in given_result["targets"]
+            ],
+        )
+
+    def test_determine_run_admission(self):
+        """
+        Testing that the latest run, dependency holds and recent failures are found together for run admission.
+        :return:
+        """
+        self.process_tracker.change_run_status("failed")
+
+        given_result = self.process_tracker.determine_run_admission()
+
+        self.assertEqual(
+            self.process_tracker.process_tracking_run.process_tracking_id,
+            given_result["last_run_tracking_id"],
+        )
+        self.assertEqual(
+            self.process_tracker.process_tracking_run.process_run_id,
+            given_result["last_run_id"],
+        )
+        self.assertEqual(
+            self.process_tracker.process_status_failed,
+            given_result["last_run_status_id"],
+        )
+        self.assertEqual(0, given_result["dependency_hold_count"])
+        self.assertEqual(1, given_result["failure_count"])
+
+    def test_process_run_state(self):
+        """
+        Testing that the process run state follows the current run, counting failed runs in a row until a run
+        completes.
+        :return:
+        """
+        self.process_tracker.change_run_status("failed")
+
+        process_run = ProcessTracker(
+            process_name="Testing Process Tracking Initialization",
+            process_type="Extract",
+            actor_name="UnitTesting",
+            tool_name="Spark",
+        )
+
+        given_result = self.session.query(ProcessRunState).get(self.process_id)
+
+        self.assertEqual(
+            process_run.process_tracking_run.process_tracking_id,
+            given_result.process_tracking_id,
+        )
+        self.assertEqual(2, given_result.process_run_id)
+        self.assertEqual(
+            process_run.process_status_running, given_result.process_status_id
+        )
+        self.assertEqual(1, given_result.consecutive_failure_count)
+
+        process_run.change_run_status("failed")
+        # Ending the read transaction, so the refresh sees the state changed by the process run.
+        self.session.commit()
+        self.session.refresh(given_result)
+
+        self.assertEqual(2, given_result.consecutive_failure_count)
+
+        process_run = ProcessTracker(
+            process_name="Testing Process Tracking Initialization",
+            process_type="Extract",
+            actor_name="UnitTesting",
+            tool_name="Spark",
+        )
+        process_run.change_run_status("completed")
+        self.session.commit()
+        self.session.refresh(given_result)
+
+        self.assertEqual(3, given_result.process_run_id)
+        self.assertEqual(
+            process_run.process_status_complete, given_result.process_status_id
+        )
+        self.assertEqual(0, given_result.consecutive_failure_count)
+
+    def test_add_process_run_record_count_close(self):
+        """
+        Testing that buffered record counts are flushed when the process tracker is closed.
+        :return:
+        """
+        self.process_tracker.add_process_run_record_count(
+            num_records=100, processing_type="insert"
+        )
+
+        self.process_tracker.close()
+
+        given_result = self.session.query(ProcessTracking).get(
+            self.process_tracker.process_tracking_run.process_tracking_id
+        )
+
+        self.assertEqual(
+            [100, 100],
+            [
+                given_result.process_run_record_count,
+                given_result.process_run_insert_count,
+            ],
+        )
+
+    def test_add_process_run_record_count(self):
+        """
+        Testing that added record counts are buffered until the run's status changes, then added to the process run's
+        and the process' counts.
+        :return:
+        """
+        self.process_tracker.add_process_run_record_count(
+            num_records=100, processing_type="insert"
+        )
+        self.process_tracker.add_process_run_record_count(
+            num_records=50, processing_type="update"
+        )
+        self.process_tracker.add_process_run_record_count(num_records=25)
+
+        given_result = self.session.query(ProcessTracking).get(
+            self.process_tracker.process_tracking_run.process_tracking_id
+        )
+
+        self.assertEqual(0, given_result.process_run_record_count or 0)
+
+        self.process_tracker.change_run_status("completed")
+        # Ending the read transaction, so the refresh sees the counts flushed by the process tracker.
+        self.session.commit()
+        self.session.refresh(given_result)
+
+        expected_result = [175, 100, 50, 175]
+        given_result = [
+            given_result.process_run_record_count,
+            given_result.process_run_insert_count,
+            given_result.process_run_update_count,
+            self.session.query(Process).get(self.process_id).total_record_count,
+        ]
+
+        self.assertEqual(expected_result, given_result)
+        self.assertEqual(
+            175, self.process_tracker.process_tracking_run.process_run_record_count
+        )
+
+    def test_add_process_run_record_count_concurrent(self):
+        """
+        Testing that flushing the buffered record counts adds to counts written by other workers instead of overwriting
+        them.
+        :return:
+        """
+        self.process_tracker.add_process_run_record_count(num_records=100)
+
+        self.session.query(ProcessTracking).filter(
+            ProcessTracking.process_tracking_id
+            == self.process_tracker.process_tracking_run.process_tracking_id
+        ).update({ProcessTracking.process_run_record_count: 1000})
+        self.session.commit()
+
+        self.process_tracker.flush_process_run_record_count()
+
+        given_result = self.session.query(ProcessTracking).get(
+            self.process_tracker.process_tracking_run.process_tracking_id
+        )
+        self.session.refresh(given_result)
+
+        self.assertEqual(1100, given_result.process_run_record_count)
+
+    def test_add_process_run_record_count_invalid_type(self):
+        """
+        Testing that if an invalid processing type is provided, an exception is raised.
+        :return:
+        """
+        with self.assertRaises(Exception) as context:
+            self.process_tracker.add_process_run_record_count(
+                num_records=100, processing_type="delete"
+            )
+
+        self.assertTrue("Processing type not recognized." in str(context.exception))
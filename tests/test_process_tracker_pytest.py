@@ -4,7 +4,12 @@ from process_tracker.extract_tracker import ExtractTracker
 from process_tracker.process_tracker import ProcessTracker
 from process_tracker.utilities import utilities
 
-from process_tracker.models.extract import Extract, ExtractDatasetType, ExtractProcess
+from process_tracker.models.extract import (
+    Extract,
+    ExtractDatasetType,
+    ExtractFilenameToken,
+    ExtractProcess,
+)
 from process_tracker.models.source import SourceDatasetType, SourceObjectDatasetType
 from process_tracker.models.process import ErrorTracking, ErrorType, ProcessDatasetType
 
@@ -29,6 +34,7 @@ class TestProcessTracker:
         session.query(SourceDatasetType).delete()
         session.query(SourceObjectDatasetType).delete()
         session.query(ProcessDatasetType).delete()
+        session.query(ExtractFilenameToken).delete()
         session.query(Extract).delete()
         session.query(ErrorType).delete()
         session.commit()
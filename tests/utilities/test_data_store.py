@@ -0,0 +1,538 @@
+# Tests for validating the data store helpers that are not driven by the cli.
+import unittest
+from unittest.mock import patch
+
+from process_tracker.models.actor import Actor
+from process_tracker.models.extract import ExtractStatus
+from process_tracker.models.process import ProcessTracking
+from process_tracker.models.source import DatasetType, Source, SourceDatasetType
+from process_tracker.utilities.data_store import (
+    DataStore,
+    embedded_data_stores,
+    query_stats,
+    verified_data_stores,
+)
+
+
+class TestDataStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data_store = DataStore()
+        cls.session = cls.data_store.session
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.session.close()
+
+    def tearDown(self):
+        self.session.query(SourceDatasetType).filter(
+            SourceDatasetType.dataset_type_id.in_(
+                self.session.query(DatasetType.dataset_type_id).filter(
+                    DatasetType.dataset_type.like("Bulk Dataset%")
+                )
+            )
+        ).delete(synchronize_session=False)
+        self.session.query(DatasetType).filter(
+            DatasetType.dataset_type.like("Bulk Dataset%")
+        ).delete(synchronize_session=False)
+        self.session.query(Source).filter(
+            Source.source_name.like("Bulk Source%")
+        ).delete(synchronize_session=False)
+        self.session.query(Actor).filter(Actor.actor_name.like("Cached Actor%")).delete(
+            synchronize_session=False
+        )
+        self.session.commit()
+        self.data_store.invalidate_lookup_cache()
+
+    def test_create_missing_indexes(self):
+        """
+        Testing that indexes declared on the models but missing from the data store are found and created.
+        :return:
+        """
+        if self.data_store.data_store_type == "mysql":
+            self.skipTest("MySQL will not drop an index a foreign key relies on.")
+
+        index = [
+            index
+            for index in ProcessTracking.__table__.indexes
+            if index.name == "process_tracking_idx05"
+        ][0]
+        index.drop(self.data_store.engine)
+
+        self.assertIn(index, self.data_store.determine_missing_indexes())
+
+        given_result = self.data_store.create_missing_indexes()
+
+        self.assertEqual([index], given_result)
+        self.assertEqual([], self.data_store.determine_missing_indexes())
+
+    def test_get_or_create_item_failure_within_batch(self):
+        """
+        Testing that when creating a record fails within a batch and the error is handled, only that record's writes are
+        undone and the batch's earlier writes are still committed.
+        :return:
+        """
+
+        def failing_upsert(model, **kwargs):
+            self.session.execute(
+                Source.__table__.insert(), {"source_name": "Bulk Source 2"}
+            )
+            raise Exception("Upsert failed.")
+
+        with self.data_store.batch():
+            self.data_store.get_or_create_item(
+                model=Source, source_name="Bulk Source 1"
+            )
+
+            with patch.object(
+                self.data_store, "upsert_item", side_effect=failing_upsert
+            ):
+                with self.assertRaises(Exception):
+                    self.data_store.get_or_create_item(
+                        model=Source, source_name="Bulk Source 3"
+                    )
+
+        given_result = [
+            source.source_name
+            for source in self.session.query(Source).filter(
+                Source.source_name.like("Bulk Source%")
+            )
+        ]
+
+        self.assertEqual(["Bulk Source 1"], given_result)
+
+    def test_get_or_create_many_creates_missing(self):
+        """
+        Testing that get_or_create_many creates all instances that do not exist and returns them in input order.
+        :return:
+        """
+        names = ["Bulk Source 2", "Bulk Source 1", "Bulk Source 3"]
+
+        given_result = self.data_store.get_or_create_many(
+            model=Source,
+            rows=[{"source_name": name} for name in names],
+            key_fields=["source_name"],
+        )
+
+        self.assertEqual(names, [source.source_name for source in given_result])
+        self.assertEqual(
+            3,
+            self.session.query(Source).filter(Source.source_name.in_(names)).count(),
+        )
+
+    def test_get_or_create_many_existing(self):
+        """
+        Testing that get_or_create_many returns existing instances instead of creating duplicates.
+        :return:
+        """
+        existing = self.data_store.get_or_create_item(
+            model=Source, source_name="Bulk Source 1"
+        )
+
+        given_result = self.data_store.get_or_create_many(
+            model=Source,
+            rows=[
+                {"source_name": "Bulk Source 1"},
+                {"source_name": "Bulk Source 2"},
+                {"source_name": "Bulk Source 1"},
+            ],
+            key_fields=["source_name"],
+        )
+
+        self.assertEqual(existing.source_id, given_result[0].source_id)
+        self.assertEqual(existing.source_id, given_result[2].source_id)
+        self.assertEqual(
+            2,
+            self.session.query(Source)
+            .filter(Source.source_name.like("Bulk Source%"))
+            .count(),
+        )
+
+    def test_get_or_create_many_coerced_keys(self):
+        """
+        Testing that existing instances whose keys only match once the data store compares them, i.e. after coercing
+        values to the column type, are still found.
+        :return:
+        """
+        existing = self.data_store.get_or_create_item(
+            model=Source, source_name="Bulk Source 1"
+        )
+
+        given_result = self.data_store.get_or_create_many(
+            model=Source,
+            rows=[
+                {"source_id": str(existing.source_id), "source_name": "Bulk Source 1"}
+            ],
+            key_fields=["source_id", "source_name"],
+        )
+
+        self.assertEqual(existing.source_id, given_result[0].source_id)
+
+    def test_get_or_create_many_no_create(self):
+        """
+        Testing that if create is False and an instance does not exist, an exception is raised.
+        :return:
+        """
+        with self.assertRaises(Exception) as context:
+            self.data_store.get_or_create_many(
+                model=Source,
+                rows=[{"source_name": "Bulk Source 1"}],
+                key_fields=["source_name"],
+                create=False,
+            )
+
+        return self.assertTrue(
+            "There is no record match in source_lkup ." in str(context.exception)
+        )
+
+    def test_get_or_create_item_lookup_cached(self):
+        """
+        Testing that once a lookup record has been read, it is served from the lookup cache.
+        :return:
+        """
+        actor = self.data_store.get_or_create_item(
+            model=Actor, actor_name="Cached Actor"
+        )
+        self.data_store.get_or_create_item(model=Actor, actor_name="Cached Actor")
+
+        given_result = self.data_store.lookup_cache.get(
+            ("actor_lkup", "actor_name", "Cached Actor")
+        )
+
+        self.assertEqual(actor.actor_id, given_result)
+
+    def test_lookup_cache_per_data_store(self):
+        """
+        Testing that data stores connected to the same data store share a lookup cache, while a data store connected to
+        another one gets a cache of its own.
+        :return:
+        """
+        self.data_store.get_or_create_item(model=Actor, actor_name="Cached Actor")
+        self.data_store.get_or_create_item(model=Actor, actor_name="Cached Actor")
+
+        other_cache = self.data_store.get_lookup_cache(
+            connection_url="sqlite:///other_process_tracker.db"
+        )
+
+        self.assertIs(self.data_store.lookup_cache, DataStore().lookup_cache)
+        self.assertIsNot(self.data_store.lookup_cache, other_cache)
+        self.assertIsNotNone(
+            self.data_store.lookup_cache.get(
+                ("actor_lkup", "actor_name", "Cached Actor")
+            )
+        )
+        self.assertIsNone(other_cache.get(("actor_lkup", "actor_name", "Cached Actor")))
+
+    def test_get_lookup_names(self):
+        """
+        Testing that the name to id mapping for a lookup table is returned and includes preloaded values.
+        :return:
+        """
+        given_result = self.data_store.get_lookup_names(model=ExtractStatus)
+
+        self.assertIn("ready", given_result)
+
+    def test_topic_updater_invalidates_lookup_cache(self):
+        """
+        Testing that updating a lookup record through topic_updater removes the stale record from the lookup cache.
+        :return:
+        """
+        self.data_store.get_or_create_item(model=Actor, actor_name="Cached Actor")
+        self.data_store.get_or_create_item(model=Actor, actor_name="Cached Actor")
+
+        self.data_store.topic_updater(
+            topic="actor", initial_name="Cached Actor", name="Cached Actor 2"
+        )
+
+        with self.assertRaises(Exception) as context:
+            self.data_store.get_or_create_item(
+                model=Actor, create=False, actor_name="Cached Actor"
+            )
+
+        return self.assertTrue(
+            "There is no record match in actor_lkup ." in str(context.exception)
+        )
+
+    def test_data_stores_share_engine(self):
+        """
+        Testing that data stores connecting to the same data store reuse the same engine from the engine registry.
+        :return:
+        """
+        data_store = DataStore()
+
+        self.assertIs(self.data_store.engine, data_store.engine)
+
+    def test_determine_pool_settings(self):
+        """
+        Testing that pool settings provided in the config are passed on to the engine.
+        :return:
+        """
+        config = self.data_store.config["DEFAULT"]
+        config["data_store_pool_size"] = "7"
+        config["data_store_pool_pre_ping"] = "True"
+
+        try:
+            given_result = self.data_store.determine_pool_settings()
+        finally:
+            config.pop("data_store_pool_size")
+            config.pop("data_store_pool_pre_ping")
+
+        self.assertEqual(7, given_result["pool_size"])
+        self.assertTrue(given_result["pool_pre_ping"])
+
+    def test_batch_commits_on_exit(self):
+        """
+        Testing that commits within a batch are deferred until the batch exits.
+        :return:
+        """
+        with self.data_store.batch():
+            for name in ["Bulk Source 1", "Bulk Source 2"]:
+                self.data_store.get_or_create_item(model=Source, source_name=name)
+
+            given_pending = self.data_store.batch_pending
+
+        self.session.rollback()
+
+        self.assertEqual(2, given_pending)
+        self.assertEqual(
+            2,
+            self.session.query(Source)
+            .filter(Source.source_name.like("Bulk Source%"))
+            .count(),
+        )
+
+    def test_batch_rolls_back_on_error(self):
+        """
+        Testing that if a batch raises, its pending writes are rolled back and the original error is raised.
+        :return:
+        """
+        with self.assertRaises(ValueError):
+            with self.data_store.batch():
+                self.data_store.get_or_create_item(
+                    model=Source, source_name="Bulk Source 1"
+                )
+
+                raise ValueError("Batch failed.")
+
+        self.assertEqual(0, self.data_store.batch_depth)
+        self.assertEqual(
+            0,
+            self.session.query(Source)
+            .filter(Source.source_name.like("Bulk Source%"))
+            .count(),
+        )
+
+    def test_batch_commit_on_error(self):
+        """
+        Testing that if a batch opted in to commit_on_error raises, its pending writes are still committed.
+        :return:
+        """
+        with self.assertRaises(ValueError):
+            with self.data_store.batch(commit_on_error=True):
+                self.data_store.get_or_create_item(
+                    model=Source, source_name="Bulk Source 1"
+                )
+
+                raise ValueError("Batch failed.")
+
+        self.session.rollback()
+
+        self.assertEqual(
+            1,
+            self.session.query(Source)
+            .filter(Source.source_name.like("Bulk Source%"))
+            .count(),
+        )
+
+    def test_batch_size_commits_in_chunks(self):
+        """
+        Testing that a size bounded batch commits every 'size' writes.
+        :return:
+        """
+        with self.data_store.batch(size=2):
+            for name in ["Bulk Source 1", "Bulk Source 2", "Bulk Source 3"]:
+                self.data_store.get_or_create_item(model=Source, source_name=name)
+
+            given_result = self.data_store.batch_pending
+
+        self.assertEqual(1, given_result)
+
+    def test_insert_ignore_duplicates(self):
+        """
+        Testing that inserting instances that already exist skips them instead of failing.
+        :return:
+        """
+        self.data_store.get_or_create_item(model=Source, source_name="Bulk Source 1")
+
+        self.data_store.insert_ignore_duplicates(
+            model=Source,
+            rows=[{"source_name": "Bulk Source 1"}, {"source_name": "Bulk Source 2"}],
+            key_fields=["source_name"],
+        )
+        self.session.commit()
+
+        self.assertEqual(
+            2,
+            self.session.query(Source)
+            .filter(Source.source_name.like("Bulk Source%"))
+            .count(),
+        )
+
+    def test_upsert_item_existing(self):
+        """
+        Testing that upserting an instance that was already created, i.e. by a concurrent worker, returns the existing
+        instance and leaves the session usable.
+        :return:
+        """
+        existing = self.data_store.get_or_create_item(
+            model=Source, source_name="Bulk Source 1"
+        )
+
+        given_result = self.data_store.upsert_item(
+            model=Source, source_name="Bulk Source 1"
+        )
+        self.session.commit()
+
+        self.assertEqual(existing.source_id, given_result.source_id)
+
+    def test_upsert_item_existing_composite_key(self):
+        """
+        Testing that upserting an instance of a model keyed by several columns that already exists returns the existing
+        instance.
+        :return:
+        """
+        source = self.data_store.get_or_create_item(
+            model=Source, source_name="Bulk Source 1"
+        )
+        dataset_type = self.data_store.get_or_create_item(
+            model=DatasetType, dataset_type="Bulk Dataset 1"
+        )
+        self.data_store.get_or_create_item(
+            model=SourceDatasetType,
+            source_id=source.source_id,
+            dataset_type_id=dataset_type.dataset_type_id,
+        )
+
+        given_result = self.data_store.upsert_item(
+            model=SourceDatasetType,
+            source_id=source.source_id,
+            dataset_type_id=dataset_type.dataset_type_id,
+        )
+        self.session.commit()
+
+        self.assertEqual(
+            (source.source_id, dataset_type.dataset_type_id),
+            (given_result.source_id, given_result.dataset_type_id),
+        )
+
+    def test_session_opened_on_first_use(self):
+        """
+        Testing that a data store does not open its session until it is used.
+        :return:
+        """
+        data_store = DataStore()
+
+        self.assertIsNone(data_store.data_store_session)
+        self.assertIs(data_store.session, data_store.data_store_session)
+
+    def test_verify_data_store_exists_cached(self):
+        """
+        Testing that once the data store has been verified to exist, the check is cached for the process.
+        :return:
+        """
+        if self.data_store.data_store_type in embedded_data_stores:
+            self.skipTest("Embedded data stores are created on first connect.")
+
+        self.data_store.verify_data_store_exists()
+
+        self.assertIn(str(self.data_store.engine.url), verified_data_stores)
+
+    def test_sqlite_pragmas(self):
+        """
+        Testing that SQLite data store connections run in WAL mode.
+        :return:
+        """
+        if self.data_store.data_store_type != "sqlite":
+            self.skipTest("Only applies to SQLite data stores.")
+
+        given_result = self.session.execute("PRAGMA journal_mode").scalar()
+
+        self.assertEqual("wal", given_result)
+
+    def test_sqlite_reads_see_latest_commit(self):
+        """
+        Testing that a SQLite data store that has read sees records committed by another data store afterwards, and can
+        still write.
+        :return:
+        """
+        if self.data_store.data_store_type != "sqlite":
+            self.skipTest("Only applies to SQLite data stores.")
+
+        data_store = DataStore()
+        data_store.session.query(Source).count()
+
+        self.data_store.get_or_create_item(model=Source, source_name="Bulk Source 1")
+
+        given_result = (
+            data_store.session.query(Source)
+            .filter(Source.source_name == "Bulk Source 1")
+            .count()
+        )
+
+        data_store.get_or_create_item(model=Source, source_name="Bulk Source 2")
+        data_store.close()
+
+        self.assertEqual(1, given_result)
+
+    def test_stats_grouped_by_operation(self):
+        """
+        Testing that once statistics are enabled, statements are grouped by the data store method that issued them.
+        :return:
+        """
+        self.data_store.enable_stats()
+        query_stats.reset()
+
+        self.data_store.get_or_create_item(model=Actor, actor_name="Cached Actor Stats")
+
+        given_result = self.data_store.stats()
+        query_stats.reset()
+
+        self.assertIn("DataStore.get_or_create_item", given_result)
+        self.assertGreaterEqual(
+            given_result["DataStore.get_or_create_item"]["statements"], 1
+        )
+
+    def test_read_session_without_replica(self):
+        """
+        Testing that without a replica, read only queries use the data store session.
+        :return:
+        """
+        self.assertIs(self.data_store.session, self.data_store.read_session)
+
+    def test_read_session_replica(self):
+        """
+        Testing that with a replica, read only queries use the replica unless reads are routed to the primary.
+        :return:
+        """
+        data_store = DataStore()
+        data_store.config.add_section("replica")
+        data_store.configure_replica()
+
+        replica_session = data_store.read_session
+
+        self.assertIsNot(data_store.session, replica_session)
+        self.assertIsNotNone(
+            replica_session.query(ExtractStatus)
+            .filter(ExtractStatus.extract_status_name == "ready")
+            .first()
+        )
+
+        with data_store.read_from_primary():
+            self.assertIs(data_store.session, data_store.read_session)
+
+        with data_store.batch():
+            self.assertIs(data_store.session, data_store.read_session)
+
+        self.assertIs(replica_session, data_store.read_session)
+
+        data_store.close()
@@ -0,0 +1,105 @@
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from process_tracker.models.model_base import Base
+from process_tracker.models.process import (
+    Process,
+    ProcessDependency,
+    ProcessDependencyClosure,
+)
+from process_tracker.utilities.dependency_closure import rebuild_dependency_closure
+
+
+class TestDependencyClosure(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://").execution_options(
+            schema_translate_map={"process_tracker": None}
+        )
+        Base.metadata.create_all(engine)
+
+        self.session = sessionmaker(bind=engine)()
+
+        # grandparent -> parent -> child, with grandparent also a direct parent of child.
+        for process_id, process_name in [
+            (1, "grandparent"),
+            (2, "parent"),
+            (3, "child"),
+        ]:
+            self.session.add(Process(process_id=process_id, process_name=process_name))
+
+        self.session.flush()
+
+        self.add_dependency(parent_process_id=1, child_process_id=2)
+        self.add_dependency(parent_process_id=2, child_process_id=3)
+        self.add_dependency(parent_process_id=1, child_process_id=3)
+
+    def tearDown(self):
+        self.session.close()
+
+    def add_dependency(self, parent_process_id, child_process_id):
+        """
+        Helper function to add a process dependency through the session.
+        :return:
+        """
+        self.session.add(
+            ProcessDependency(
+                parent_process_id=parent_process_id, child_process_id=child_process_id
+            )
+        )
+        self.session.flush()
+
+    def get_closure(self):
+        """
+        Helper function to read the closure as a set of (ancestor, descendant) pairs.
+        :return:
+        """
+        return set(
+            (path.ancestor_process_id, path.descendant_process_id)
+            for path in self.session.query(ProcessDependencyClosure)
+        )
+
+    def test_add_dependency(self):
+        """
+        Testing that adding dependencies adds every ancestor of the child and of the processes depending on it.
+        :return:
+        """
+        given_result = self.get_closure()
+
+        self.assertEqual({(1, 2), (2, 3), (1, 3)}, given_result)
+
+    def test_add_dependency_cycle(self):
+        """
+        Testing that a dependency making a process dependent on itself is refused.
+        :return:
+        """
+        with self.assertRaises(Exception) as context:
+            self.add_dependency(parent_process_id=3, child_process_id=1)
+
+        self.assertIn("dependent on itself", str(context.exception))
+
+    def test_delete_dependency(self):
+        """
+        Testing that deleting a dependency only removes ancestors no longer reachable through other dependencies.
+        :return:
+        """
+        self.session.delete(self.session.query(ProcessDependency).get((2, 3)))
+        self.session.flush()
+
+        given_result = self.get_closure()
+
+        self.assertEqual({(1, 2), (1, 3)}, given_result)
+
+    def test_rebuild_dependency_closure(self):
+        """
+        Testing that rebuilding the closure from the dependencies gives the same closure as keeping it up to date.
+        :return:
+        """
+        expected_result = self.get_closure()
+
+        given_count = rebuild_dependency_closure(connection=self.session.connection())
+        given_result = self.get_closure()
+
+        self.assertEqual(3, given_count)
+        self.assertEqual(expected_result, given_result)
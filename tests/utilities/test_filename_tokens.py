@@ -0,0 +1,120 @@
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from process_tracker.models.model_base import Base
+from process_tracker.models.extract import (
+    Extract,
+    ExtractFilenameToken,
+    Location,
+)
+from process_tracker.utilities.filename_tokens import (
+    determine_filename_tokens,
+    determine_whole_tokens,
+    rebuild_filename_tokens,
+)
+
+
+class TestFilenameTokens(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://").execution_options(
+            schema_translate_map={"process_tracker": None}
+        )
+        Base.metadata.create_all(engine)
+
+        self.session = sessionmaker(bind=engine)()
+
+        self.session.add(
+            Location(
+                location_id=1,
+                location_name="Test Location",
+                location_path="/test/path",
+                location_type_id=1,
+            )
+        )
+        self.session.flush()
+
+        for extract_id, filename in [
+            (1, "Sales_2020-01.csv"),
+            (2, "returns_2020-01.csv"),
+        ]:
+            self.session.add(
+                Extract(
+                    extract_id=extract_id,
+                    extract_filename=filename,
+                    extract_location_id=1,
+                )
+            )
+
+        self.session.flush()
+
+    def tearDown(self):
+        self.session.close()
+
+    def get_tokens(self):
+        """
+        Helper function to read the filename tokens as a set of (extract_id, token) pairs.
+        :return:
+        """
+        return set(
+            (token.extract_id, token.filename_token)
+            for token in self.session.query(ExtractFilenameToken)
+        )
+
+    def test_add_extract(self):
+        """
+        Testing that adding extracts through the session adds the tokens of their filenames.
+        :return:
+        """
+        given_result = self.get_tokens()
+
+        expected_result = {
+            (1, "sales"),
+            (1, "2020"),
+            (1, "01"),
+            (1, "csv"),
+            (2, "returns"),
+            (2, "2020"),
+            (2, "01"),
+            (2, "csv"),
+        }
+
+        self.assertEqual(expected_result, given_result)
+
+    def test_determine_filename_tokens(self):
+        """
+        Testing that filenames are split into their distinct lower case runs of letters and digits.
+        :return:
+        """
+        given_result = determine_filename_tokens(filename="dir/Sales_2020-01-01.CSV")
+
+        self.assertEqual(["01", "2020", "csv", "dir", "sales"], given_result)
+
+    def test_determine_whole_tokens(self):
+        """
+        Testing that only tokens that can not be part of a longer filename token are used to narrow a search down.
+        :return:
+        """
+        for match, expected_result in [
+            ("contains", ["2020"]),
+            ("prefix", ["2020", "sales"]),
+            ("suffix", ["01", "2020"]),
+            ("token", ["01", "2020", "sales"]),
+        ]:
+            given_result = determine_whole_tokens(filename="sales_2020-01", match=match)
+
+            self.assertEqual(expected_result, given_result, match)
+
+    def test_rebuild_filename_tokens(self):
+        """
+        Testing that rebuilding the tokens from the extracts gives the same tokens as keeping them up to date.
+        :return:
+        """
+        expected_result = self.get_tokens()
+
+        given_count = rebuild_filename_tokens(connection=self.session.connection())
+        given_result = self.get_tokens()
+
+        self.assertEqual(2, given_count)
+        self.assertEqual(expected_result, given_result)
@@ -0,0 +1,83 @@
+import time
+import unittest
+
+from process_tracker.utilities.lookup_cache import LookupCache
+
+
+class TestLookupCache(unittest.TestCase):
+    def test_get_missing_entry(self):
+        """
+        Testing that an entry not in the cache returns None.
+        :return:
+        """
+        cache = LookupCache()
+
+        self.assertIsNone(cache.get(("actor_lkup", "actor_name", "blarg")))
+
+    def test_set_and_get(self):
+        """
+        Testing that a cached entry is returned.
+        :return:
+        """
+        cache = LookupCache()
+        cache.set(("actor_lkup", "actor_name", "UnitTesting"), 1)
+
+        self.assertEqual(1, cache.get(("actor_lkup", "actor_name", "UnitTesting")))
+
+    def test_entry_expires(self):
+        """
+        Testing that entries are no longer returned once their time to live has passed.
+        :return:
+        """
+        cache = LookupCache(ttl=1)
+        cache.set(("actor_lkup", "actor_name", "UnitTesting"), 1)
+
+        time.sleep(1.1)
+
+        self.assertIsNone(cache.get(("actor_lkup", "actor_name", "UnitTesting")))
+
+    def test_least_recently_used_evicted(self):
+        """
+        Testing that when the cache is full, the least recently used entry is evicted.
+        :return:
+        """
+        cache = LookupCache(max_entries=2)
+        cache.set(("tool_lkup", "tool_name", "Spark"), 1)
+        cache.set(("tool_lkup", "tool_name", "Pandas"), 2)
+        cache.get(("tool_lkup", "tool_name", "Spark"))
+        cache.set(("tool_lkup", "tool_name", "Talend"), 3)
+
+        given_result = [
+            cache.get(("tool_lkup", "tool_name", "Spark")),
+            cache.get(("tool_lkup", "tool_name", "Pandas")),
+            cache.get(("tool_lkup", "tool_name", "Talend")),
+        ]
+
+        self.assertEqual([1, None, 3], given_result)
+
+    def test_invalidate_table(self):
+        """
+        Testing that invalidating a table only removes that table's entries.
+        :return:
+        """
+        cache = LookupCache()
+        cache.set(("tool_lkup", "tool_name", "Spark"), 1)
+        cache.set(("actor_lkup", "actor_name", "UnitTesting"), 1)
+
+        cache.invalidate(table_name="tool_lkup")
+
+        self.assertIsNone(cache.get(("tool_lkup", "tool_name", "Spark")))
+        self.assertEqual(1, cache.get(("actor_lkup", "actor_name", "UnitTesting")))
+
+    def test_invalidate_all(self):
+        """
+        Testing that invalidating without a table clears the whole cache.
+        :return:
+        """
+        cache = LookupCache()
+        cache.set(("tool_lkup", "tool_name", "Spark"), 1)
+        cache.set(("actor_lkup", "actor_name", "UnitTesting"), 1)
+
+        cache.invalidate()
+
+        self.assertEqual(0, len(cache.entries))
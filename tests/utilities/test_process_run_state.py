@@ -0,0 +1,136 @@
+from datetime import datetime
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from process_tracker.models.model_base import Base
+from process_tracker.models.process import Process, ProcessRunState, ProcessTracking
+from process_tracker.utilities.process_run_state import determine_missing_run_states
+
+completed_status_id = 2
+failed_status_id = 3
+running_status_id = 1
+
+
+class TestProcessRunState(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://").execution_options(
+            schema_translate_map={"process_tracker": None}
+        )
+        Base.metadata.create_all(engine)
+
+        self.session = sessionmaker(bind=engine)()
+
+        for process_id, process_name in [
+            (1, "failing"),
+            (2, "recovered"),
+            (3, "tracked"),
+            (4, "never run"),
+        ]:
+            self.session.add(Process(process_id=process_id, process_name=process_name))
+
+        self.session.flush()
+
+        self.add_runs(
+            process_id=1,
+            statuses=[completed_status_id, failed_status_id, failed_status_id],
+        )
+        self.add_runs(
+            process_id=2,
+            statuses=[failed_status_id, completed_status_id, running_status_id],
+        )
+        self.add_runs(process_id=3, statuses=[failed_status_id])
+
+        self.session.add(
+            ProcessRunState(
+                process_id=3,
+                process_tracking_id=self.session.query(ProcessTracking)
+                .filter(ProcessTracking.process_id == 3)
+                .one()
+                .process_tracking_id,
+                process_run_id=1,
+                process_status_id=failed_status_id,
+                consecutive_failure_count=1,
+            )
+        )
+        self.session.flush()
+
+    def tearDown(self):
+        self.session.close()
+
+    def add_runs(self, process_id, statuses):
+        """
+        Helper function to add a run of the process for each status, in order.
+        :return:
+        """
+        for process_run_id, status_id in enumerate(statuses, start=1):
+            self.session.add(
+                ProcessTracking(
+                    process_id=process_id,
+                    process_run_id=process_run_id,
+                    process_status_id=status_id,
+                    process_run_start_date_time=datetime.now(),
+                    process_run_actor_id=1,
+                )
+            )
+
+        self.session.flush()
+
+    def get_latest_run_tracking_id(self, process_id):
+        """
+        Helper function to find the process tracking id of the process' latest run.
+        :return:
+        """
+        return (
+            self.session.query(ProcessTracking)
+            .filter(ProcessTracking.process_id == process_id)
+            .order_by(ProcessTracking.process_run_id.desc())
+            .first()
+            .process_tracking_id
+        )
+
+    def test_determine_missing_run_states(self):
+        """
+        Testing that the run state of processes with runs but no run state is worked out from their latest run, counting
+        the failed runs since the latest completed run.
+        :return:
+        """
+        expected_result = [
+            {
+                "process_id": 1,
+                "process_tracking_id": self.get_latest_run_tracking_id(process_id=1),
+                "process_run_id": 3,
+                "process_status_id": failed_status_id,
+                "consecutive_failure_count": 2,
+            },
+            {
+                "process_id": 2,
+                "process_tracking_id": self.get_latest_run_tracking_id(process_id=2),
+                "process_run_id": 3,
+                "process_status_id": running_status_id,
+                "consecutive_failure_count": 0,
+            },
+        ]
+
+        given_result = determine_missing_run_states(
+            connection=self.session.connection(),
+            completed_status_id=completed_status_id,
+            failed_status_id=failed_status_id,
+        )
+
+        self.assertEqual(expected_result, given_result)
+
+    def test_determine_missing_run_states_for_processes(self):
+        """
+        Testing that only the run state of the given processes is worked out.
+        :return:
+        """
+        given_result = determine_missing_run_states(
+            connection=self.session.connection(),
+            completed_status_id=completed_status_id,
+            failed_status_id=failed_status_id,
+            process_ids=[2, 3, 4],
+        )
+
+        self.assertEqual([2], [row["process_id"] for row in given_result])
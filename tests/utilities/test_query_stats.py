@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+
+from process_tracker.utilities.query_stats import QueryStats
+
+
+class TestQueryStats(unittest.TestCase):
+    def test_attach_engine(self):
+        """
+        Testing that statements run through an attached engine are recorded.
+        :return:
+        """
+        query_stats = QueryStats()
+        engine = create_engine("sqlite://")
+
+        query_stats.attach(engine)
+        query_stats.attach(engine)
+
+        engine.execute("SELECT 1")
+        engine.execute("SELECT 2")
+
+        given_result = query_stats.stats()
+
+        self.assertEqual(1, len(given_result))
+        self.assertEqual(2, list(given_result.values())[0]["statements"])
+
+    def test_dump(self):
+        """
+        Testing that the statistics can be written to a JSON file.
+        :return:
+        """
+        query_stats = QueryStats()
+        query_stats.record(
+            operation="ProcessTracker.change_run_status",
+            statement="UPDATE process_tracking",
+            elapsed=0.5,
+        )
+
+        with tempfile.TemporaryDirectory() as stats_dir:
+            stats_file = os.path.join(stats_dir, "stats.json")
+
+            query_stats.dump(file_path=stats_file)
+
+            with open(stats_file) as dumped:
+                given_result = json.load(dumped)
+
+        self.assertEqual(
+            1, given_result["ProcessTracker.change_run_status"]["statements"]
+        )
+
+    def test_record(self):
+        """
+        Testing that statement counts and total time are kept per operation, and only the slowest statements are kept.
+        :return:
+        """
+        query_stats = QueryStats(slowest=2)
+
+        for elapsed in [0.1, 0.4, 0.2, 0.3]:
+            query_stats.record(
+                operation="ExtractTracker.change_extract_status",
+                statement="UPDATE extract_tracking %s" % elapsed,
+                elapsed=elapsed,
+            )
+
+        given_result = query_stats.stats()["ExtractTracker.change_extract_status"]
+
+        self.assertEqual(4, given_result["statements"])
+        self.assertAlmostEqual(1.0, given_result["total_time"])
+        self.assertEqual(
+            [0.4, 0.3], [statement["time"] for statement in given_result["slowest"]]
+        )
+
+    def test_reset(self):
+        """
+        Testing that resetting clears all statistics.
+        :return:
+        """
+        query_stats = QueryStats()
+        query_stats.record(operation="other", statement="SELECT 1", elapsed=0.1)
+
+        query_stats.reset()
+
+        self.assertEqual({}, query_stats.stats())
+
+    def test_stats_ordering(self):
+        """
+        Testing that operations are ordered by total time, most first.
+        :return:
+        """
+        query_stats = QueryStats()
+        query_stats.record(operation="fast", statement="SELECT 1", elapsed=0.1)
+        query_stats.record(operation="slow", statement="SELECT 2", elapsed=0.9)
+
+        self.assertEqual(["slow", "fast"], list(query_stats.stats().keys()))